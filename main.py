@@ -1,6 +1,7 @@
 from pathlib import Path
 import argparse
 import logging
+import multiprocessing
 
 from src.core import logs
 
@@ -8,16 +9,118 @@ logs.setup(logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 if __name__ == "__main__":
+    # XML documents may be rendered in worker processes of the frozen app
+    multiprocessing.freeze_support()
+
     parser = argparse.ArgumentParser(description="Internal tooling for Siemens PLC Engineers by Titus Global Tech.")
     parser.add_argument("-j", "--json",
                         type=Path,
                         help="JSON config file path"
                         )
+    parser.add_argument("-b", "--bundle",
+                        type=Path,
+                        help="bundle built by scripts/build_bundle.py to import, nothing is generated"
+                        )
+    parser.add_argument("--stream",
+                        action="store_true",
+                        help="with --json: create the project one device at a time, holding only that device's part of the config in memory"
+                        )
+    parser.add_argument("--version",
+                        help="TIA Portal version to import the bundle or stream the config with (default: the newest)"
+                        )
+    parser.add_argument("--projects",
+                        type=Path,
+                        help="directory to create the projects of the bundle in"
+                        )
+    parser.add_argument("--libraries",
+                        type=Path,
+                        help="directory with the global libraries the bundle opens"
+                        )
+    parser.add_argument("--settings",
+                        type=Path,
+                        help="JSON file with the settings of a run (default: settings.json in the app data directory)"
+                        )
+    parser.add_argument("--scratch-directory",
+                        type=Path,
+                        help="directory for the documents handed to TIA Portal, e.g. on a RAM disk"
+                        )
+    parser.add_argument("--keep-scratch",
+                        action="store_true",
+                        default=None,
+                        help="keep the documents handed to TIA Portal after the run, for debugging"
+                        )
+    parser.add_argument("-w", "--workers",
+                        type=int,
+                        help="processes rendering XML documents (default: one per core)"
+                        )
+    parser.add_argument("--no-xml-cache",
+                        dest="xml_cache",
+                        action="store_false",
+                        default=None,
+                        help="generate every XML document again instead of reusing documents of earlier runs"
+                        )
+    parser.add_argument("--scl-sources",
+                        action="store_true",
+                        default=None,
+                        help="generate SCL blocks through external sources, many blocks per Openness call"
+                        )
+    parser.add_argument("--library-mirror",
+                        nargs="?",
+                        const=True,
+                        type=Path,
+                        metavar="DIRECTORY",
+                        help="open read-only libraries from a local copy, e.g. instead of from a network share (default directory: in the app data directory)"
+                        )
     args = parser.parse_args()
 
     json_config = args.json
 
-    if not json_config:
+    def load_settings() -> dict:
+        from src.core import settings
+
+        loaded = settings.load(args.settings or settings.SETTINGS_FILE)
+        return settings.merge(loaded, {
+            # the options of the settings file, if it has any
+            'scl_sources': (loaded['scl_sources'] or {}) if args.scl_sources else None,
+            'scratch_directory': args.scratch_directory,
+            'keep_scratch': args.keep_scratch,
+            'xml_workers': args.workers,
+            'xml_cache': args.xml_cache,
+            'library_mirror': args.library_mirror,
+        })
+
+    def load_portal():
+        from src.core import core
+        import src.modules.Portals as Portals
+
+        dlls = core.generate_dlls()
+        version = args.version or sorted(dlls)[-1]
+        if version not in dlls:
+            parser.error(f"unknown version {version}, available: {', '.join(sorted(dlls))}")
+        return Portals.load(dlls[version])
+
+    if args.bundle:
+        logger.info("Application started to import a bundle.")
+        from src.core import core
+
+        core.replay(load_portal(), args.bundle, load_settings() | {
+            'project_directory': args.projects,
+            'library_directory': args.libraries,
+        })
+
+    elif args.stream:
+        if not json_config:
+            parser.error("--stream needs --json")
+        logger.info("Application started to stream a config.")
+        from src.core import core
+
+        core.execute_streaming(load_portal(), json_config, {
+            'name': json_config.stem,
+            'directory': json_config.absolute().parent,
+            'overwrite': True,
+        }, load_settings())
+
+    elif not json_config:
         logger.info("Application started as GUI.")
         import sys
 
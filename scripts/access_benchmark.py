@@ -0,0 +1,55 @@
+from pathlib import Path
+import argparse
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import src.modules.ProgramBlocks as ProgramBlocks  # noqa: E402
+
+
+def wire_values(count: int, distinct: int) -> list[str]:
+    # what wiring of a large plant looks like: constants, tags, array
+    # elements and deeper paths, with `distinct` different values
+    forms = [
+        lambda n: "true" if n % 2 else "false",
+        lambda n: str(n),
+        lambda n: f"T#{n % 60}s",
+        lambda n: f"IO.Motor_{n}_Start",
+        lambda n: f"DB_Master.All_Drives[{n}]",
+        lambda n: f'"Line DB".Motors[{n % 32}].Status.Running',
+        lambda n: f"#Stat.Matrix[{n % 16}, #i].Value",
+    ]
+    values = [forms[n % len(forms)](n) for n in range(distinct)]
+    return [random.choice(values) for _ in range(count)]
+
+
+def measure(values: list[str], cold: bool) -> float:
+    if cold:
+        ProgramBlocks.ACCESS_PATHS.clear()
+    start = time.perf_counter()
+    for value in values:
+        ProgramBlocks.parse_access(value)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time parsing wire values into access paths.")
+    parser.add_argument("-n", "--values", type=int, default=100000,
+                        help="Wire values parsed")
+    parser.add_argument("-d", "--distinct", type=int, default=5000,
+                        help="Different values among them")
+    args = parser.parse_args()
+
+    random.seed(1)
+    values = wire_values(args.values, args.distinct)
+    unique = list(dict.fromkeys(values))
+    first = measure(unique, True)
+    parsing = measure(values, True)
+    cached = measure(values, False)
+
+    print(f"{len(unique)} distinct values parsed in {first * 1000:.1f} ms "
+          f"({first / len(unique) * 1e6:.2f} us each)")
+    print(f"{args.values} wire values: {parsing * 1000:.1f} ms, "
+          f"{cached * 1000:.1f} ms with every value parsed before")
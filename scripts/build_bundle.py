@@ -0,0 +1,42 @@
+from pathlib import Path
+import argparse
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core import core, settings  # noqa: E402
+from src.core.cache import DiskCache  # noqa: E402
+from src.schemas import configuration  # noqa: E402
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Translate a config and generate its XML documents into a bundle, without "
+                    "TIA Portal. Import it on the engineering host with main.py --bundle.")
+    parser.add_argument("-j", "--json", type=Path, required=True,
+                        help="JSON config file path")
+    parser.add_argument("-o", "--output", type=Path,
+                        help="bundle to write (default: the config's name with .zip)")
+    parser.add_argument("-w", "--workers", type=int, default=settings.DEFAULTS['xml_workers'],
+                        help="processes rendering XML documents (default: one per core)")
+    parser.add_argument("--scl-sources", action="store_true",
+                        help="generate SCL blocks through external sources")
+    parser.add_argument("--schemas", type=Path,
+                        help="directory of the Openness XSD files to validate against")
+    parser.add_argument("--no-validate", action="store_true",
+                        help="do not check the generated documents")
+    args = parser.parse_args()
+
+    config = configuration.load(args.json, DiskCache(configuration.VERSION)) | {
+        'name': args.json.stem,
+        'directory': args.json.absolute().parent,
+        'overwrite': True,
+    }
+    output = args.output or args.json.with_suffix('.zip')
+    plan = core.build_bundle(config, {
+        'xml_workers': args.workers,
+        'scl_sources': {} if args.scl_sources else None,
+        'schema_directory': args.schemas,
+        'validate_xml': not args.no_validate,
+    }, output, args.json.absolute().parent)
+    print(f"{output}: {len(plan.Operations)} operations, {len(plan.Documents)} documents")
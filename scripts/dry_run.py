@@ -0,0 +1,60 @@
+from pathlib import Path
+import argparse
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core import bundle, catalog, core, planner, settings, validation  # noqa: E402
+from src.core.cache import DiskCache  # noqa: E402
+from src.schemas import configuration  # noqa: E402
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Print what executing a config would do in TIA Portal, with estimated times.")
+    parser.add_argument("-j", "--json", type=Path,
+                        help="JSON config file path")
+    parser.add_argument("-p", "--plan", type=Path,
+                        help="saved plan to print instead of a config")
+    parser.add_argument("-b", "--bundle", type=Path,
+                        help="bundle to print instead of a config")
+    parser.add_argument("-s", "--save", type=Path,
+                        help="write the plan to this file, its documents next to it")
+    parser.add_argument("-c", "--costs", type=Path, default=planner.COSTS_FILE,
+                        help="seconds per operation, as saved by earlier runs")
+    parser.add_argument("-w", "--workers", type=int, default=settings.DEFAULTS['xml_workers'],
+                        help="processes rendering XML documents (default: one per core)")
+    parser.add_argument("-V", "--validate", action="store_true",
+                        help="check the generated documents as a run would")
+    parser.add_argument("--scl-sources", action="store_true",
+                        help="generate SCL blocks through external sources")
+    parser.add_argument("--schemas", type=Path,
+                        help="directory of the Openness XSD files to validate against")
+    args = parser.parse_args()
+
+    if args.plan:
+        plan = planner.Plan.load(args.plan)
+    elif args.bundle:
+        plan = bundle.read(args.bundle)
+    elif args.json:
+        config = configuration.load(args.json, DiskCache(configuration.VERSION)) | {
+            'name': args.json.stem,
+            'directory': args.json.absolute().parent,
+            'overwrite': True,
+        }
+        plan = core.plan(config, {'xml_workers': args.workers,
+                                  'scl_sources': {} if args.scl_sources else None},
+                         args.json.absolute().parent)
+    else:
+        parser.error("one of --json, --plan or --bundle is required")
+
+    if args.save:
+        plan.save(args.save)
+    print(planner.describe(plan, planner.load_costs(args.costs)))
+    # only libraries cataloged by an earlier run are checked
+    for missing in catalog.check_plan(plan):
+        print(f"Mastercopy not found: {missing}")
+    if args.validate:
+        validation.validate_plan(plan, {'xml_workers': args.workers,
+                                        'schema_directory': args.schemas})
+        print(f"{len(plan.Documents)} documents are valid")
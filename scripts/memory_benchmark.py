@@ -0,0 +1,57 @@
+from pathlib import Path
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.synthetic_config import generate  # noqa: E402
+from src.core import core  # noqa: E402
+from src.schemas import configuration  # noqa: E402
+
+PROJECT = {'name': "Benchmark", 'directory': Path("projects"), 'overwrite': True}
+
+
+def full(path: Path):
+    # the plan of every device at once, as execute builds it
+    with open(path) as file:
+        config = configuration.validate(json.load(file)) | PROJECT
+    core.plan(config, {})
+
+
+def streaming(path: Path):
+    # one plan per device, each dropped before the next is built, as
+    # execute_streaming runs them
+    for plan in core.stream_plans(path, PROJECT, {}):
+        del plan
+
+
+def peak(run, path: Path) -> float:
+    gc.collect()
+    tracemalloc.start()
+    run(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak / 2**20
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Peak memory of the in-memory and the streaming execution path.")
+    parser.add_argument("-b", "--blocks", type=int, default=200,
+                        help="Program blocks per device")
+    parser.add_argument("-d", "--devices", type=int, nargs='+', default=[1, 2, 4, 8],
+                        help="Device counts to measure")
+    args = parser.parse_args()
+
+    print(f"{'devices':<10}{'full':>12}{'streaming':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for devices in args.devices:
+            path = Path(directory) / f"config_{devices}.json"
+            with open(path, 'w') as file:
+                json.dump(generate(args.blocks * devices, devices), file)
+            print(f"{devices:<10}{peak(full, path):>9.2f} MB{peak(streaming, path):>9.2f} MB")
@@ -0,0 +1,150 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import MISSING, field, fields, make_dataclass
+from pathlib import Path
+import argparse
+import gc
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import tracemalloc
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.synthetic_config import generate  # noqa: E402
+from src.core.core import helper_clean_plcblock, helper_clean_variable_sections  # noqa: E402
+from src.core.resolver import Resolver  # noqa: E402
+from src.modules.ProgramBlocks import PlcEnum, VariableStruct  # noqa: E402
+from src.schemas import configuration  # noqa: E402
+
+# dict-backed: the member dataclasses as they were before slots and
+# interning; slotted: slots without interning; compact: what runs use
+MODELS: tuple[str, ...] = ('dict-backed', 'slotted', 'compact')
+# the slotted member classes, by the modules that create them
+SLOTTED: dict[str, tuple[str, ...]] = {
+    'src.modules.ProgramBlocks': ('VariableStruct', 'VariableArray', 'VariableSection',
+                                  'WireParameter', 'AccessComponent', 'AccessValue'),
+    'src.modules.BlocksDBArrays': ('VariableArray',),
+}
+
+
+def rss() -> int | None:
+    # resident set size of this process, where it can be read
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def dict_backed(cls: type) -> type:
+    # A copy of a slotted member class that keeps its fields in a __dict__,
+    # as the members did before
+    return make_dataclass(
+        cls.__name__,
+        [(member.name, member.type) if member.default is MISSING else
+         (member.name, member.type, field(default=member.default)) for member in fields(cls)],
+        namespace={name: value for name, value in vars(cls).items()
+                   if callable(value) and not name.startswith('__')},
+        frozen=cls.__dataclass_params__.frozen)
+
+
+def instance_size(cls: type, count: int = 10000) -> int:
+    # bytes of a VariableStruct-like instance with everything it refers to
+    # shared, as its __dict__ is not counted by sys.getsizeof
+    attributes: dict = {}
+    gc.collect()
+    tracemalloc.start()
+    instances = [cls("Name", "Bool", True, "", attributes) for _ in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instances
+
+    return round(current / count)
+
+
+def use_dict_backed():
+    # the builders create members through these module attributes
+    copies: dict[type, type] = {}
+    for name, classes in SLOTTED.items():
+        module = importlib.import_module(name)
+        for attribute in classes:
+            cls = getattr(module, attribute)
+            setattr(module, attribute, copies.setdefault(cls, dict_backed(cls)))
+
+
+def build(text: str, model: str) -> dict[str, int | None]:
+    # Only the model is kept: the parsed config is dropped before measuring,
+    # as it is once a run has translated it. Runs in a process of its own, so
+    # the RSS of one model does not include what another left behind; RSS
+    # also holds what the allocator keeps of the dropped config.
+    if model == 'dict-backed':
+        use_dict_backed()
+    gc.collect()
+    before = rss()
+    tracemalloc.start()
+    config = configuration.validate(json.loads(text))
+    resolver = Resolver(config, model == 'compact')
+    built = [helper_clean_plcblock(block, resolver) for block in config['Program blocks']]
+    built += [helper_clean_variable_sections(None, block.get('id'), resolver)
+              for block in config['Program blocks']
+              if block.get('type') == PlcEnum.GlobalDB]
+    del config, resolver
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    after = rss()
+
+    return {
+        'retained': current,
+        'peak': peak,
+        'rss': after - before if before is not None and after is not None else None,
+    }
+
+
+def megabytes(value: int | None) -> str:
+    return f"{value / 2**20:>11.2f} MB" if value is not None else f"{'n/a':>14}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare memory of the dict-backed block model with the slotted and the compact "
+                    "(slotted and interned) one.")
+    parser.add_argument("-j", "--json", type=Path,
+                        help="JSON config file path (synthetic when omitted)")
+    parser.add_argument("-b", "--blocks", type=int, default=1000,
+                        help="Blocks of the synthetic config")
+    args = parser.parse_args()
+
+    if args.json:
+        text = args.json.read_text()
+    else:
+        text = json.dumps(generate(args.blocks))
+
+    print(f"VariableStruct instance: {instance_size(VariableStruct)} bytes slotted, "
+          f"{instance_size(dict_backed(VariableStruct))} bytes dict-backed")
+
+    results: dict[str, dict[str, int | None]] = {}
+    for model in MODELS:
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results[model] = pool.submit(build, text, model).result()
+
+    print(f"{'model':<12}{'retained':>14}{'peak':>14}{'RSS':>14}")
+    for model, result in results.items():
+        print(f"{model:<12}{megabytes(result['retained'])}{megabytes(result['peak'])}{megabytes(result['rss'])}")
+
+    baseline = results['dict-backed']
+    for model in MODELS[1:]:
+        line = f"{model}: saved {(1 - results[model]['retained'] / baseline['retained']) * 100:.1f}% of retained memory"
+        if baseline['rss'] and results[model]['rss'] is not None:
+            line += f", {(1 - results[model]['rss'] / baseline['rss']) * 100:.1f}% of RSS"
+        print(f"{line} against the dict-backed model")
+    print("RSS is the growth of each model's process, including what the allocator keeps of the dropped config")
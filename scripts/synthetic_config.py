@@ -0,0 +1,131 @@
+from pathlib import Path
+import argparse
+import json
+
+DATATYPES = ["Bool", "Int", "DInt", "Real", "Time", "String"]
+
+
+def generate(blocks: int, devices: int = 1, members: int = 20) -> dict:
+    # Plant-shaped config: per device one Main OB whose networks each call an
+    # FB instance, plus Global DBs with `members` variables each.
+    config: dict = {
+        "devices": [],
+        "PLC tags": [],
+        "PLC data types": [],
+        "Wire template": [],
+        "Program blocks": [],
+        "Network sources": [],
+        "Variable sections": [],
+        "Instances": [],
+        "Wire parameters": [],
+    }
+
+    config["Wire template"].append({
+        "block_name": "Motor",
+        "parameters": [
+            {"name": "Start", "section": "Input", "datatype": "Bool"},
+            {"name": "Speed", "section": "Input", "datatype": "Int"},
+            {"name": "Running", "section": "Output", "datatype": "Bool"},
+        ],
+    })
+    config["PLC data types"].append({
+        "Name": "UDT_Motor",
+        "types": [{"Name": f"Field_{i}", "Datatype": DATATYPES[i % len(DATATYPES)],
+                   "attributes": {"ExternalAccessible": True}}
+                  for i in range(members)],
+    })
+
+    next_id = 1
+    per_device = max(1, blocks // devices)
+    for device_id in range(1, devices + 1):
+        config["devices"].append({
+            "id": device_id,
+            "p_name": f"PLC_{device_id}",
+            "p_deviceName": f"PLC_{device_id}",
+            "p_typeIdentifier": "OrderNumber:6ES7 512-1DK01-0AB0/V2.6",
+            "network_interface": {"subnet_name": f"PN/IE_{device_id}", "io_controller": "PNIO"},
+        })
+        config["PLC tags"].append({
+            "DeviceID": device_id,
+            "Name": "Tags",
+            "Tags": [{"Name": f"Tag_{i}", "DataTypeName": "Bool",
+                      "LogicalAddress": f"%I{i // 8}.{i % 8}"}
+                     for i in range(members)],
+        })
+
+        main_id = next_id
+        next_id += 1
+        config["Program blocks"].append({
+            "id": main_id, "DeviceID": device_id, "type": "SW.Blocks.OB",
+            "name": "Main", "programming_language": "FBD", "number": 1,
+        })
+        motor_id = next_id
+        next_id += 1
+        config["Program blocks"].append({
+            "id": motor_id, "DeviceID": device_id, "type": "SW.Blocks.FB",
+            "name": "Motor", "programming_language": "FBD", "number": 1,
+            "blockgroup_folder": "/Motors",
+        })
+        config["Variable sections"].append({
+            "plc_block_id": motor_id, "name": "Input",
+            "data": [{"name": "Start", "datatype": "Bool"},
+                     {"name": "Speed", "datatype": "Int"}],
+        })
+
+        for index in range((per_device - 2) // 2):
+            network_id = next_id
+            next_id += 1
+            config["Network sources"].append({
+                "id": network_id, "plc_block_id": main_id,
+                "title": f"Motor {index}",
+            })
+            call_id = next_id
+            next_id += 1
+            config["Program blocks"].append({
+                "id": call_id, "DeviceID": device_id, "type": "SW.Blocks.FB",
+                "name": "Motor", "network_source_id": network_id,
+                "programming_language": "FBD",
+            })
+            config["Instances"].append({
+                "id": call_id, "DeviceID": device_id, "plc_block_id": call_id,
+                "name": f"Motor_{index}_DB", "call_option": "Single",
+                "number": 100 + index, "blockgroup_folder": "/Motors/DB",
+            })
+            config["Wire parameters"].append({
+                "plc_block_id": call_id,
+                "parameters": {"Start": f"Tags.Start[{index}]", "Speed": "100"},
+            })
+
+            db_id = next_id
+            next_id += 1
+            config["Program blocks"].append({
+                "id": db_id, "DeviceID": device_id, "type": "SW.Blocks.GlobalDB",
+                "name": f"DB_Motor_{index}", "number": 1000 + index,
+                "blockgroup_folder": "/DB", "attributes": {"MemoryLayout": "Optimized"},
+            })
+            config["Variable sections"].append({
+                "plc_block_id": db_id, "name": "Static",
+                "data": [{"name": f"Value_{i}", "datatype": DATATYPES[i % len(DATATYPES)],
+                          "attributes": {"ExternalAccessible": True, "ExternalVisible": True}}
+                         for i in range(members)],
+            })
+
+    return config
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic plant config for benchmarks.")
+    parser.add_argument("-b", "--blocks", type=int, default=1000,
+                        help="Approximate number of program blocks")
+    parser.add_argument("-d", "--devices", type=int, default=1,
+                        help="Number of PLC devices")
+    parser.add_argument("-m", "--members", type=int, default=20,
+                        help="Members per DB and data type")
+    parser.add_argument("-o", "--output", type=Path, required=True,
+                        help="JSON file to write")
+    args = parser.parse_args()
+
+    with open(args.output, 'w') as file:
+        json.dump(generate(args.blocks, args.devices, args.members), file)
+    print(f"Written synthetic config to {args.output}.")
@@ -0,0 +1,89 @@
+from pathlib import Path
+import argparse
+import json
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core import core  # noqa: E402
+from src.schemas import configuration  # noqa: E402
+import src.modules.BlocksOB as BlocksOB  # noqa: E402
+import src.modules.ProgramBlocks as ProgramBlocks  # noqa: E402
+
+
+def plant(motors: int) -> dict:
+    # One Main OB calling the Motor FB once per network, with an instance DB
+    # and wiring per call: written out, or as a template.
+    config = {
+        "devices": [{"id": 1, "p_name": "PLC_1", "p_deviceName": "PLC_1",
+                     "p_typeIdentifier": "OrderNumber:6ES7 512-1DK01-0AB0/V2.6"}],
+        "Wire template": [{"block_name": "Motor", "parameters": [
+            {"name": "Start", "section": "Input", "datatype": "Bool"},
+            {"name": "Speed", "section": "Input", "datatype": "Int"},
+            {"name": "Running", "section": "Output", "datatype": "Bool"},
+        ]}],
+        "Program blocks": [
+            {"id": 1, "DeviceID": 1, "type": "SW.Blocks.OB", "name": "Main",
+             "programming_language": "FBD"},
+            {"id": 2, "DeviceID": 1, "type": "SW.Blocks.FB", "name": "Motor",
+             "programming_language": "FBD"},
+        ],
+    }
+    config["Templates"] = [{
+        "name": "motors",
+        "parameters": {"n": {"range": [motors]}},
+        "Network sources": [{"id": "{n*2+1000}", "plc_block_id": 1, "title": "Motor {n}"}],
+        "Program blocks": [{"id": "{n*2+1001}", "DeviceID": 1, "type": "SW.Blocks.FB",
+                            "name": "Motor", "network_source_id": "{n*2+1000}",
+                            "programming_language": "FBD"}],
+        "Instances": [{"id": "{n*2+1001}", "DeviceID": 1, "plc_block_id": "{n*2+1001}",
+                       "name": "Motor_{n:03d}_DB", "call_option": "Single",
+                       "number": "{n+100}", "blockgroup_folder": "/Motors"}],
+        "Wire parameters": [{"plc_block_id": "{n*2+1001}", "parameters": {
+            "Start": "Tags.Start[{n}]", "Speed": "{n+1000:d}", "Running": "Tags.Running[{n}]"}}],
+    }]
+
+    return config
+
+
+def direct(programming_language, network_source, block_id) -> str:
+    # how every compile unit used to be made: built and serialized in full
+    return ET.tostring(ProgramBlocks.BlockCompileUnit(
+        programming_language, network_source, block_id).root, encoding='unicode')
+
+
+def timed(run, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Config size and OB generation time with block templates.")
+    parser.add_argument("-m", "--motors", type=int, default=400,
+                        help="Motor calls in the Main OB")
+    parser.add_argument("-r", "--repeat", type=int, default=5,
+                        help="Runs per measurement, the best one is reported")
+    args = parser.parse_args()
+
+    templated = plant(args.motors)
+    expanded = configuration.templates.expand(templated)
+    print(f"config size: {len(json.dumps(expanded)) / 1024:.0f} KiB written out, "
+          f"{len(json.dumps(templated)) / 1024:.0f} KiB with a template")
+
+    translation = core.translate(configuration.validate(templated), {})
+    main = next(plc for plc in translation.PlcBlocks[1] if plc.Name == "Main")
+
+    templates = timed(lambda: BlocksOB.XML(main).xml(), args.repeat)
+    BlocksOB.render_compile_unit = direct
+    built = timed(lambda: BlocksOB.XML(main).xml(), args.repeat)
+    BlocksOB.render_compile_unit = ProgramBlocks.render_compile_unit
+    print(f"Main OB XML: {built * 1000:.1f} ms built per network, "
+          f"{templates * 1000:.1f} ms from compile unit templates ({built / templates:.1f}x)")
@@ -0,0 +1,56 @@
+from pathlib import Path
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.synthetic_config import generate  # noqa: E402
+from src.core.cache import DiskCache  # noqa: E402
+from src.schemas import configuration  # noqa: E402
+
+
+def timed(validate, config: dict, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        validate(config)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the schema library with the compiled validator.")
+    parser.add_argument("-j", "--json", type=Path,
+                        help="JSON config file path (synthetic when omitted)")
+    parser.add_argument("-b", "--blocks", type=int, default=10000,
+                        help="Blocks of the synthetic config")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="Runs per validator, the best one is reported")
+    args = parser.parse_args()
+
+    if args.json:
+        with open(args.json) as file:
+            config = json.load(file)
+    else:
+        config = generate(args.blocks)
+
+    assert configuration.root.validate(config) == configuration.validate(config)
+
+    library = timed(configuration.root.validate, config, args.repeat)
+    compiled = timed(configuration.validate, config, args.repeat)
+    print(f"{'schema':<10}{library:>9.3f} s")
+    print(f"{'compiled':<10}{compiled:>9.3f} s")
+    print(f"speed-up  {library / compiled:>9.1f}x")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "config.json"
+        path.write_text(json.dumps(config))
+        cache = DiskCache(configuration.VERSION, Path(directory) / "cache")
+        configuration.load(path, cache)
+        cached = timed(lambda _: configuration.load(path, cache), config, args.repeat)
+    print(f"{'cached':<10}{cached:>9.3f} s (load of an unchanged file)")
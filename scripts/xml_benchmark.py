@@ -0,0 +1,70 @@
+from pathlib import Path
+import argparse
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.modules.ProgramBlocks import VariableSection, VariableStruct  # noqa: E402
+from src.modules.XML import Streamed  # noqa: E402
+import src.modules.BlocksData as BlocksData  # noqa: E402
+
+
+def data_block(members: int) -> BlocksData.DataBlock:
+    structs = [VariableStruct(f"Member_{number}", "Int" if number % 3 else '"Motor_UDT"',
+                              number % 2 == 0, str(number) if number % 4 else '',
+                              {'ExternalWritable': False} if number % 5 == 0 else {})
+               for number in range(members)]
+    return BlocksData.DataBlock(Name="DB_Benchmark", Number=1, BlockGroupPath="/", DeviceID=1,
+                                VariableSections=[VariableSection("Static", structs)],
+                                Attributes={"MemoryLayout": "Optimized"})
+
+
+def tree(data: BlocksData.DataBlock) -> Path:
+    # what Base.write does
+    return BlocksData.XML(data).write()
+
+
+def streamed(data: BlocksData.DataBlock) -> Path:
+    return Streamed(BlocksData.XML, data).write()
+
+
+def measure(write, data: BlocksData.DataBlock, repeat: int) -> tuple[float, int, bytes]:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        filename = write(data)
+        best = min(best, time.perf_counter() - start)
+        filename.unlink()
+
+    tracemalloc.start()
+    filename = write(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    content = filename.read_bytes()
+    filename.unlink()
+
+    return best, peak, content
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare writing a large global DB through the element tree and streamed.")
+    parser.add_argument("-m", "--members", type=int, default=50000,
+                        help="Members of the DB")
+    parser.add_argument("-r", "--repeat", type=int, default=5,
+                        help="Runs per measurement, the best one is reported")
+    args = parser.parse_args()
+
+    data = data_block(args.members)
+    tree_time, tree_peak, tree_bytes = measure(tree, data, args.repeat)
+    stream_time, stream_peak, stream_bytes = measure(streamed, data, args.repeat)
+
+    assert tree_bytes == stream_bytes, "streamed document differs"
+    size = len(tree_bytes) / 2**20
+    print(f"{args.members} members, {size:.1f} MiB of XML")
+    print(f"tree:     {tree_time * 1000:8.1f} ms {size / tree_time:7.1f} MiB/s, peak {
+          tree_peak / 2**20:6.2f} MiB")
+    print(f"streamed: {stream_time * 1000:8.1f} ms {size / stream_time:7.1f} MiB/s, peak {
+          stream_peak / 2**20:6.2f} MiB ({tree_time / stream_time:.1f}x)")
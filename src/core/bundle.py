@@ -0,0 +1,111 @@
+from __future__ import annotations
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath, PureWindowsPath
+from typing import Any
+import hashlib
+import json
+import logging
+import zipfile
+
+from src.core import logs
+from src.core.planner import Operation, Plan, PLAN_VERSION
+from src.core.workspace import DocumentStore
+from src.modules.XML import generator_version
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+BUNDLE_VERSION: int = 1
+MANIFEST: str = 'manifest.json'
+DOCUMENTS: str = 'documents'
+
+
+# A bundle is a zip of everything a run imports, built where TIA Portal is
+# not installed: manifest.json with the operations in order and the name,
+# size and SHA-256 of every document, and the documents under documents/.
+# Replaying it on the engineering host only performs the imports.
+
+def write(plan: Plan, path: Path, source: str = '') -> Path:
+    # Written next to `path` and renamed when complete, so an interrupted
+    # build never leaves a bundle behind
+    order = list(dict.fromkeys(operation.Args['document'] for operation in plan.Operations
+                               if 'document' in operation.Args))
+    documents: list[dict[str, Any]] = []
+    partial = path.with_name(f"{path.name}.partial")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(partial, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for key in order:
+            data = plan.Documents[key].encode('utf-8')
+            name = f"{DOCUMENTS}/{key}{plan.Documents.path(key).suffix}"
+            with archive.open(name, 'w') as entry:
+                entry.write(data)
+            documents.append({'Key': key, 'File': name, 'Size': len(data),
+                              'SHA256': hashlib.sha256(data).hexdigest()})
+
+        manifest = {
+            'Version': BUNDLE_VERSION,
+            'PlanVersion': PLAN_VERSION,
+            'GeneratorVersion': generator_version(),
+            'Created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'Source': source,
+            'Operations': [{'Kind': operation.Kind, 'Args': operation.Args}
+                           for operation in plan.Operations],
+            'Documents': documents,
+        }
+        archive.writestr(MANIFEST, json.dumps(manifest, indent=1))
+    partial.replace(path)
+    logger.info(f"Bundled {len(plan.Operations)} operations and {len(documents)} documents in {path}")
+
+    return path
+
+
+def read(path: Path, documents: DocumentStore | None = None) -> Plan:
+    # The plan of a bundle, with every document checked against its hash and
+    # written once, to `documents`
+    with zipfile.ZipFile(path) as archive:
+        try:
+            manifest = json.loads(archive.read(MANIFEST))
+        except KeyError:
+            raise ValueError(f"{path} is not a bundle, it has no {MANIFEST}")
+        if manifest.get('Version') != BUNDLE_VERSION or manifest.get('PlanVersion') != PLAN_VERSION:
+            raise ValueError(f"Bundle {path} has version {manifest.get('Version')} (plan {
+                             manifest.get('PlanVersion')}), expected {BUNDLE_VERSION} (plan {PLAN_VERSION})")
+
+        plan = Plan([Operation(operation['Kind'], operation['Args'])
+                     for operation in manifest['Operations']],
+                    DocumentStore() if documents is None else documents)
+        for document in manifest['Documents']:
+            try:
+                data = archive.read(document['File'])
+            except KeyError:
+                raise ValueError(f"Bundle {path} has no {document['File']}")
+            if len(data) != document['Size'] or hashlib.sha256(data).hexdigest() != document['SHA256']:
+                raise ValueError(f"Bundle {path} has a damaged {document['File']}")
+            plan.Documents.add(document['Key'], data.decode('utf-8'),
+                               PurePosixPath(document['File']).suffix)
+
+    missing = {operation.Args['document'] for operation in plan.Operations
+               if 'document' in operation.Args} - plan.Documents.keys()
+    if missing:
+        raise ValueError(f"Bundle {path} lacks {len(missing)} documents of its operations")
+    logger.info(f"Read bundle {path} from {manifest.get('Source') or 'unknown source'}, built {
+                manifest.get('Created')}: {len(plan.Operations)} operations, {len(plan.Documents)} documents")
+
+    return plan
+
+
+def relocate(plan: Plan, projects: Path | None = None, libraries: Path | None = None) -> Plan:
+    # Paths in a bundle are those of the build machine; projects are created
+    # in `projects` and libraries opened from `libraries` instead
+    for operation in plan.Operations:
+        if operation.Kind == 'create_project' and projects is not None:
+            operation.Args['directory'] = str(projects)
+        if operation.Kind == 'open_library' and libraries is not None:
+            operation.Args['path'] = (libraries / name(operation.Args['path'])).as_posix()
+
+    return plan
+
+
+def name(path: str) -> str:
+    # the last part of a Windows or POSIX path, on either
+    return PurePosixPath(PureWindowsPath(path).as_posix()).name
@@ -0,0 +1,114 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any
+import gc
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+from src.core import logs
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+CACHE_DIRECTORY: Path = Path(os.environ.get(
+    'LOCALAPPDATA', Path.home() / '.cache')) / 'tia-portal-automation-tool' / 'cache'
+MAX_SIZE: int = 256 * 2**20
+SUFFIX: str = '.pickle'
+
+
+def digest(*parts: bytes) -> str:
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(len(part).to_bytes(8, 'little'))
+        sha.update(part)
+
+    return sha.hexdigest()
+
+
+class DiskCache:
+    # Pickled values in one directory, one file per key. Keys start with a
+    # version so entries written by an older version are deleted instead of
+    # loaded; the least recently used entries go once `max_size` is exceeded.
+
+    def __init__(self, version: str, directory: Path = CACHE_DIRECTORY, max_size: int = MAX_SIZE):
+        self.version: str = version
+        self.directory: Path = directory
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for entry in self._entries():
+            if not entry.name.startswith(f"{self.version}-"):
+                entry.unlink(missing_ok=True)
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{self.version}-{key}{SUFFIX}"
+
+    def get(self, key: str) -> Any | None:
+        path = self.path(key)
+        # unpickling only allocates, so collection passes over the growing
+        # object graph are wasted work
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, 'rb') as file:
+                value = pickle.load(file)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # truncated or written by incompatible code: drop it
+            logger.warning(f"Discarding unreadable cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+        finally:
+            if enabled:
+                gc.enable()
+        os.utime(path)  # marks it as recently used
+        self.hits += 1
+
+        return value
+
+    def put(self, key: str, value: Any, evict: bool = True):
+        path = self.path(key)
+        # written next to the entry and renamed, so readers never see half of it
+        descriptor, temporary = tempfile.mkstemp(
+            dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                pickle.dump(value, file, pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path)
+        except BaseException:
+            Path(temporary).unlink(missing_ok=True)
+            raise
+        # callers writing many entries evict once when they are done
+        if evict:
+            self.evict()
+
+    def evict(self):
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= self.max_size:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            logger.debug(f"Evicted cache entry {entry.name}")
+
+    def clear(self):
+        for entry in self._entries():
+            entry.unlink(missing_ok=True)
+
+    def _entries(self) -> list[Path]:
+        return [entry for entry in self.directory.iterdir() if entry.suffix == SUFFIX]
@@ -0,0 +1,146 @@
+from __future__ import annotations
+from dataclasses import asdict, dataclass, field
+from functools import cached_property
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING
+import hashlib
+import json
+import logging
+import os
+
+from src.core import logs
+from src.core.cache import CACHE_DIRECTORY, digest
+
+if TYPE_CHECKING:
+    from src.core.planner import Plan
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION: int = 1
+CATALOG_DIRECTORY: Path = CACHE_DIRECTORY.parent / 'catalogs'
+# what TIA Portal keeps of a library next to its .al* file; Logs and TMP
+# change while it is only open
+PROJECT_FOLDERS: tuple[str, ...] = ('AdditionalFiles', 'IM', 'System', 'UserFiles', 'XRef')
+
+
+@dataclass
+class Catalog:
+    # The mastercopy folders and mastercopies of a global library, kept on
+    # disk so they are known without listing the library through Openness.
+    # Size and MTime are of the library's own files (see files); SHA256 is
+    # only compared when they changed.
+    Library: str
+    Path: str
+    Size: int
+    MTime: int
+    SHA256: str
+    Folders: list[str] = field(default_factory=list)
+    # [folder, name, type]
+    MasterCopies: list[list[str]] = field(default_factory=list)
+    Version: int = CATALOG_VERSION
+
+    @cached_property
+    def folders(self) -> frozenset[PurePosixPath]:
+        return frozenset(PurePosixPath(folder) for folder in self.Folders)
+
+    @cached_property
+    def mastercopies(self) -> dict[tuple[PurePosixPath, str], str]:
+        return {(PurePosixPath(folder), name): kind for folder, name, kind in self.MasterCopies}
+
+    def contains(self, folder: PurePosixPath | str, name: str) -> bool:
+        return (PurePosixPath('/') / folder, name) in self.mastercopies
+
+
+def files(path: Path) -> list[Path]:
+    # The files of the library whose file is `path`: it and its project
+    # folders, not whatever else shares its directory
+    found = [path] if path.is_file() else []
+    for folder in PROJECT_FOLDERS:
+        for root, directories, names in os.walk(path.parent / folder):
+            directories.sort()
+            found.extend(Path(root) / name for name in sorted(names))
+
+    return found
+
+
+def fingerprint(path: Path) -> tuple[int, int]:
+    stats = [file.stat() for file in files(path)]
+
+    return sum(stat.st_size for stat in stats), max((stat.st_mtime_ns for stat in stats), default=0)
+
+
+def checksum(path: Path) -> str:
+    sha = hashlib.sha256()
+    for file in files(path):
+        sha.update(file.relative_to(path.parent).as_posix().encode('utf-8'))
+        with open(file, 'rb') as stream:
+            while chunk := stream.read(2**20):
+                sha.update(chunk)
+
+    return sha.hexdigest()
+
+
+def location(path: Path, directory: Path | None = None) -> Path:
+    return (directory or CATALOG_DIRECTORY) / f"{digest(str(Path(path).absolute()).encode('utf-8'))[:16]}.json"
+
+
+def load(path: Path, directory: Path | None = None) -> Catalog | None:
+    # The catalog of the library at `path` if it still describes it. A
+    # library that was only touched is hashed once and its catalog kept.
+    try:
+        with open(location(path, directory)) as file:
+            catalog = Catalog(**json.load(file))
+        size, mtime = fingerprint(path)
+    except (OSError, TypeError, ValueError):
+        return None
+    if catalog.Version != CATALOG_VERSION or catalog.Path != str(Path(path).absolute()):
+        return None
+    if (catalog.Size, catalog.MTime) == (size, mtime):
+        return catalog
+    if catalog.Size != size or catalog.SHA256 != checksum(path):
+        logger.info(f"Library {path} changed since its catalog was written")
+        return None
+
+    catalog.MTime = mtime
+    save(catalog, directory)
+
+    return catalog
+
+
+def create(path: Path, library: str, folders: list[str], mastercopies: list[list[str]]) -> Catalog:
+    size, mtime = fingerprint(path)
+
+    return Catalog(library, str(Path(path).absolute()), size, mtime, checksum(path), folders, mastercopies)
+
+
+def save(catalog: Catalog, directory: Path | None = None):
+    target = location(Path(catalog.Path), directory)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_suffix('.partial')
+    with open(partial, 'w') as file:
+        json.dump(asdict(catalog), file)
+    os.replace(partial, target)
+    logger.info(f"Saved catalog of library {catalog.Library}: {len(catalog.Folders)} folders, "
+                f"{len(catalog.MasterCopies)} mastercopies")
+
+
+def check_plan(plan: Plan, directory: Path | None = None) -> list[str]:
+    # Mastercopies a plan copies that are not in the catalog of their
+    # library; libraries without a current catalog are not checked
+    catalogs: dict[str, Catalog] = {}
+    for operation in plan.Operations:
+        if operation.Kind == 'open_library':
+            catalog = load(Path(operation.Args['path']), directory)
+            if catalog is not None:
+                catalogs[catalog.Library] = catalog
+
+    missing = []
+    for operation in plan.Operations:
+        if operation.Kind != 'create_from_mastercopy' or operation.Args['library'] not in catalogs:
+            continue
+        if not catalogs[operation.Args['library']].contains(operation.Args['folder'], operation.Args['name']):
+            missing.append(f"{operation.Args['name']} in {operation.Args['folder']} of library "
+                           f"{operation.Args['library']} (device {operation.Args['device']})")
+
+    return missing
@@ -0,0 +1,50 @@
+from __future__ import annotations
+from typing import Any
+
+
+class FrozenAttributes(dict):
+    # Attribute maps are shared between every member that declares the same
+    # attributes, so they must never be changed in place.
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Shared attribute maps are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __hash__(self) -> int:
+        return hash(frozenset(self.items()))
+
+    def __reduce__(self):
+        return (FrozenAttributes, (dict(self),))
+
+
+class Interner:
+    # Per-config pool of repeated strings (datatypes, section names, ...) and
+    # attribute maps. Lives as long as the Resolver that owns it, unlike
+    # sys.intern, so several configs in one process do not leak into each other.
+
+    def __init__(self, enabled: bool = True):
+        self.enabled: bool = enabled
+        self.strings: dict[str, str] = {}
+        self.maps: dict[frozenset, FrozenAttributes] = {}
+
+    def string(self, value: Any) -> Any:
+        if not self.enabled or not isinstance(value, str):
+            return value
+        return self.strings.setdefault(value, value)
+
+    def attributes(self, value: dict | None) -> dict | None:
+        if not self.enabled or value is None:
+            return value
+        try:
+            key = frozenset(value.items())
+        except TypeError:  # unhashable attribute values are kept as given
+            return value
+        shared = self.maps.get(key)
+        if shared is None:
+            shared = FrozenAttributes(
+                {self.string(k): self.string(v) for k, v in value.items()})
+            self.maps[key] = shared
+        return shared
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator, TypeVar
 import base64
+import logging
 
+from src.core import bundle, catalog, logs, planner, stream, validation, variants
+from src.core.resolver import Resolver, group_by_device
+from src.core.workspace import DocumentStore
 from src.resources import dlls
+from src.schemas import configuration
 import src.modules.BlocksData as BlocksData
+import src.modules.BlocksDBArrays as BlocksDBArrays
 import src.modules.BlocksDBInstances as BlocksDBInstances
 import src.modules.BlocksFB as BlocksFB
 import src.modules.BlocksFC as BlocksFC
@@ -16,9 +23,11 @@ import src.modules.Libraries as Libraries
 import src.modules.Networks as Networks
 import src.modules.PlcDataTypes as PlcDataTypes
 import src.modules.PlcTags as PlcTags
-import src.modules.Portals as Portals
 import src.modules.ProgramBlocks as ProgramBlocks
-import src.modules.Projects as Projects
+from src.modules.XML import ArtifactCache, DocumentCache
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
 
 
 def generate_dlls(use_contract: bool = False) -> dict[str, Path]:
@@ -69,7 +78,34 @@ def generate_dlls(use_contract: bool = False) -> dict[str, Path]:
     return dll_paths
 
 
-def execute(imports: api.Imports, config: dict[str, Any], settings: dict[str, Any]) -> Siemens.Engineering.TiaPortal:
+T = TypeVar('T')
+
+
+@dataclass
+class Translation:
+    Devices: list[Devices.Device]
+    Libraries: list[Libraries.GlobalLibrary]
+    PlcDataTypes: list[PlcDataTypes.PlcDataType]
+    LocalModules: dict[int, list[DeviceItems.DeviceItem]]
+    PlcTags: dict[int, list[PlcTags.PlcTagTable]]
+    DataBlocks: dict[int, list[BlocksData.DataBlock]]
+    PlcBlocks: dict[int, list[ProgramBlocks.ProgramBlock]]
+    InstanceDBs: dict[int, list[BlocksDBInstances.InstanceDB]]
+
+
+def translate(config: dict[str, Any], settings: dict[str, Any],
+              shared: variants.Shared | None = None,
+              directory: Path | None = None) -> Translation:
+    # With `shared`, objects built from entries an earlier translation
+    # already saw are reused instead of built again. Files the config names
+    # are found relative to `directory`, the config file's.
+    resolver = Resolver(config, settings.get('compact_model', True), shared, directory)
+    if shared is not None:
+        shared.keep(config)
+
+    # callees first, so every nested block is built before its callers
+    for block_id in resolver.graph.order:
+        helper_clean_plcblock(resolver.block(block_id), resolver)
 
     devices_data = [Devices.Device(
         dev.get('p_typeIdentifier', 'PLC_1'),
@@ -106,7 +142,7 @@ def execute(imports: api.Imports, config: dict[str, Any], settings: dict[str, An
         Name=table.get("Name", "Default tag table"),
         Tags=[PlcTags.PlcTag(
             Name=tag.get('Name'),
-            DataTypeName=tag.get('DataTypeName'),
+            DataTypeName=resolver.interner.string(tag.get('DataTypeName')),
             LogicalAddress=tag.get('LogicalAddress')
         )
             for tag in table.get('Tags')
@@ -117,29 +153,36 @@ def execute(imports: api.Imports, config: dict[str, Any], settings: dict[str, An
     libraries_data = [Libraries.GlobalLibrary(
         FilePath=library.get('path'),
         ReadOnly=library.get('read_only'),
+        Copy=library.get('copy', 'all'),
+        Dependencies=library.get('dependencies', {}),
     )
         for library in config.get('libraries', [])
     ]
-    plc_data_types_data = [PlcDataTypes.PlcDataType(
-        Name=datatype.get("Name"),
-        Types=[PlcDataTypes.PlcStruct(
-            Name=struct.get('Name'),
-            Datatype=struct.get('Datatype'),
-            attributes=struct.get('attributes'),
-        )
-            for struct in datatype.get('types', [])
-        ],
-    )
+    plc_data_types_data = [helper_share(
+        ('PLC data type', id(datatype)),
+        lambda datatype=datatype: PlcDataTypes.PlcDataType(
+            Name=datatype.get("Name"),
+            Types=[PlcDataTypes.PlcStruct(
+                Name=resolver.interner.string(struct.get('Name')),
+                Datatype=resolver.interner.string(struct.get('Datatype')),
+                attributes=resolver.interner.attributes(
+                    struct.get('attributes')),
+            )
+                for struct in datatype.get('types', [])
+            ],
+        ), resolver)
         for datatype in config.get('PLC data types', [])
     ]
-    data_blocks = [BlocksData.DataBlock(
-        DeviceID=db.get('DeviceID'),
-        Name=db.get('name'),
-        Number=db.get('number'),
-        BlockGroupPath=db.get('blockgroup_folder', '/'),
-        VariableSections=helper_clean_variable_sections(
-            config.get('Variable sections'), db.get('id')),
-        Attributes=db.get('attributes', {}))
+    data_blocks = [helper_share(
+        ('Data block', id(db), tuple(map(id, resolver.variable_sections(db.get('id'))))),
+        lambda db=db: BlocksData.DataBlock(
+            DeviceID=db.get('DeviceID'),
+            Name=db.get('name'),
+            Number=db.get('number'),
+            BlockGroupPath=db.get('blockgroup_folder', '/'),
+            VariableSections=helper_clean_variable_sections(
+                config.get('Variable sections'), db.get('id'), resolver),
+            Attributes=db.get('attributes', {})), resolver)
         for db in config.get('Program blocks', [])
         if db.get('type') == ProgramBlocks.PlcEnum.GlobalDB
     ]
@@ -149,7 +192,8 @@ def execute(imports: api.Imports, config: dict[str, Any], settings: dict[str, An
         DeviceID=db.get('DeviceID'),
         InstanceOfName=helper_get_plcblock_name(
             db.get('plc_block_id'),
-            config.get('Program blocks')
+            config.get('Program blocks'),
+            resolver
         ),
         Name=db.get('name'),
         CallOption=db.get('call_option'),
@@ -158,224 +202,222 @@ def execute(imports: api.Imports, config: dict[str, Any], settings: dict[str, An
         for db in config.get('Instances', [])
     ]
 
-    data_plcblocks = [BlocksOB.OrganizationBlock(
-        DeviceID=plc.get('DeviceID'),
-        PlcType=plc.get('type'),
-        Name=plc.get('name'),
-        Number=plc.get('number'),
-        ProgrammingLanguage=plc.get('programming_language'),
-        BlockGroupPath=plc.get('blockgroup_folder'),
-        EventClass=BlocksOB.EventClassEnum.ProgramCycle,
-        Parameters=helper_clean_wires(
-            plc.get('name'),
-            plc.get('id'),
-            config.get('Wire parameters'),
-            config.get('Wire template')
-        ),
-        NetworkSources=helper_clean_network_sources(
-            config.get('Network sources'),
-            config.get('Program blocks'),
-            config.get('Variable sections'),
-            plc.get('id'),
-            config.get('Wire template'),
-            config.get('Wire parameters'),
-            config.get('Instances'),
-        ),
-        Variables=helper_clean_variable_sections(
-            config.get('Variable sections'), plc.get('id')),
-        IsInstance=plc.get('is_instance'),
-        LibraryData=ProgramBlocks.LibraryData(
-            Name=(plc.get('library_source') or {}).get('name'),
-            MasterCopyFolderPath=(plc.get('library_source') or {}
-                                  ).get('mastercopyfolder_path')
-        ),
+    data_plcblocks = [helper_clean_plcblock(plc, resolver)
+                      for plc in config.get('Program blocks', [])
+                      if plc.get('type') == ProgramBlocks.PlcEnum.OrganizationBlock
+                      ]
+
+    data_plcblocks += [helper_clean_plcblock(plc, resolver)
+                       for plc in config.get('Program blocks', [])
+                       if plc.get('type') == ProgramBlocks.PlcEnum.Function
+                       ]
+
+    data_plcblocks += [helper_clean_plcblock(plc, resolver)
+                       for plc in config.get('Program blocks', [])
+                       if plc.get('type') == ProgramBlocks.PlcEnum.FunctionBlock
+                       ]
+
+    return Translation(
+        Devices=devices_data,
+        Libraries=libraries_data,
+        PlcDataTypes=plc_data_types_data,
+        LocalModules=group_by_device(local_modules_data),
+        PlcTags=group_by_device(plc_tags_data),
+        DataBlocks=group_by_device(data_blocks),
+        PlcBlocks=group_by_device(data_plcblocks),
+        InstanceDBs=group_by_device(instance_dbs),
     )
-        for plc in config.get('Program blocks', [])
-        if plc.get('type') == ProgramBlocks.PlcEnum.OrganizationBlock
-    ]
 
-    data_plcblocks += [BlocksFC.Function(
-        DeviceID=plc.get('DeviceID'),
-        PlcType=plc.get('type'),
-        Name=plc.get('name'),
-        Number=plc.get('number'),
-        ProgrammingLanguage=plc.get('programming_language'),
-        Parameters=helper_clean_wires(
-            plc.get('name'),
-            plc.get('id'),
-            config.get('Wire parameters'),
-            config.get('Wire template')
-        ),
-        BlockGroupPath=plc.get('blockgroup_folder'),
-        Variables=helper_clean_variable_sections(
-            config.get('Variable sections'), plc.get('id')),
-        IsInstance=plc.get('is_instance'),
-        LibraryData=ProgramBlocks.LibraryData(
-            Name=(plc.get('library_source') or {}).get('name'),
-            MasterCopyFolderPath=(plc.get('library_source') or {}
-                                  ).get('mastercopyfolder_path')
-        ),
-    )
-        for plc in config.get('Program blocks', [])
-        if plc.get('type') == ProgramBlocks.PlcEnum.Function
-    ]
 
-    data_plcblocks += [BlocksFB.FunctionBlock(
-        DeviceID=plc.get('DeviceID'),
-        PlcType=plc.get('type'),
-        Name=plc.get('name'),
-        Number=plc.get('number'),
-        ProgrammingLanguage=plc.get('programming_language'),
-        BlockGroupPath=plc.get('blockgroup_folder'),
-        Parameters=helper_clean_wires(
-            plc.get('name'),
-            plc.get('id'),
-            config.get('Wire parameters'),
-            config.get('Wire template')
-        ),
-        NetworkSources=helper_clean_network_sources(
-            config.get('Network sources'),
-            config.get('Program blocks'),
-            config.get('Variable sections'),
-            plc.get('id'),
-            config.get('Wire template'),
-            config.get('Wire parameters'),
-            config.get('Instances'),
-        ),
-        Variables=helper_clean_variable_sections(
-            config.get('Variable sections'), plc.get('id')),
-        Database=helper_clean_database_instance(
-            plc.get('id'), config.get(
-                'Instances'), config.get('Program blocks')),
-        IsInstance=plc.get('is_instance'),
-        LibraryData=ProgramBlocks.LibraryData(
-            Name=(plc.get('library_source') or {}).get('name'),
-            MasterCopyFolderPath=(plc.get('library_source') or {}
-                                  ).get('mastercopyfolder_path')
-        ),
-    )
-        for plc in config.get('Program blocks', [])
-        if plc.get('type') == ProgramBlocks.PlcEnum.FunctionBlock
-    ]
+def plan(config: dict[str, Any],
+         settings: dict[str, Any],
+         directory: Path | None = None) -> planner.Plan:
+    # Everything execute will do, worked out before TIA Portal is started.
+    artifacts = ArtifactCache() if settings.get('xml_cache', False) else None
+    # documents are kept in files in the scratch directory of the run
+    operations = planner.Plan(Documents=DocumentStore.from_settings(settings))
+    if not config.get(variants.VARIANTS):
+        planner.build(translate(config, settings, directory=directory), config, operations,
+                      workers=settings.get('xml_workers', 1), artifacts=artifacts,
+                      sources=settings.get('scl_sources'))
+        if artifacts:
+            artifacts.finish()
+        return planner.optimize(operations)
+
+    # One project per variant. The variants share the base's entries, so
+    # the blocks and documents made from them are translated and generated
+    # once; only what an overlay touches is built again for its project.
+    configs = variants.configs(config, directory)
+    shared = variants.Shared()
+    documents = DocumentCache()
+    for name, variant in configs.items():
+        logger.info(f"Building variant {name}")
+        planner.build(translate(variant, settings, shared, directory), {
+            'name': f"{config['name']}_{name}",
+            'directory': config['directory'],
+            'overwrite': config['overwrite'],
+        }, operations, documents, settings.get('xml_workers', 1), artifacts,
+            settings.get('scl_sources'))
+
+    logger.info(f"Built {len(configs)} variants: {shared.hits} objects reused, {
+                shared.misses} built, {documents.hits} documents reused")
+    if artifacts:
+        artifacts.finish()
+
+    return planner.optimize(operations)
+
+
+def execute(imports: api.Imports,
+            config: dict[str, Any],
+            settings: dict[str, Any],
+            directory: Path | None = None) -> Siemens.Engineering.TiaPortal:
+    return execute_plan(imports, plan(config, settings, directory), settings)
+
+
+def execute_plan(imports: api.Imports,
+                 operations: planner.Plan,
+                 settings: dict[str, Any]) -> Siemens.Engineering.TiaPortal:
+    prepare_plan(operations, settings)
+    TIA, measured = planner.run(imports, operations, settings)
+    planner.save_costs(measured)
 
-    SE: Siemens.Engineering = imports.DLL
-    TIA: Siemens.Engineering.TiaPortal = Portals.connect(
-        imports, config, settings)
-
-    project_data = Projects.Project(
-        config['name'], config['directory'], config['overwrite'])
-    se_project: Siemens.Engineering.Project = Projects.create(
-        imports, project_data, TIA)
-
-    for library in libraries_data:
-        Libraries.import_library(imports, library, TIA)
-    se_devices: list[Siemens.Engineering.HW.Device] = Devices.create(
-        devices_data, se_project)
-    se_interfaces: list[Siemens.Engineering.HW.Features.NetworkInterface] = []
-    for i in range(len(devices_data)):
-        se_device: Siemens.Engineering.HW.Device = se_devices[i]
-        device_data: Devices.Device = devices_data[i]
-
-        # Devices:
-        se_plc_software: Siemens.Engineering.HW.Software = Devices.get_plc_software(
-            imports, se_device)
-
-        # Add Mastercopies from Libraries
-        for library in libraries_data:
-            name = library.FilePath.stem
-            Libraries.generate_mastercopies(name, se_plc_software, TIA)
-
-        # Networks:
-        se_net_itfs: list[Siemens.Engineering.HW.Features.NetworkInterface] = Networks.create_network_service(
-            imports, device_data, se_device)
-        network: Networks.NetworkInterface = device_data.NetworkInterface
-        for index, se_net_itf in enumerate(se_net_itfs):
-            # WARNING:
-            # Subnet Name must be UNIQUE!
-            # Otherwise, Siemens Engineering will cause an error.
-            if index == 0:
-                subnet: Siemens.Engineering.HW.Subnet = se_net_itf.Nodes[0].CreateAndConnectToSubnet(
-                    network.subnet_name)
-                io_system: Siemens.Engineering.HW.IoSystem = se_net_itf.IoControllers[0].CreateIoSystem(
-                    network.io_controller)
-            else:
-                se_net_itf.Nodes[0].ConnectToSubnet(subnet)
-                if se_net_itf.IoConnectors.Count > 0:
-                    se_net_itf.IoConnectors[0].ConnectToIoSystem(io_system)
-
-        # DeviceItems:
-        for local_module in local_modules_data:
-            if local_module.DeviceID != device_data.ID:
-                continue
-            DeviceItems.plug_new(local_module, se_device,
-                                 device_data.SlotsRequired)
+    return TIA
 
-        # PLC Tags:
-        for plc_tag_table in plc_tags_data:
-            if plc_tag_table.DeviceID != device_data.ID:
-                continue
-            PlcTags.new(imports, se_plc_software, plc_tag_table)
 
-        # PLC Data Types:
-        for plc_data_type in plc_data_types_data:
-            PlcDataTypes.create(imports, se_plc_software, plc_data_type)
+def prepare_plan(operations: planner.Plan,
+                 settings: dict[str, Any],
+                 libraries: list[planner.Operation] = []):
+    # What is done with a plan before it runs. `libraries` are the
+    # open_library operations of earlier plans of the same run.
+    costs = planner.load_costs()
+    seconds = sum(seconds for _, seconds in planner.estimate(
+        operations, costs).values())
+    logger.info(f"Running {len(operations.Operations)} operations, estimated {
+                seconds:.0f} s")
+    if settings.get('plan_path'):
+        operations.save(Path(settings['plan_path']))
+    # a bad document fails the run here instead of at its import
+    if settings.get('validate_xml', True):
+        validation.validate_plan(operations, settings)
+    # known from the catalogs of earlier runs, without opening the libraries
+    known = planner.Plan(libraries + operations.Operations) if libraries else operations
+    for missing in catalog.check_plan(known):
+        logger.warning(f"Mastercopy not found: {missing}")
+
+
+def build_bundle(config: dict[str, Any],
+                 settings: dict[str, Any],
+                 path: Path,
+                 directory: Path | None = None) -> planner.Plan:
+    # The part of execute that needs no TIA Portal, kept in a bundle for
+    # replay on the engineering host
+    operations = plan(config, settings, directory)
+    if settings.get('validate_xml', True):
+        validation.validate_plan(operations, settings)
+    bundle.write(operations, path, config.get('name', ''))
+
+    return operations
+
+
+def replay(imports: api.Imports,
+           path: Path,
+           settings: dict[str, Any]) -> Siemens.Engineering.TiaPortal:
+    # Only the imports of a bundle; its documents were validated when it
+    # was built and are checked against their hashes
+    projects = settings.get('project_directory')
+    libraries = settings.get('library_directory')
+    operations = bundle.relocate(bundle.read(path, DocumentStore.from_settings(settings)),
+                                 Path(projects) if projects else None,
+                                 Path(libraries) if libraries else None)
+
+    return execute_plan(imports, operations, settings | {'validate_xml': False})
+
+
+def execute_streaming(imports: api.Imports,
+                      config_path: Path,
+                      project: dict[str, Any],
+                      settings: dict[str, Any]) -> Siemens.Engineering.TiaPortal:
+    # Bounded-memory variant of execute: the plan of each device is built,
+    # checked and run before the next one is built. There is no single
+    # plan to keep at plan_path.
+    settings = settings | {'plan_path': None}
+    libraries: list[planner.Operation] = []
+
+    def prepared() -> Iterator[planner.Plan]:
+        for operations in stream_plans(config_path, project, settings):
+            prepare_plan(operations, settings, libraries)
+            libraries.extend(operation for operation in operations.Operations
+                             if operation.Kind == 'open_library')
+            yield operations
+
+    TIA, measured = planner.run_plans(imports, prepared(), settings)
+    planner.save_costs(measured)
 
-        # Data Blocks
-        for data_block in data_blocks:
-            if data_block.DeviceID != device_data.ID:
-                continue
-            BlocksData.create(TIA, imports, se_plc_software, data_block)
+    return TIA
 
-        # ProgramBlocks
-        for plc in data_plcblocks:
-            if plc.DeviceID != device_data.ID:
-                continue
-            match plc.PlcType:
-                case ProgramBlocks.PlcEnum.OrganizationBlock:
-                    BlocksOB.create(
-                        imports=imports,
-                        TIA=TIA,
-                        plc_software=se_plc_software,
-                        data=plc)
-                case ProgramBlocks.PlcEnum.FunctionBlock:
-                    BlocksFB.create(
-                        imports=imports,
-                        TIA=TIA,
-                        plc_software=se_plc_software,
-                        data=plc)
-                case ProgramBlocks.PlcEnum.Function:
-                    BlocksFC.create(
-                        imports=imports,
-                        TIA=TIA,
-                        plc_software=se_plc_software,
-                        data=plc)
-
-        # DB Instances
-        for instancedb in instance_dbs:
-            if instancedb.DeviceID != device_data.ID:
-                continue
-            BlocksDBInstances.create(plc_software=se_plc_software,
-                                     data=instancedb)
 
-    return TIA
+def stream_plans(config_path: Path,
+                 project: dict[str, Any],
+                 settings: dict[str, Any]) -> Iterator[planner.Plan]:
+    # The plans of execute_streaming: the project with its libraries and
+    # devices, then one per device. The config is indexed in one pass and
+    # only the entries of the device being planned are decoded, validated
+    # and translated.
+    index = stream.ConfigIndex(config_path)
+    config = configuration.validate(dict(index.common)) | project
+    if config.get(variants.VARIANTS):
+        raise ValueError(f"{config_path} has variants, which are only built by execute")
+    directory = Path(config_path).absolute().parent
+    common = translate(config, settings, directory=directory)
+    # devices, libraries, data types, ... validated once for all devices
+    shared = {key: value for key, value in config.items() if key not in stream.INDEXED_KEYS}
+
+    operations = planner.Plan(Documents=DocumentStore.from_settings(settings))
+    planner.build_project(operations, common, config)
+    yield planner.optimize(operations)
+
+    artifacts = ArtifactCache() if settings.get('xml_cache', False) else None
+    for device in common.Devices:
+        translation = translate(configuration.validate(
+            index.device(device.ID)) | shared, settings, directory=directory)
+        operations = planner.Plan(Documents=DocumentStore.from_settings(settings))
+        planner.build_device(operations, translation, device, settings.get('scl_sources'))
+        planner.generate(operations, None, settings.get('xml_workers', 1), artifacts)
+        del translation
+        yield planner.optimize(operations)
+    if artifacts:
+        artifacts.finish()
+
+
+def helper_share(key: tuple, build: Callable[[], T], resolver: Resolver) -> T:
+    if resolver.shared is None:
+        return build()
+    return resolver.shared.get(key, build)
 
 
 def helper_clean_variable_sections(variable_sections: list[dict],
-                                   plc_block_id: int) -> list[ProgramBlocks.VariableSection]:
+                                   plc_block_id: int,
+                                   resolver: Resolver | None = None
+                                   ) -> list[ProgramBlocks.VariableSection]:
+    if resolver is None:
+        resolver = Resolver({'Variable sections': variable_sections})
+
+    intern = resolver.interner
     sections: list[ProgramBlocks.VariableSection] = []
 
-    for section in variable_sections:
-        if section.get('plc_block_id') != plc_block_id:
-            continue
-        name = section.get('name')
-        structs: list[ProgramBlocks.VariableStruct] = []
+    for section in resolver.variable_sections(plc_block_id):
+        name = intern.string(section.get('name'))
+        structs: list[ProgramBlocks.VariableStruct | ProgramBlocks.VariableArray] = []
         for struct in section.get('data'):
+            if 'start_values' in struct:
+                structs.append(BlocksDBArrays.variable_array(struct, resolver.directory))
+                continue
             structs.append(ProgramBlocks.VariableStruct(
-                Name=struct.get('name'),
-                Datatype=struct.get('datatype'),
+                Name=intern.string(struct.get('name')),
+                Datatype=intern.string(struct.get('datatype')),
                 Retain=struct.get('retain'),
-                StartValue=struct.get('start_value'),
-                Attributes=struct.get('attributes'),
+                StartValue=intern.string(struct.get('start_value')),
+                Attributes=intern.attributes(struct.get('attributes')),
             ))
         sections.append(ProgramBlocks.VariableSection(
             Name=name, Structs=structs))
@@ -383,165 +425,171 @@ def helper_clean_variable_sections(variable_sections: list[dict],
     return sections
 
 
+def helper_clean_plcblock(block: dict,
+                          resolver: Resolver) -> ProgramBlocks.ProgramBlock | None:
+    # Blocks are built once per config and shared between the top level and
+    # every network that calls them.
+    memo = resolver.graph.blocks
+    if id(block) in memo:
+        return memo[id(block)]
+
+    key = resolver.block_key(block) if resolver.shared is not None else ()
+    plcblock = helper_share(
+        key, lambda: helper_build_plcblock(block, resolver), resolver)
+    memo[id(block)] = plcblock
+
+    return plcblock
+
+
+def helper_build_plcblock(block: dict,
+                          resolver: Resolver) -> ProgramBlocks.ProgramBlock | None:
+    library_data = ProgramBlocks.LibraryData(
+        Name=(block.get('library_source') or {}).get('name'),
+        MasterCopyFolderPath=(block.get('library_source') or {}
+                              ).get('mastercopyfolder_path'))
+
+    plcblock: ProgramBlocks.ProgramBlock | None = None
+    match block.get('type'):
+        case ProgramBlocks.PlcEnum.OrganizationBlock:
+            plcblock = BlocksOB.OrganizationBlock(
+                DeviceID=block.get('DeviceID'),
+                PlcType=block.get('type'),
+                Name=block.get('name'),
+                Number=block.get('number'),
+                ProgrammingLanguage=block.get('programming_language'),
+                BlockGroupPath=block.get('blockgroup_folder'),
+                EventClass=BlocksOB.EventClassEnum.ProgramCycle,
+                Parameters=helper_clean_wires(
+                    block.get('name'), block.get('id'),
+                    None, None, resolver),
+                NetworkSources=helper_clean_network_sources(
+                    None, None, None, block.get('id'), resolver=resolver),
+                Variables=helper_clean_variable_sections(
+                    None, block.get('id'), resolver),
+                IsInstance=block.get('is_instance'),
+                LibraryData=library_data,
+            )
+
+        case ProgramBlocks.PlcEnum.FunctionBlock:
+            plcblock = BlocksFB.FunctionBlock(
+                DeviceID=block.get('DeviceID'),
+                PlcType=block.get('type'),
+                Name=block.get('name'),
+                Number=block.get('number'),
+                ProgrammingLanguage=block.get('programming_language'),
+                BlockGroupPath=block.get('blockgroup_folder'),
+                Parameters=helper_clean_wires(
+                    block.get('name'), block.get('id'),
+                    None, None, resolver),
+                NetworkSources=helper_clean_network_sources(
+                    None, None, None, block.get('id'), resolver=resolver),
+                Variables=helper_clean_variable_sections(
+                    None, block.get('id'), resolver),
+                Database=helper_clean_database_instance(
+                    block.get('id'), None, None, resolver),
+                IsInstance=block.get('is_instance'),
+                LibraryData=library_data,
+            )
+
+        case ProgramBlocks.PlcEnum.Function:
+            plcblock = BlocksFC.Function(
+                DeviceID=block.get('DeviceID'),
+                PlcType=block.get('type'),
+                Name=block.get('name'),
+                Number=block.get('number'),
+                ProgrammingLanguage=block.get('programming_language'),
+                BlockGroupPath=block.get('blockgroup_folder'),
+                Parameters=helper_clean_wires(
+                    block.get('name'), block.get('id'),
+                    None, None, resolver),
+                Variables=helper_clean_variable_sections(
+                    None, block.get('id'), resolver),
+                IsInstance=block.get('is_instance'),
+                LibraryData=library_data,
+            )
+
+    return plcblock
+
+
 def helper_clean_network_sources(network_sources: list[dict],
                                  plcblocks: list[dict],
                                  variable_sections: list[dict],
                                  plc_block_id: int,
-                                 wire_template: list[dict],
-                                 wire_parameters: list[dict],
-                                 instances: list[dict]) -> list[ProgramBlocks.NetworkSource]:
+                                 wire_template: list[dict] | None = None,
+                                 wire_parameters: list[dict] | None = None,
+                                 instances: list[dict] | None = None,
+                                 resolver: Resolver | None = None
+                                 ) -> list[ProgramBlocks.NetworkSource]:
+    if resolver is None:
+        resolver = Resolver({
+            'Network sources': network_sources,
+            'Program blocks': plcblocks,
+            'Variable sections': variable_sections,
+            'Wire template': wire_template,
+            'Wire parameters': wire_parameters,
+            'Instances': instances,
+        })
+
+    graph = resolver.graph
+    if plc_block_id in graph.networks:
+        return graph.networks[plc_block_id]
+
     networks: list[ProgramBlocks.NetworkSource] = []
 
-    for network in network_sources:
-        if network.get('plc_block_id') != plc_block_id:
-            continue
-        title = network.get('title')
-        comment = network.get('comment')
+    for network in resolver.network_sources(plc_block_id):
         c_plcblocks: list[ProgramBlocks.ProgramBlock] = []
 
-        for block in plcblocks:
-            if block.get('network_source_id') != network.get('id'):
-                continue
+        for block in resolver.blocks_of_network(network.get('id')):
+            plcblock = helper_clean_plcblock(block, resolver)
+            if plcblock is not None:
+                c_plcblocks.append(plcblock)
 
-            # Organization Block
-            if block.get('type') == ProgramBlocks.PlcEnum.OrganizationBlock:
-                c_plcblocks.append(
-                    BlocksOB.OrganizationBlock(
-                        DeviceID=block.get('DeviceID'),
-                        PlcType=block.get('type'),
-                        Name=block.get('name'),
-                        Number=block.get('number'),
-                        ProgrammingLanguage=block.get(
-                            'programming_language'),
-                        BlockGroupPath=block.get('blockgroup_folder'),
-                        Variables=helper_clean_variable_sections(
-                            variable_sections, block.get('id')),
-                        NetworkSources=helper_clean_network_sources(
-                            network_sources,
-                            plcblocks,
-                            variable_sections,
-                            block.get('id')),
-                        EventClass=BlocksOB.EventClassEnum.ProgramCycle,
-                        IsInstance=block.get('is_instance'),
-                        LibraryData=ProgramBlocks.LibraryData(
-                            Name=(block.get('library_source')
-                                  or {}).get('name'),
-                            MasterCopyFolderPath=(block.get('library_source') or {}
-                                                  ).get('mastercopyfolder_path'))
-                    )
-                )
-
-            # Function Block
-            if block.get('type') == ProgramBlocks.PlcEnum.FunctionBlock:
-                c_plcblocks.append(
-                    BlocksFB.FunctionBlock(
-                        DeviceID=block.get('DeviceID'),
-                        PlcType=block.get('type'),
-                        Name=block.get('name'),
-                        Number=block.get('number'),
-                        ProgrammingLanguage=block.get(
-                            'programming_language'),
-                        BlockGroupPath=block.get('blockgroup_folder'),
-                        Variables=helper_clean_variable_sections(
-                            variable_sections, block.get('id')),
-                        NetworkSources=helper_clean_network_sources(
-                            network_sources,
-                            plcblocks,
-                            variable_sections,
-                            block.get('id'),
-                            wire_template,
-                            wire_parameters,
-                            instances),
-                        Parameters=helper_clean_wires(
-                            block.get('name'),
-                            block.get('id'),
-                            wire_parameters,
-                            wire_template,
-                        ),
-                        Database=helper_clean_database_instance(
-                            block.get('id'), instances, plcblocks),
-                        IsInstance=block.get('is_instance'),
-                        LibraryData=ProgramBlocks.LibraryData(
-                            Name=(block.get('library_source')
-                                  or {}).get('name'),
-                            MasterCopyFolderPath=(block.get('library_source')
-                                                  or {}).get(
-                                'mastercopyfolder_path'))
-                    )
-
-                )
-
-            # Functions
-            if block.get('type') == ProgramBlocks.PlcEnum.Function:
-                c_plcblocks.append(
-                    BlocksFC.Function(
-                        PlcType=block.get('type'),
-                        Name=block.get('name'),
-                        Number=block.get('number'),
-                        ProgrammingLanguage=block.get(
-                            'programming_language'),
-                        Variables=helper_clean_variable_sections(
-                            variable_sections, block.get('id')),
-                        DeviceID=block.get('DeviceID'),
-                        BlockGroupPath=block.get('blockgroup_folder'),
-                        Parameters=helper_clean_wires(
-                            block.get('name'),
-                            block.get('id'),
-                            wire_parameters,
-                            wire_template
-                        ),
-                        IsInstance=block.get('is_instance'),
-                        LibraryData=ProgramBlocks.LibraryData(
-                            Name=(block.get('library_source')
-                                  or {}).get('name'),
-                            MasterCopyFolderPath=(block.get('library_source')
-                                                  or {}).get(
-                                'mastercopyfolder_path'))
-                    )
-                )
-
-        networks.append(ProgramBlocks.NetworkSource(Title=title,
-                                                    Comment=comment,
+        networks.append(ProgramBlocks.NetworkSource(Title=network.get('title'),
+                                                    Comment=network.get(
+                                                        'comment'),
                                                     PlcBlocks=c_plcblocks,
                                                     )
                         )
 
+    graph.networks[plc_block_id] = networks
+
     return networks
 
 
 def helper_clean_wires(block_name: str,
                        plc_block_id: int,
                        wire_parameters: list[dict],
-                       template: list[dict]
+                       template: list[dict],
+                       resolver: Resolver | None = None
                        ) -> list[ProgramBlocks.WireParameter]:
-    wires: list[ProgramBlocks.WireParameter] = []
+    if resolver is None:
+        resolver = Resolver({
+            'Wire parameters': wire_parameters,
+            'Wire template': template,
+        })
 
-    wire_parameters_template: list[dict[str, str]] = []
-    parameters: dict[str, str] = {}
-    for wire_block in template:
-        if wire_block.get('block_name') == block_name:
-            wire_parameters_template = wire_block.get('parameters')
-            break
+    wires: list[ProgramBlocks.WireParameter] = []
 
-    for wire in wire_parameters:
-        if wire.get('plc_block_id') == plc_block_id:
-            parameters = wire.get('parameters')
+    wire_parameters_template: list[dict[str, str]] = resolver.wire_template(
+        block_name)
+    parameters: dict[str, str] = resolver.wire_parameters(plc_block_id)
 
     en = ProgramBlocks.WireParameter(
         Name="en",
         Section="",
         Datatype="Bool",
-        Value=ProgramBlocks.AccessValue(parameters.get('en', '')),
+        Value=ProgramBlocks.parse_access(parameters.get('en', '')),
         Negated=False
     )
     wires.append(en)
 
+    intern = resolver.interner
     for param in wire_parameters_template:
         wire = ProgramBlocks.WireParameter(
-            Name=param.get('name'),
-            Section=param.get('section'),
-            Datatype=param.get('datatype'),
-            Value=ProgramBlocks.AccessValue(parameters.get(param.get('name'))),
+            Name=intern.string(param.get('name')),
+            Section=intern.string(param.get('section')),
+            Datatype=intern.string(param.get('datatype')),
+            Value=ProgramBlocks.parse_access(parameters.get(param.get('name'))),
             Negated=param.get('negated')
         )
         wires.append(wire)
@@ -551,27 +599,38 @@ def helper_clean_wires(block_name: str,
 
 def helper_clean_database_instance(plc_block_id: int,
                                    instances: list[dict],
-                                   plcblocks: list[dict]
+                                   plcblocks: list[dict],
+                                   resolver: Resolver | None = None
                                    ) -> list[BlocksDBInstances.Instance]:
+    if resolver is None:
+        resolver = Resolver({
+            'Instances': instances,
+            'Program blocks': plcblocks,
+        })
+
+    instancedb = resolver.instance(plc_block_id)
+    if instancedb is None:
+        return
+
+    return BlocksDBInstances.InstanceDB(
+        Id=instancedb.get('id'),
+        DeviceID=instancedb.get('DeviceID'),
+        InstanceOfName=helper_get_plcblock_name(
+            instancedb.get('plc_block_id'),
+            plcblocks,
+            resolver
+        ),
+        CallOption=instancedb.get('call_option'),
+        Name=instancedb.get('name'),
+        Number=instancedb.get('number'),
+        BlockGroupPath=instancedb.get('blockgroup_folder')
+    )
 
-    for instancedb in instances:
-        if instancedb.get('plc_block_id') == plc_block_id:
-            return BlocksDBInstances.InstanceDB(
-                Id=instancedb.get('id'),
-                DeviceID=instancedb.get('DeviceID'),
-                InstanceOfName=helper_get_plcblock_name(
-                    instancedb.get('plc_block_id'),
-                    plcblocks
-                ),
-                CallOption=instancedb.get('call_option'),
-                Name=instancedb.get('name'),
-                Number=instancedb.get('number'),
-                BlockGroupPath=instancedb.get('blockgroup_folder')
-            )
 
+def helper_get_plcblock_name(plc_block_id: int,
+                             program_blocks: list[dict],
+                             resolver: Resolver | None = None) -> str:
+    if resolver is None:
+        resolver = Resolver({'Program blocks': program_blocks})
 
-def helper_get_plcblock_name(plc_block_id: int, program_blocks: list[dict]) -> str:
-    for block in program_blocks:
-        if block.get('id') == plc_block_id:
-            return block.get('name')
-    return ""
+    return resolver.block_name(plc_block_id)
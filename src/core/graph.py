@@ -0,0 +1,96 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+import logging
+
+from src.core import logs
+
+if TYPE_CHECKING:
+    from src.core.resolver import Resolver
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+VISITING = 1
+DONE = 2
+
+
+class NetworkCycleError(ValueError):
+    def __init__(self, path: list[str]):
+        self.path: list[str] = path
+        super().__init__(
+            f"Program blocks call each other in a cycle: {' -> '.join(path)}")
+
+
+@dataclass
+class GraphStats:
+    Blocks: int
+    Calls: int
+    Depth: int
+    FanOut: int
+
+
+class NetworkGraph:
+    # Call graph of the config: a block calls every block whose
+    # network_source_id points at one of its network sources.
+    # It is checked for cycles once, and keeps the NetworkSource lists and
+    # nested block objects built from it so every caller shares them.
+
+    def __init__(self, resolver: Resolver):
+        # the resolver is not kept, so the two do not form a reference cycle
+        # that would keep a whole config alive until the next gc pass
+        self.calls: dict[int, list[int]] = {}
+        self.networks: dict[int, list] = {}
+        self.blocks: dict[int, object] = {}
+
+        for block_id in resolver.blocks_by_id:
+            self.calls[block_id] = [
+                callee.get('id')
+                for network in resolver.network_sources(block_id)
+                for callee in resolver.blocks_of_network(network.get('id'))
+            ]
+
+        self.order: list[int] = []
+        self.depth: dict[int, int] = {}
+        self._walk(resolver)
+
+        self.stats = GraphStats(
+            Blocks=len(self.calls),
+            Calls=sum(len(callees) for callees in self.calls.values()),
+            Depth=max(self.depth.values(), default=0),
+            FanOut=max((len(callees)
+                       for callees in self.calls.values()), default=0),
+        )
+        logger.info(f"Network graph: {self.stats.Blocks} blocks, {
+                    self.stats.Calls} calls, depth {self.stats.Depth}, fan-out {self.stats.FanOut}")
+
+    def _walk(self, resolver: Resolver):
+        # iterative DFS, so deep call trees do not hit the recursion limit
+        state: dict[int, int] = {}
+        for root in self.calls:
+            if state.get(root):
+                continue
+            path: list[int] = [root]
+            pending = [iter(self.calls[root])]
+            state[root] = VISITING
+            while pending:
+                callee = next(pending[-1], None)
+                if callee is None:
+                    block_id = path.pop()
+                    pending.pop()
+                    state[block_id] = DONE
+                    self.depth[block_id] = max(
+                        (self.depth[c] + 1 for c in self.calls.get(block_id, [])
+                         if c in self.depth), default=0)
+                    self.order.append(block_id)
+                    continue
+                if state.get(callee) == VISITING:
+                    cycle = path[path.index(callee):] + [callee]
+                    raise NetworkCycleError(
+                        [resolver.block_name(block_id) or str(block_id)
+                         for block_id in cycle])
+                if state.get(callee) == DONE or callee not in self.calls:
+                    continue
+                state[callee] = VISITING
+                path.append(callee)
+                pending.append(iter(self.calls[callee]))
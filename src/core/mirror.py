@@ -0,0 +1,116 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+from src.core import catalog, logs
+from src.core.cache import CACHE_DIRECTORY, digest
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+MIRROR_DIRECTORY: Path = CACHE_DIRECTORY.parent / 'libraries'
+
+
+class Mirror:
+    # Local copies of the files of libraries (see catalog.files), e.g. from
+    # a network share, one directory per content hash. A marker per library path keeps the size,
+    # mtime and hash of the files last copied, so an unchanged library is
+    # neither hashed nor copied again. Copies are written next to their
+    # final directory and renamed, so a library is never opened half copied.
+
+    def __init__(self, directory: Path = MIRROR_DIRECTORY):
+        self.directory: Path = directory
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls, settings: dict[str, Any]) -> Mirror | None:
+        # `library_mirror` is true for the default directory or a directory
+        mirror = settings.get('library_mirror')
+        if not mirror:
+            return None
+
+        return cls(MIRROR_DIRECTORY if mirror is True else Path(mirror))
+
+    def marker(self, path: Path) -> Path:
+        return self.directory / f"{digest(str(Path(path).absolute()).encode('utf-8'))[:16]}.json"
+
+    def local(self, path: Path) -> Path:
+        # The file of the library at `path` in its local copy
+        marker = self.marker(path)
+        size, mtime = catalog.fingerprint(path)
+        try:
+            with open(marker) as file:
+                known = json.load(file)
+        except (OSError, ValueError):
+            known = {}
+
+        if known.get('Size') == size and known.get('MTime') == mtime:
+            sha = known['SHA256']
+        else:
+            sha = catalog.checksum(path)
+        copy = self.directory / sha[:16]
+        if (copy / path.parent.name / path.name).exists():
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.copy(path, copy)
+
+        if known != {'Size': size, 'MTime': mtime, 'SHA256': sha}:
+            partial = marker.with_suffix('.partial')
+            with open(partial, 'w') as file:
+                json.dump({'Size': size, 'MTime': mtime, 'SHA256': sha}, file)
+            os.replace(partial, marker)
+        if known.get('SHA256', sha) != sha and known['SHA256'] not in self.referenced():
+            self.remove(self.directory / known['SHA256'][:16])
+
+        return copy / path.parent.name / path.name
+
+    def referenced(self) -> set[str]:
+        hashes = set()
+        for marker in self.directory.glob('*.json'):
+            try:
+                with open(marker) as file:
+                    hashes.add(json.load(file)['SHA256'])
+            except (OSError, ValueError, KeyError):
+                continue
+
+        return hashes
+
+    def copy(self, path: Path, copy: Path):
+        # A copy is only ever renamed into place whole, so one that exists
+        # is complete: when another run put the same content there first,
+        # its copy is used, as it may already be open.
+        logger.info(f"Mirroring library {path.parent} to {copy}")
+        temporary = Path(tempfile.mkdtemp(dir=self.directory, suffix='.tmp'))
+        try:
+            for file in catalog.files(path):
+                target = temporary / path.parent.name / file.relative_to(path.parent)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(file, target)
+            os.replace(temporary, copy)
+        except OSError:
+            shutil.rmtree(temporary, ignore_errors=True)
+            if not (copy / path.parent.name / path.name).exists():
+                raise
+            logger.info(f"Library {path.parent} was mirrored to {copy} by another run")
+        except BaseException:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+
+    def remove(self, copy: Path):
+        # Moved aside first: a copy open in TIA Portal can not be moved, and
+        # stays whole until the next change
+        trash = Path(tempfile.mkdtemp(dir=self.directory, suffix='.tmp')) / copy.name
+        try:
+            os.replace(copy, trash)
+        except OSError:
+            pass
+        shutil.rmtree(trash.parent, ignore_errors=True)
@@ -0,0 +1,661 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
+import json
+import logging
+import shutil
+import time
+
+from src.core import logs
+from src.core.cache import CACHE_DIRECTORY, digest
+from src.core.mirror import Mirror
+from src.core.workspace import DocumentStore
+from src.modules.XML import ArtifactCache, DocumentCache, Streamed
+import src.modules.BlocksData as BlocksData
+import src.modules.BlocksDBInstances as BlocksDBInstances
+import src.modules.BlocksFB as BlocksFB
+import src.modules.BlocksFC as BlocksFC
+import src.modules.BlocksOB as BlocksOB
+import src.modules.DeviceItems as DeviceItems
+import src.modules.Devices as Devices
+import src.modules.ExternalSources as ExternalSources
+import src.modules.Identities as Identities
+import src.modules.Libraries as Libraries
+import src.modules.Networks as Networks
+import src.modules.PlcDataTypes as PlcDataTypes
+import src.modules.PlcTags as PlcTags
+import src.modules.Portals as Portals
+import src.modules.ProgramBlocks as ProgramBlocks
+import src.modules.Projects as Projects
+
+if TYPE_CHECKING:
+    from src.core.core import Translation
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+PLAN_VERSION: int = 3
+COSTS_FILE: Path = CACHE_DIRECTORY.parent / 'costs.json'
+
+# Seconds per operation (per tag for create_tags) until timings of real
+# runs have been saved.
+DEFAULT_COSTS: dict[str, float] = {
+    'create_project': 20.0,
+    'open_library': 5.0,
+    'create_device': 3.0,
+    'copy_library': 10.0,
+    'configure_network': 1.0,
+    'plug_module': 1.0,
+    'create_tag_table': 0.3,
+    'create_tag': 0.05,
+    'create_tags': 0.05,
+    'import_type': 1.0,
+    'create_group': 0.2,
+    'create_groups': 0.2,
+    'import_block': 2.0,
+    'import_source': 5.0,
+    'create_from_mastercopy': 1.0,
+    'create_instance_db': 0.5,
+}
+
+BLOCK_XML: dict[ProgramBlocks.PlcEnum, type] = {
+    ProgramBlocks.PlcEnum.OrganizationBlock: BlocksOB.XML,
+    ProgramBlocks.PlcEnum.FunctionBlock: BlocksFB.XML,
+    ProgramBlocks.PlcEnum.Function: BlocksFC.XML,
+}
+
+
+@dataclass
+class Operation:
+    Kind: str
+    Args: dict[str, Any]
+
+
+@dataclass
+class Pending:
+    # Document of an operation until generate renders it
+    XML: type
+    Data: object
+
+
+@dataclass
+class Plan:
+    # Everything a run does in TIA Portal, in order. Arguments are plain JSON
+    # values; XML documents are stored once by digest, in files, and
+    # referred to.
+    Operations: list[Operation] = field(default_factory=list)
+    Documents: DocumentStore = field(default_factory=DocumentStore)
+    Version: int = PLAN_VERSION
+
+    def add(self, kind: str, **args):
+        self.Operations.append(Operation(kind, args))
+
+    def document(self, text: str, suffix: str = '.xml') -> str:
+        key = digest(text.encode('utf-8'))[:16]
+        if key not in self.Documents:
+            self.Documents.add(key, text, suffix)
+
+        return key
+
+    def save(self, path: Path):
+        # the documents go to a directory next to the plan, e.g.
+        # plan.documents/ for plan.json
+        directory = documents_directory(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        names = [f"{key}{self.Documents.path(key).suffix}" for key in self.Documents]
+        for key, name in zip(self.Documents, names):
+            shutil.copyfile(self.Documents.path(key), directory / name)
+        with open(path, 'w') as file:
+            json.dump({'Operations': [{'Kind': operation.Kind, 'Args': operation.Args}
+                                      for operation in self.Operations],
+                       'Documents': names,
+                       'Version': self.Version}, file, indent=1)
+
+    @classmethod
+    def load(cls, path: Path) -> Plan:
+        with open(path) as file:
+            data = json.load(file)
+        if data.get('Version') != PLAN_VERSION:
+            raise ValueError(f"Plan {path} has version {
+                             data.get('Version')}, expected {PLAN_VERSION}")
+        directory = documents_directory(path)
+        files = {Path(name).stem: directory / name for name in data['Documents']}
+        missing = [key for key, file in files.items() if not file.is_file()]
+        if missing:
+            raise ValueError(f"Plan {path} lacks {len(missing)} documents in {directory}")
+
+        return cls([Operation(**operation) for operation in data['Operations']],
+                   DocumentStore(files=files), data['Version'])
+
+
+def documents_directory(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.documents")
+
+
+def build(translation: Translation,
+          project: dict[str, Any],
+          plan: Plan | None = None,
+          documents: DocumentCache | None = None,
+          workers: int = 1,
+          artifacts: ArtifactCache | None = None,
+          sources: dict[str, Any] | None = None) -> Plan:
+    # Appends the operations creating one project. With `sources`, SCL
+    # blocks are generated from external sources instead of imported one by
+    # one.
+    plan = Plan() if plan is None else plan
+
+    build_project(plan, translation, project)
+    for device in translation.Devices:
+        build_device(plan, translation, device, sources)
+    generate(plan, documents, workers, artifacts)
+
+    return plan
+
+
+def build_project(plan: Plan, translation: Translation, project: dict[str, Any]):
+    # what comes before the content of the first device
+    plan.add('create_project', name=project['name'],
+             directory=str(project['directory']), overwrite=project['overwrite'])
+    for library in translation.Libraries:
+        plan.add('open_library', path=library.FilePath.as_posix(),
+                 read_only=library.ReadOnly)
+    for device in translation.Devices:
+        plan.add('create_device', device=device.ID,
+                 type_identifier=device.p_typeIdentifier,
+                 name=device.p_name, device_name=device.p_deviceName)
+
+
+def build_device(plan: Plan,
+                 translation: Translation,
+                 device: Devices.Device,
+                 sources: dict[str, Any] | None = None):
+    ID = device.ID
+    for library in translation.Libraries:
+        if library.Copy != 'used':
+            plan.add('copy_library', device=ID, name=library.FilePath.stem)
+
+    plan.add('configure_network', device=ID, interface={
+        key: value for key, value in asdict(device.NetworkInterface).items()
+        if value is not None})
+
+    for module in translation.LocalModules[ID]:
+        plan.add('plug_module', device=ID, type_identifier=module.typeIdentifier,
+                 name=module.name, position=module.positionNumber + device.SlotsRequired)
+
+    for table in translation.PlcTags[ID]:
+        plan.add('create_tag_table', device=ID, name=table.Name)
+        for tag in table.Tags:
+            plan.add('create_tag', device=ID, table=table.Name, name=tag.Name,
+                     datatype=tag.DataTypeName, address=tag.LogicalAddress)
+
+    for plc_data_type in translation.PlcDataTypes:
+        if not plc_data_type.Name or not plc_data_type.Types:
+            continue
+        plan.add('import_type', device=ID, name=plc_data_type.Name,
+                 document=Pending(PlcDataTypes.XML, plc_data_type))
+
+    # every folder is created at once, before the first block goes in
+    groups: list[str] = []
+    first = len(plan.Operations)
+    # mastercopies of libraries copied only as far as they are used
+    selective = [library for library in translation.Libraries if library.Copy == 'used']
+    for library in selective:
+        root = PurePosixPath('/') / library.FilePath.stem
+        for folder, name in Libraries.used(library, translation.PlcBlocks[ID]):
+            groups.append(str(root / folder))
+            plan.add('create_from_mastercopy', device=ID, name=name, group=str(root / folder),
+                     library=library.FilePath.stem, folder=str(folder))
+    for data_block in translation.DataBlocks[ID]:
+        if not data_block.Name:
+            continue
+        group = str(data_block.BlockGroupPath)
+        groups.append(group)
+        plan.add('import_block', device=ID, name=data_block.Name, group=group,
+                 document=Pending(BlocksData.XML, data_block))
+
+    scl: list[ProgramBlocks.ProgramBlock] = []
+    for plc in translation.PlcBlocks[ID]:
+        if not plc.Name:
+            continue
+        group = str(plc.BlockGroupPath)
+        if (sources is not None and not plc.IsInstance and plc.ProgrammingLanguage == "SCL"
+                and plc.PlcType in ExternalSources.KEYWORDS):
+            scl.append(plc)
+            continue
+        if plc.IsInstance:
+            # instances come from a library; without a library source only
+            # a selective copy of one creates them
+            if not plc.LibraryData.Name:
+                continue
+            groups.append(group)
+            plan.add('create_from_mastercopy', device=ID, name=plc.Name, group=group,
+                     library=plc.LibraryData.Name,
+                     folder=str(plc.LibraryData.MasterCopyFolderPath))
+            continue
+        groups.append(group)
+        plan.add('import_block', device=ID, name=plc.Name, group=group,
+                 document=Pending(BLOCK_XML[plc.PlcType], plc))
+
+    # instance DBs of SCL blocks are declared in their sources
+    scl_names = {plc.Name for plc in scl}
+    scl_instances: dict[str, list[BlocksDBInstances.InstanceDB]] = {}
+    for instance_db in translation.InstanceDBs[ID]:
+        if not instance_db.InstanceOfName:
+            continue
+        if instance_db.CallOption != BlocksDBInstances.CallOptionEnum.Single:
+            continue
+        if instance_db.InstanceOfName in scl_names:
+            scl_instances.setdefault(instance_db.InstanceOfName, []).append(instance_db)
+            continue
+        group = str(instance_db.BlockGroupPath)
+        groups.append(group)
+        plan.add('create_instance_db', device=ID, group=group,
+                 name=instance_db.Name or f"{instance_db.InstanceOfName}_DB",
+                 number=instance_db.Number, instance_of=instance_db.InstanceOfName)
+
+    # after the blocks imported as XML and the instance DBs, which they may
+    # call
+    if scl:
+        grouped = ExternalSources.group(scl, sources.get('group_by_folder', True),
+                                        sources.get('max_blocks', ExternalSources.MAX_BLOCKS),
+                                        sources.get('max_bytes', ExternalSources.MAX_BYTES),
+                                        scl_instances)
+        for source in grouped:
+            plan.add('import_source', device=ID, name=source.Name, folder=str(source.Folder),
+                     blocks=source.Blocks, document=plan.document(source.text(), '.scl'))
+        logger.info(f"Device {ID}: {len(scl)} SCL blocks in {len(grouped)} external sources")
+
+    if groups:
+        plan.Operations.insert(first, Operation('create_groups', {
+            'device': ID, 'paths': Identities.tree(groups)}))
+
+
+def generate(plan: Plan,
+             documents: DocumentCache | None = None,
+             workers: int = 1,
+             artifacts: ArtifactCache | None = None):
+    # Renders the documents build_device left pending, each data object
+    # once, in up to `workers` processes. The builders keep no state between
+    # documents and texts are stored in job order as they come, so the plan
+    # is the same for any number of workers and holds no text in memory.
+    # Documents found in `artifacts` are not rendered at all.
+    pending = [operation for operation in plan.Operations
+               if isinstance(operation.Args.get('document'), Pending)]
+    jobs: dict[tuple[type, int], Pending] = {}
+    for operation in pending:
+        document = operation.Args['document']
+        jobs.setdefault((document.XML, id(document.Data)), document)
+
+    keys: dict[tuple[type, int], str] = {}
+    missing: list[tuple[type, int]] = []
+    hashes: dict[tuple[type, int], str] = {}
+    for key, document in jobs.items():
+        rendered = documents.get(document.XML, document.Data) if documents is not None else None
+        if rendered is not None:
+            keys[key] = plan.document(rendered.xml())
+            continue
+        if artifacts is not None:
+            hashes[key] = artifacts.key(document.XML, document.Data)
+            text = artifacts.get(hashes[key])
+            if text is not None:
+                keys[key] = plan.document(text)
+                if documents is not None:
+                    documents.store(document.XML, document.Data, text)
+                continue
+        missing.append(key)
+
+    for key, text in zip(missing, render_all([jobs[key] for key in missing], workers)):
+        keys[key] = plan.document(text)
+        if documents is not None:
+            documents.store(jobs[key].XML, jobs[key].Data, text)
+        if artifacts is not None:
+            artifacts.put(hashes[key], text)
+
+    for operation in pending:
+        document = operation.Args['document']
+        operation.Args['document'] = keys[(document.XML, id(document.Data))]
+
+
+def render_all(jobs: list[Pending], workers: int = 1) -> Iterator[str]:
+    if workers <= 1 or len(jobs) < 2:
+        yield from map(render, jobs)
+        return
+
+    workers = min(workers, len(jobs))
+    logger.debug(f"Rendering {len(jobs)} documents in {workers} processes")
+    with ProcessPoolExecutor(workers) as pool:
+        yield from pool.map(render, jobs, chunksize=max(1, len(jobs) // (4 * workers)))
+
+
+def render(job: Pending) -> str:
+    return Streamed(job.XML, job.Data).xml()
+
+
+def optimize(plan: Plan) -> Plan:
+    operations = plan.Operations
+    for step in OPTIMIZERS:
+        count = len(operations)
+        operations = step(operations)
+        logger.debug(f"Plan step {step.__name__}: {
+                     count} -> {len(operations)} operations")
+
+    # documents of removed operations are dropped with them
+    used = {operation.Args['document'] for operation in operations
+            if 'document' in operation.Args}
+
+    return Plan(operations, plan.Documents.only(used))
+
+
+def drop_duplicate_libraries(operations: list[Operation]) -> list[Operation]:
+    # a library stays open for the whole TIA Portal session
+    opened: set[str] = set()
+    kept = []
+    for operation in operations:
+        if operation.Kind == 'open_library':
+            if operation.Args['path'] in opened:
+                continue
+            opened.add(operation.Args['path'])
+        kept.append(operation)
+
+    return kept
+
+
+def drop_duplicate_groups(operations: list[Operation]) -> list[Operation]:
+    # creating a group creates its parents too
+    created: set[tuple[Any, PurePosixPath]] = set()
+    kept = []
+    for operation in operations:
+        if operation.Kind == 'create_project':
+            created = set()
+        if operation.Kind == 'create_groups':
+            created.update((operation.Args['device'], PurePosixPath(path))
+                           for path in operation.Args['paths'])
+        if operation.Kind == 'create_group':
+            path = PurePosixPath('/') / operation.Args['path']
+            if (operation.Args['device'], path) in created:
+                continue
+            created.update((operation.Args['device'], parent)
+                           for parent in [path, *path.parents])
+        kept.append(operation)
+
+    return kept
+
+
+def merge_tags(operations: list[Operation]) -> list[Operation]:
+    # consecutive tags of one table become one operation, which finds the
+    # table once
+    kept = []
+    for operation in operations:
+        if operation.Kind != 'create_tag':
+            kept.append(operation)
+            continue
+        args = operation.Args
+        tag = [args['name'], args['datatype'], args['address']]
+        last = kept[-1] if kept else None
+        if (last and last.Kind == 'create_tags' and last.Args['device'] == args['device']
+                and last.Args['table'] == args['table']):
+            last.Args['tags'].append(tag)
+            continue
+        kept.append(Operation('create_tags', {
+            'device': args['device'], 'table': args['table'], 'tags': [tag]}))
+
+    return kept
+
+
+OPTIMIZERS: list[Callable[[list[Operation]], list[Operation]]] = [
+    drop_duplicate_libraries, drop_duplicate_groups, merge_tags]
+
+
+def units(operation: Operation) -> int:
+    if operation.Kind == 'create_tags':
+        return len(operation.Args['tags'])
+    if operation.Kind == 'create_groups':
+        return len(operation.Args['paths'])
+    return 1
+
+
+def estimate(plan: Plan, costs: dict[str, float] = DEFAULT_COSTS) -> dict[str, tuple[int, float]]:
+    # (operations, seconds) per kind
+    totals: dict[str, tuple[int, float]] = {}
+    for operation in plan.Operations:
+        count, seconds = totals.get(operation.Kind, (0, 0.0))
+        totals[operation.Kind] = (count + 1, seconds + units(operation) *
+                                  costs.get(operation.Kind, DEFAULT_COSTS.get(operation.Kind, 0.0)))
+
+    return totals
+
+
+def describe(plan: Plan, costs: dict[str, float] = DEFAULT_COSTS) -> str:
+    # Dry run: every operation with its estimated time, then totals.
+    lines = []
+    for number, operation in enumerate(plan.Operations, 1):
+        args = ', '.join(
+            f"{key}={len(value)} {key}" if key in ('tags', 'blocks', 'paths') else f"{key}={value}"
+            for key, value in operation.Args.items())
+        seconds = units(operation) * costs.get(operation.Kind,
+                                               DEFAULT_COSTS.get(operation.Kind, 0.0))
+        lines.append(f"{number:6d}  {operation.Kind:<24} {
+                     seconds:8.2f} s  {args}")
+
+    totals = estimate(plan, costs)
+    lines.append('')
+    for kind, (count, seconds) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        lines.append(f"{kind:<24} {count:6d} x {seconds:10.1f} s")
+    lines.append(f"{'total':<24} {len(plan.Operations):6d} x {
+                 sum(seconds for _, seconds in totals.values()):10.1f} s")
+
+    return '\n'.join(lines)
+
+
+def load_costs(path: Path = COSTS_FILE) -> dict[str, float]:
+    try:
+        with open(path) as file:
+            return DEFAULT_COSTS | json.load(file)
+    except (FileNotFoundError, ValueError):
+        return dict(DEFAULT_COSTS)
+
+
+def save_costs(measured: dict[str, float], path: Path = COSTS_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump(load_costs(path) | measured, file, indent=1)
+
+
+class Context:
+    # Objects created by earlier operations of a running plan.
+
+    def __init__(self, imports: Portals.Imports, TIA: Siemens.Engineering.TiaPortal,
+                 mirror: Mirror | None = None):
+        self.imports: Portals.Imports = imports
+        self.TIA: Siemens.Engineering.TiaPortal = TIA
+        self.mirror: Mirror | None = mirror
+        self.project: Siemens.Engineering.Project | None = None
+        self.project_name: str = ''
+        self.devices: dict[Any, Siemens.Engineering.HW.Device] = {}
+        self.software: dict[Any, Siemens.Engineering.HW.Software] = {}
+
+    def plc_software(self, device: Any) -> Siemens.Engineering.HW.Software:
+        if device not in self.software:
+            self.software[device] = Devices.get_plc_software(
+                self.imports, self.devices[device])
+        return self.software[device]
+
+    def identity(self, device: Any) -> Identities.IdentityMap:
+        return Identities.of(self.plc_software(device))
+
+    def group(self, device: Any, path: str) -> Siemens.Engineering.SW.Blocks.PlcBlockGroup:
+        return self.identity(device).group(path, mkdir=True)
+
+
+def run(imports: Portals.Imports,
+        plan: Plan,
+        settings: dict[str, Any]) -> tuple[Siemens.Engineering.TiaPortal, dict[str, float]]:
+    # Performs the plan; also returns the mean seconds per unit of every kind
+    # of operation, for later estimates.
+    return run_plans(imports, [plan], settings)
+
+
+def run_plans(imports: Portals.Imports,
+              plans: Iterable[Plan],
+              settings: dict[str, Any]) -> tuple[Siemens.Engineering.TiaPortal, dict[str, float]]:
+    # Performs plans one after the other in one session, each continuing
+    # where the one before stopped; a plan may be built while the ones
+    # before it run, and is dropped once it has run.
+    TIA: Siemens.Engineering.TiaPortal = Portals.connect(imports, {}, settings)
+    # libraries are indexed again for this portal
+    Libraries.clear()
+    spent: dict[str, list[float]] = {}
+
+    # documents are imported from the files of the plans
+    context = Context(imports, TIA, Mirror.from_settings(settings))
+    for plan in plans:
+        for number, operation in enumerate(plan.Operations, 1):
+            logger.debug(f"Operation {number}/{len(plan.Operations)}: {operation.Kind}")
+            start = time.perf_counter()
+            HANDLERS[operation.Kind](context, plan, **operation.Args)
+            seconds, count = spent.setdefault(operation.Kind, [0.0, 0])
+            spent[operation.Kind] = [seconds + time.perf_counter() - start,
+                                     count + units(operation)]
+    logger.info(f"Openness lookups: {Identities.stats()}")
+
+    return TIA, {kind: seconds / count for kind, (seconds, count) in spent.items() if count}
+
+
+def create_project(context: Context, plan: Plan, name: str, directory: str, overwrite: bool):
+    context.project = Projects.create(context.imports, Projects.Project(
+        name, Path(directory), overwrite), context.TIA)
+    context.project_name = name
+    context.devices, context.software = {}, {}
+    Identities.clear()
+
+
+def open_library(context: Context, plan: Plan, path: str, read_only: bool | None):
+    Libraries.import_library(context.imports, Libraries.GlobalLibrary(
+        Path(path), read_only), context.TIA, context.mirror)
+
+
+def create_device(context: Context, plan: Plan, device: Any, type_identifier: str,
+                  name: str, device_name: str):
+    data = Devices.Device(type_identifier, name, device_name, device, 0)
+    context.devices[device] = Devices.create([data], context.project)[0]
+
+
+def copy_library(context: Context, plan: Plan, device: Any, name: str):
+    Libraries.generate_mastercopies(
+        name, context.plc_software(device), context.TIA)
+
+
+def configure_network(context: Context, plan: Plan, device: Any, interface: dict):
+    network = Networks.NetworkInterface(**interface)
+    se_device = context.devices[device]
+    se_net_itfs = Networks.create_network_service(
+        context.imports, Devices.Device('', '', '', device, 0, network), se_device)
+    for index, se_net_itf in enumerate(se_net_itfs):
+        # WARNING:
+        # Subnet Name must be UNIQUE!
+        # Otherwise, Siemens Engineering will cause an error.
+        if index == 0:
+            subnet = se_net_itf.Nodes[0].CreateAndConnectToSubnet(
+                network.subnet_name)
+            io_system = se_net_itf.IoControllers[0].CreateIoSystem(
+                network.io_controller)
+        else:
+            se_net_itf.Nodes[0].ConnectToSubnet(subnet)
+            if se_net_itf.IoConnectors.Count > 0:
+                se_net_itf.IoConnectors[0].ConnectToIoSystem(io_system)
+
+
+def plug_module(context: Context, plan: Plan, device: Any, type_identifier: str,
+                name: str, position: int):
+    # the position already includes the slots the device requires
+    DeviceItems.plug_new(DeviceItems.DeviceItem(
+        device, type_identifier, name, position), context.devices[device], 0)
+
+
+def create_tag_table(context: Context, plan: Plan, device: Any, name: str):
+    PlcTags.new(context.imports, context.plc_software(device),
+                PlcTags.PlcTagTable(device, name, []))
+
+
+def create_tags(context: Context, plan: Plan, device: Any, table: str, tags: list[list[str]]):
+    se_table = context.identity(device).table(table)
+    for name, datatype, address in tags:
+        PlcTags.add_tag(se_table, PlcTags.PlcTag(name, datatype, address))
+
+
+def create_tag(context: Context, plan: Plan, device: Any, table: str,
+               name: str, datatype: str, address: str):
+    create_tags(context, plan, device, table, [[name, datatype, address]])
+
+
+def import_type(context: Context, plan: Plan, device: Any, name: str, document: str):
+    PlcDataTypes.import_xml(
+        context.imports, context.plc_software(device), plan.Documents.path(document))
+
+
+def create_group(context: Context, plan: Plan, device: Any, path: str):
+    context.group(device, path)
+
+
+def create_groups(context: Context, plan: Plan, device: Any, paths: list[str]):
+    created = context.identity(device).prepare(paths)
+    logger.info(f"Created {created} of {len(paths)} block groups")
+
+
+def import_block(context: Context, plan: Plan, device: Any, name: str, group: str, document: str):
+    SE: Siemens.Engineering = context.imports.DLL
+    filename = plan.Documents.path(document)
+    logger.info(f"Importing Program Block ({name}) XML data from: {filename}")
+    context.group(device, group).Blocks.Import(context.imports.FileInfo(
+        filename.absolute().as_posix()), SE.ImportOptions.Override)
+    context.identity(device).forget_block(name)
+
+
+def import_source(context: Context, plan: Plan, device: Any, name: str, folder: str,
+                  blocks: list[str], document: str):
+    ExternalSources.import_source(context.imports, context.plc_software(device),
+                                  plan.Documents.path(document), name, PurePosixPath(folder))
+
+
+def create_from_mastercopy(context: Context, plan: Plan, device: Any, name: str, group: str,
+                           library: str, folder: str):
+    mastercopy = Libraries.find_mastercopy(
+        library=Libraries.find(TIA=context.TIA, name=library),
+        mastercopyfolder_path=PurePosixPath(folder),
+        name=name)
+    if not mastercopy:
+        logger.debug("MasterCopy is (null)")
+        return
+    context.identity(device).add_block(
+        group, name, context.group(device, group).Blocks.CreateFrom(mastercopy))
+
+
+def create_instance_db(context: Context, plan: Plan, device: Any, group: str,
+                       name: str, number: int, instance_of: str):
+    logger.info(f"Generation of InstanceDB '{name}' of Plc '{
+                instance_of}' started")
+    instance_db = context.group(device, group).Blocks.CreateInstanceDB(
+        name, True, number, instance_of)
+    context.identity(device).add_block(group, name, instance_db)
+
+
+HANDLERS: dict[str, Callable[..., None]] = {
+    'create_project': create_project,
+    'open_library': open_library,
+    'create_device': create_device,
+    'copy_library': copy_library,
+    'configure_network': configure_network,
+    'plug_module': plug_module,
+    'create_tag_table': create_tag_table,
+    'create_tag': create_tag,
+    'create_tags': create_tags,
+    'import_type': import_type,
+    'create_group': create_group,
+    'create_groups': create_groups,
+    'import_block': import_block,
+    'import_source': import_source,
+    'create_from_mastercopy': create_from_mastercopy,
+    'create_instance_db': create_instance_db,
+}
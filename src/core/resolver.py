@@ -0,0 +1,131 @@
+from __future__ import annotations
+from collections import defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, TypeVar
+
+from src.core.compact import Interner
+from src.core.graph import NetworkGraph
+
+if TYPE_CHECKING:
+    from src.core.variants import Shared
+
+T = TypeVar('T')
+
+
+class Resolver:
+    # Indexes every cross-referenced list of a validated config once, so the
+    # helpers in core.py do dict lookups instead of scanning the whole list
+    # for every block.
+
+    def __init__(self, config: dict[str, Any], compact: bool = True, shared: Shared | None = None,
+                 directory: Path | None = None):
+        self.config: dict[str, Any] = config
+        # files named by the config, e.g. start values, are relative to it
+        self.directory: Path = directory or Path()
+        self.interner: Interner = Interner(compact)
+        # objects built by other translations of entries this config shares
+        self.shared: Shared | None = shared
+        self.block_keys: dict[int, tuple] = {}
+
+        self.blocks_by_id: dict[int, dict] = {}
+        self.blocks_by_network_source: dict[int, list[dict]] = defaultdict(
+            list)
+        for block in config.get('Program blocks') or []:
+            self.blocks_by_id.setdefault(block.get('id'), block)
+            if block.get('network_source_id') is not None:
+                self.blocks_by_network_source[block.get(
+                    'network_source_id')].append(block)
+
+        self.network_sources_by_block: dict[int, list[dict]] = defaultdict(
+            list)
+        for network in config.get('Network sources') or []:
+            self.network_sources_by_block[network.get(
+                'plc_block_id')].append(network)
+
+        self.variable_sections_by_block: dict[int, list[dict]] = defaultdict(
+            list)
+        for section in config.get('Variable sections') or []:
+            self.variable_sections_by_block[section.get(
+                'plc_block_id')].append(section)
+
+        # the last entry of a block wins, as in the original linear scan
+        self.wire_parameters_by_block: dict[int, dict] = {}
+        for wire in config.get('Wire parameters') or []:
+            self.wire_parameters_by_block[wire.get(
+                'plc_block_id')] = wire.get('parameters')
+
+        self.wire_template_by_name: dict[str, list[dict]] = {}
+        for wire_block in config.get('Wire template') or []:
+            self.wire_template_by_name.setdefault(
+                wire_block.get('block_name'), wire_block.get('parameters'))
+
+        self.instances_by_block: dict[int, dict] = {}
+        for instancedb in config.get('Instances') or []:
+            self.instances_by_block.setdefault(
+                instancedb.get('plc_block_id'), instancedb)
+
+        self._graph: NetworkGraph | None = None
+
+    @property
+    def graph(self) -> NetworkGraph:
+        if self._graph is None:
+            self._graph = NetworkGraph(self)
+        return self._graph
+
+    def block(self, plc_block_id: int) -> dict | None:
+        return self.blocks_by_id.get(plc_block_id)
+
+    def block_name(self, plc_block_id: int) -> str:
+        block = self.blocks_by_id.get(plc_block_id)
+        if block is None:
+            return ""
+        return block.get('name')
+
+    def blocks_of_network(self, network_source_id: int) -> list[dict]:
+        return self.blocks_by_network_source.get(network_source_id, [])
+
+    def network_sources(self, plc_block_id: int) -> list[dict]:
+        return self.network_sources_by_block.get(plc_block_id, [])
+
+    def variable_sections(self, plc_block_id: int) -> list[dict]:
+        return self.variable_sections_by_block.get(plc_block_id, [])
+
+    def wire_parameters(self, plc_block_id: int) -> dict[str, str]:
+        return self.wire_parameters_by_block.get(plc_block_id, {})
+
+    def wire_template(self, block_name: str) -> list[dict]:
+        return self.wire_template_by_name.get(block_name, [])
+
+    def instance(self, plc_block_id: int) -> dict | None:
+        return self.instances_by_block.get(plc_block_id)
+
+    def block_key(self, block: dict) -> tuple:
+        # Identity of every entry the built block is made from, its callees'
+        # included. Two configs sharing those entry objects build equal
+        # blocks, so the key is used to reuse them.
+        if id(block) in self.block_keys:
+            return self.block_keys[id(block)]
+
+        plc_block_id = block.get('id')
+        networks = self.network_sources(plc_block_id)
+        key = (
+            id(block),
+            tuple(map(id, networks)),
+            tuple(self.block_key(callee) for network in networks
+                  for callee in self.blocks_of_network(network.get('id'))),
+            tuple(map(id, self.variable_sections(plc_block_id))),
+            id(self.wire_parameters_by_block.get(plc_block_id)),
+            id(self.wire_template_by_name.get(block.get('name'))),
+            id(self.instance(plc_block_id)),
+        )
+        self.block_keys[id(block)] = key
+
+        return key
+
+
+def group_by_device(items: Iterable[T]) -> dict[int, list[T]]:
+    grouped: dict[int, list[T]] = defaultdict(list)
+    for item in items:
+        grouped[item.DeviceID].append(item)
+
+    return grouped
@@ -0,0 +1,51 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any
+import json
+import logging
+import os
+
+from src.core import logs
+from src.core.cache import CACHE_DIRECTORY
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+SETTINGS_FILE: Path = CACHE_DIRECTORY.parent / 'settings.json'
+
+# Settings a run takes from the settings file, the command line or the GUI,
+# with their values when none of them sets one. Settings not listed here are
+# set by the entry points themselves, e.g. enable_ui.
+DEFAULTS: dict[str, Any] = {
+    'scratch_directory': None,
+    'keep_scratch': False,
+    'xml_cache': True,
+    # the documents are the same for any number of workers
+    'xml_workers': os.cpu_count() or 1,
+    # e.g. {"group_by_folder": true, "max_blocks": 500}, see ExternalSources
+    'scl_sources': None,
+    # true for the default directory, or a directory
+    'library_mirror': False,
+}
+
+
+def load(path: Path = SETTINGS_FILE) -> dict[str, Any]:
+    # The settings of `path` over the defaults; a missing file sets none
+    try:
+        with open(path) as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return dict(DEFAULTS)
+    if not isinstance(data, dict):
+        raise ValueError(f"Settings file {path} must hold an object")
+    unknown = sorted(set(data) - set(DEFAULTS))
+    if unknown:
+        raise ValueError(f"Settings file {path} has unknown settings: {', '.join(unknown)}")
+    logger.info(f"Settings from {path}: {', '.join(sorted(data)) or 'none'}")
+
+    return DEFAULTS | data
+
+
+def merge(settings: dict[str, Any], overrides: dict[str, Any]) -> dict[str, Any]:
+    # `overrides` that are set, e.g. options given on the command line
+    return settings | {key: value for key, value in overrides.items() if value is not None}
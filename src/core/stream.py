@@ -0,0 +1,281 @@
+from __future__ import annotations
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+import codecs
+import json
+import logging
+
+from src.core import logs, templates
+from src.schemas import configuration
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1 << 16
+
+# Top-level lists that are indexed instead of kept in memory, with the field
+# their entries are grouped by.
+INDEXED_KEYS: dict[str, str] = {
+    'Program blocks': 'DeviceID',
+    'Network sources': 'plc_block_id',
+    'Variable sections': 'plc_block_id',
+    'Wire parameters': 'plc_block_id',
+    'Instances': 'plc_block_id',
+    'Wire template': 'block_name',
+    'PLC tags': 'DeviceID',
+    'Local modules': 'DeviceID',
+}
+
+
+class JSONStreamReader:
+    # Incremental reader for a top-level JSON object. Array values are
+    # yielded entry by entry together with their byte span in the file, so
+    # a whole config never has to be decoded at once.
+
+    def __init__(self, file: BinaryIO, chunk_size: int = CHUNK_SIZE):
+        self.file: BinaryIO = file
+        self.chunk_size: int = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json = json.JSONDecoder()
+        self.buffer: str = ''
+        self.pos: int = 0
+        self.byte_pos: int = 0  # file offset of buffer[pos]
+        self.eof: bool = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        data = self.file.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            self.buffer = self.buffer[self.pos:] + self.decoder.decode(b'', True)
+            self.pos = 0
+            return False
+        self.buffer = self.buffer[self.pos:] + self.decoder.decode(data)
+        self.pos = 0
+        return True
+
+    def _advance(self, end: int):
+        self.byte_pos += len(self.buffer[self.pos:end].encode('utf-8'))
+        self.pos = end
+
+    def _peek(self) -> str:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self._advance(self.pos + 1)
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON config")
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' at byte {
+                             self.byte_pos} of JSON config")
+        self._advance(self.pos + 1)
+
+    def _value(self) -> tuple[Any, int, int]:
+        self._peek()
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # a value touching the end of the buffer may be cut short
+            if end == len(self.buffer) and self._fill():
+                continue
+            start = self.byte_pos
+            self._advance(end)
+            return value, start, self.byte_pos - start
+
+    def items(self) -> Iterator[tuple[str, Any, bool]]:
+        # Yields (key, value, False) for scalar and object values, and
+        # (key, entries, True) for arrays, whose entries are (value, offset,
+        # length) and must be consumed before the next key.
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            key, _, _ = self._value()
+            self._expect(':')
+            if self._peek() == '[':
+                self._advance(self.pos + 1)
+                yield key, self._entries(), True
+            else:
+                value, _, _ = self._value()
+                yield key, value, False
+            if self._peek() == ',':
+                self._advance(self.pos + 1)
+                continue
+            self._expect('}')
+            return
+
+    def _entries(self) -> Iterator[tuple[Any, int, int]]:
+        if self._peek() == ']':
+            self._advance(self.pos + 1)
+            return
+        while True:
+            yield self._value()
+            if self._peek() == ',':
+                self._advance(self.pos + 1)
+                continue
+            self._expect(']')
+            return
+
+
+class ConfigIndex:
+    # One pass over a JSON config and the files it includes: small sections
+    # are kept, the big lists only as byte spans grouped by the field that
+    # selects them per device. Templates are expanded once, here; their
+    # entries are kept and grouped the same way.
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+        self.files: list[Path] = []
+        self.common: dict[str, Any] = {}
+        # flat (file, offset, length) triples, far smaller than one tuple
+        # per entry
+        self.groups: dict[str, dict[Any, array]] = {
+            key: defaultdict(lambda: array('q')) for key in INDEXED_KEYS}
+        self.instances_by_device: dict[int, array] = defaultdict(
+            lambda: array('q'))
+        self.block_ids: dict[int, set] = defaultdict(set)
+        self.block_names: dict[int, set] = defaultdict(set)
+        # entries of templates, numbered in the order they were made
+        self.generated: dict[str, dict[Any, list[tuple[int, Any]]]] = {
+            key: defaultdict(list) for key in INDEXED_KEYS}
+        self.generated_instances: dict[int, list[tuple[int, Any]]] = defaultdict(list)
+
+        self._index(Path(path).absolute(), [])
+        if templates.TEMPLATES in self.common:
+            self._expand(self.common.pop(templates.TEMPLATES))
+
+        logger.info(f"Indexed {path} ({len(self.files)} files): " + ", ".join(
+            f"{sum(map(len, groups.values())) // 3} {key}" for key, groups in self.groups.items()))
+
+    def _index(self, path: Path, stack: list[Path]):
+        # Files are indexed depth first in include order, the order
+        # configuration.load merges them in.
+        number = len(self.files)
+        self.files.append(path)
+        includes: list[str] = []
+        with open(path, 'rb') as file:
+            for key, value, is_array in JSONStreamReader(file).items():
+                if key == configuration.INCLUDE:
+                    includes = configuration.includes.validate(
+                        [entry for entry, _, _ in value] if is_array else value)
+                    continue
+                if key in INDEXED_KEYS and not is_array:
+                    raise ValueError(f"'{key}' of {path} is not a list")
+                if key not in INDEXED_KEYS:
+                    if is_array:
+                        self.common.setdefault(key, []).extend(
+                            entry for entry, _, _ in value)
+                    else:
+                        self.common.setdefault(key, value)
+                    continue
+                field = INDEXED_KEYS[key]
+                for entry, offset, length in value:
+                    if not isinstance(entry, dict):
+                        entry = {}  # left for the validator to reject
+                    span = (number, offset, length)
+                    self.groups[key][entry.get(field)].extend(span)
+                    self._select(key, entry)
+                    if key == 'Instances':
+                        self.instances_by_device[entry.get(
+                            'DeviceID')].extend(span)
+
+        for include in includes:
+            include = (path.parent / include).absolute()
+            if include in stack or include == path:
+                raise ValueError(f"Config includes itself: {
+                                 ' -> '.join(map(str, stack + [path, include]))}")
+            if include not in self.files:
+                self._index(include, stack + [path])
+
+    def _select(self, key: str, entry: dict):
+        # the blocks of a device select their networks, sections, ...
+        if key == 'Program blocks':
+            self.block_ids[entry.get('DeviceID')].add(entry.get('id'))
+            self.block_names[entry.get('DeviceID')].add(entry.get('name'))
+
+    def _expand(self, raw: Any):
+        # Entries of lists that are kept go with them, the others are
+        # grouped as if they had been in the file after the last entry
+        expanded = templates.expand({templates.TEMPLATES: raw})
+        number = 0
+        for key, entries in expanded.items():
+            if key not in INDEXED_KEYS:
+                existing = self.common.setdefault(key, [])
+                if not isinstance(existing, list):
+                    raise ValueError(f"'{key}' is not a list, templates cannot extend it")
+                existing.extend(entries)
+                continue
+            for entry in entries:
+                if not isinstance(entry, dict):
+                    entry = {}
+                self.generated[key][entry.get(INDEXED_KEYS[key])].append((number, entry))
+                self._select(key, entry)
+                if key == 'Instances':
+                    self.generated_instances[entry.get('DeviceID')].append((number, entry))
+                number += 1
+
+    def device(self, device_id: int) -> dict[str, Any]:
+        # Raw (not yet validated) lists of what one device needs, in file
+        # order followed by entries of templates. What all devices share is
+        # in `common`, validated once by the caller.
+        block_ids = self.block_ids.get(device_id, set())
+        block_names = self.block_names.get(device_id, set())
+
+        def by(key: str, values: set) -> set[tuple[int, int, int]]:
+            groups = self.groups[key]
+            return {span for value in values
+                    for span in triples(groups.get(value, ()))}
+
+        def made(key: str, values: set) -> dict[int, Any]:
+            groups = self.generated[key]
+            return {number: entry for value in values for number, entry in groups.get(value, ())}
+
+        selectors: dict[str, set] = {
+            'Program blocks': {device_id},
+            'Network sources': block_ids,
+            'Variable sections': block_ids,
+            'Wire parameters': block_ids,
+            'Instances': block_ids,
+            'Wire template': block_names,
+            'PLC tags': {device_id},
+            'Local modules': {device_id},
+        }
+        selected = {key: by(key, values) for key, values in selectors.items()}
+        generated = {key: made(key, values) for key, values in selectors.items()}
+        selected['Instances'] |= set(triples(self.instances_by_device.get(device_id, ())))
+        generated['Instances'] |= dict(self.generated_instances.get(device_id, ()))
+
+        config: dict[str, Any] = {}
+        files: dict[int, BinaryIO] = {}
+        try:
+            for key, spans in selected.items():
+                config[key] = []
+                for number, offset, length in sorted(spans):
+                    if number not in files:
+                        files[number] = open(self.files[number], 'rb')
+                    config[key].append(load(files[number], (offset, length)))
+                config[key].extend(entry for _, entry in sorted(generated[key].items()))
+        finally:
+            for file in files.values():
+                file.close()
+
+        return config
+
+
+def triples(flat: array) -> Iterator[tuple[int, int, int]]:
+    return zip(flat[::3], flat[1::3], flat[2::3])
+
+
+def load(file: BinaryIO, span: tuple) -> Any:
+    file.seek(span[0])
+    return json.loads(file.read(span[1]))
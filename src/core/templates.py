@@ -0,0 +1,124 @@
+from __future__ import annotations
+from typing import Any, Iterator
+import itertools
+import logging
+import re
+
+from src.core import logs
+from src.schemas.Templates import Template
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+TEMPLATES: str = "Templates"
+RESERVED: tuple[str, ...] = ("name", "parameters", "zip")
+
+# {name}, {name*3+100}, {name:03d}; {{ and }} are literal braces. A string
+# that is just one placeholder without a format spec takes the value's type,
+# so "{n+100}" is an integer and "{n+100:d}" a string.
+PLACEHOLDER = re.compile(
+    r"\{\{|\}\}|\{(\w+)(?:\*(-?\d+))?(?:([+-])(\d+))?(?::([^{}]*))?\}")
+
+
+def expand(config: dict) -> dict:
+    # Copy of the config with the entries of every template appended to the
+    # lists they belong to. Entries are generated one at a time, the
+    # template itself is never copied per instance.
+    if not isinstance(config, dict) or TEMPLATES not in config:
+        return config
+
+    config = dict(config)
+    templates = config.pop(TEMPLATES)
+    if not isinstance(templates, list):
+        raise ValueError(f"'{TEMPLATES}' must be a list")
+
+    lists: dict[str, list] = {}
+    count = 0
+    for raw in templates:
+        template = Template.validate(raw)
+        # validation moves dict values last, parameters keep their order
+        template['parameters'] = {
+            key: template['parameters'][key] for key in raw['parameters']}
+        for key, entry in entries(template):
+            if key not in lists:
+                existing = config.get(key, [])
+                if not isinstance(existing, list):
+                    raise ValueError(f"'{key}' is not a list, template '{
+                                     template['name']}' cannot extend it")
+                lists[key] = list(existing)
+            lists[key].append(entry)
+            count += 1
+    config.update(lists)
+    logger.info(f"Expanded {len(templates)} templates into {count} entries")
+
+    return config
+
+
+def entries(template: dict) -> Iterator[tuple[str, Any]]:
+    name = template['name']
+    for index, values in enumerate(combinations(template)):
+        values.setdefault('index', index)
+        for key, items in template.items():
+            if key in RESERVED:
+                continue
+            for item in items:
+                yield key, substitute(item, values, name)
+
+
+def combinations(template: dict) -> Iterator[dict[str, Any]]:
+    names = list(template['parameters'])
+    lists = [spec if isinstance(spec, list) else list(range(*spec['range']))
+             for spec in template['parameters'].values()]
+
+    if template['zip']:
+        if len({len(values) for values in lists}) > 1:
+            raise ValueError(f"Template '{template['name']}' zips parameters of different lengths: " + ", ".join(
+                f"{name} ({len(values)})" for name, values in zip(names, lists)))
+        rows = zip(*lists)
+    else:
+        rows = itertools.product(*lists)
+
+    for row in rows:
+        yield dict(zip(names, row))
+
+
+def substitute(value: Any, values: dict[str, Any], name: str) -> Any:
+    if isinstance(value, str):
+        return render(value, values, name)
+    if isinstance(value, list):
+        return [substitute(item, values, name) for item in value]
+    if isinstance(value, dict):
+        return {substitute(key, values, name): substitute(item, values, name)
+                for key, item in value.items()}
+
+    return value
+
+
+def render(text: str, values: dict[str, Any], name: str) -> Any:
+    if '{' not in text and '}' not in text:
+        return text
+
+    # a string that is a single placeholder keeps the value's type
+    match = PLACEHOLDER.fullmatch(text)
+    if match and match.group(1):
+        return placeholder(match, values, name)
+
+    return PLACEHOLDER.sub(lambda match: str(placeholder(match, values, name))
+                           if match.group(1) else match.group(0)[0], text)
+
+
+def placeholder(match: re.Match, values: dict[str, Any], name: str) -> Any:
+    parameter, factor, sign, offset, spec = match.groups()
+    if parameter not in values:
+        raise ValueError(f"Template '{name}' has no parameter '{parameter}'")
+    value = values[parameter]
+
+    if factor or offset:
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ValueError(f"Template '{name}' computes with parameter '{
+                             parameter}', which is not an integer")
+        value = value * int(factor or 1) + int(offset or 0) * (-1 if sign == '-' else 1)
+    if spec:
+        value = format(value, spec)
+
+    return value
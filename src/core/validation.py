@@ -0,0 +1,241 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+import logging
+import xml.etree.ElementTree as ET
+
+from src.core import logs
+from src.modules.XML import XMLNS
+
+if TYPE_CHECKING:
+    from src.core.planner import Plan
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+BOOLEAN: frozenset[str] = frozenset(("true", "false"))
+
+
+@dataclass
+class Rule:
+    # What Openness accepts for one element: its child elements, required
+    # attributes, allowed attribute values and allowed text.
+    children: frozenset[str] = frozenset()
+    required: tuple[str, ...] = ()
+    values: dict[str, frozenset[str]] = field(default_factory=dict)
+    text: frozenset[str] | None = None
+
+
+def rule(children: str = '', required: str = '', text: frozenset[str] | None = None,
+         **values: str) -> Rule:
+    return Rule(frozenset(children.split()), tuple(required.split()),
+                {name: frozenset(allowed.split()) for name, allowed in values.items()}, text)
+
+
+# The part of the Interface and FlgNet schemas the generated documents use.
+# Elements of these namespaces without a rule are reported, so a builder
+# writing something new gets a rule (or a schema directory) first.
+RULES: dict[str, dict[str, Rule]] = {
+    XMLNS.INTERFACE.value: {
+        "Sections": rule("Section"),
+        "Section": rule("Member", "Name",
+                        Name="Input Output InOut Static Temp Constant Return None Base"),
+        "Member": rule("AttributeList Comment StartValue Member Sections Subelement",
+                       "Name Datatype",
+                       Remanence="NonRetain Retain SetInIDB Classic",
+                       Accessibility="Public Internal Protected Private",
+                       Informative="true false"),
+        "AttributeList": rule("BooleanAttribute IntegerAttribute RealAttribute StringAttribute"),
+        "BooleanAttribute": rule("", "Name", BOOLEAN, SystemDefined="true false"),
+        "Subelement": rule("AttributeList Comment StartValue", "Path"),
+        "StartValue": rule(),
+    },
+    XMLNS.FLGNET.value: {
+        "FlgNet": rule("Labels Parts Wires"),
+        "Parts": rule("Access Part Call"),
+        "Access": rule("Symbol Constant", "Scope",
+                       Scope="GlobalVariable LocalVariable LiteralConstant TypedConstant "
+                       "GlobalConstant LocalConstant"),
+        "Symbol": rule("Component"),
+        "Component": rule("Access", "Name", AccessModifier="None Array Reference"),
+        "Constant": rule("ConstantType ConstantValue"),
+        "ConstantType": rule(),
+        "ConstantValue": rule(),
+        "Call": rule("CallInfo Negated", "UId"),
+        "CallInfo": rule("Instance Parameter", "Name BlockType", BlockType="FB FC OB SFB SFC"),
+        "Instance": rule("Component", "Scope UId", Scope="GlobalVariable LocalVariable"),
+        "Parameter": rule("", "Name Section Type",
+                          Section="Input Output InOut Static Temp Constant Return"),
+        "Negated": rule("", "Name"),
+        "Wires": rule("Wire"),
+        "Wire": rule("NameCon IdentCon OpenCon", "UId"),
+        "NameCon": rule("", "UId Name"),
+        "IdentCon": rule("", "UId"),
+        "OpenCon": rule("", "UId"),
+    },
+}
+
+
+def check(text: str, schemas: Path | None = None) -> list[str]:
+    # Problems of one generated document, none when TIA Portal should
+    # import it
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError as e:
+        return [f"not well-formed: {e}"]
+
+    errors: list[str] = []
+    for element in root.iter():
+        namespace, _, tag = element.tag[1:].partition('}')
+        if namespace in RULES:
+            errors.extend(check_element(element, namespace, tag))
+        if tag == "FlgNet":
+            errors.extend(check_network(element))
+
+    if schemas is not None:
+        errors.extend(check_schemas(text, schemas))
+
+    return errors
+
+
+def check_element(element: ET.Element, namespace: str, tag: str) -> list[str]:
+    where = f"{tag} {element.get('Name', '')}".rstrip()
+    rule = RULES[namespace].get(tag)
+    if rule is None:
+        return [f"{where}: not an element of {namespace}"]
+
+    errors = [f"{where}: missing {name}" for name in rule.required
+              if name not in element.attrib]
+    errors.extend(f"{where}: {name}={element.get(name)!r} is not one of {sorted(allowed)}"
+                  for name, allowed in rule.values.items()
+                  if name in element.attrib and element.get(name) not in allowed)
+    if rule.text is not None and (element.text or '') not in rule.text:
+        errors.append(f"{where}: text {element.text!r} is not one of {sorted(rule.text)}")
+    for child in element:
+        child_namespace, _, child_tag = child.tag[1:].partition('}')
+        if child_namespace == namespace and child_tag not in rule.children:
+            errors.append(f"{where}: {child_tag} is not allowed here")
+
+    return errors
+
+
+def check_network(flgnet: ET.Element) -> list[str]:
+    # UIds are unique in a network and connections refer to its parts
+    prefix = f"{{{XMLNS.FLGNET.value}}}"
+    errors: list[str] = []
+    uids: set[str] = set()
+    for element in flgnet.iter():
+        if element.tag in (f"{prefix}NameCon", f"{prefix}IdentCon"):
+            continue
+        uid = element.get("UId")
+        if uid is None:
+            continue
+        if uid in uids:
+            errors.append(f"FlgNet: UId {uid} is used twice")
+        uids.add(uid)
+
+    parts = {element.get("UId") for element in flgnet.iterfind(f"{prefix}Parts/*")}
+    for element in flgnet.iterfind(f"{prefix}Wires/{prefix}Wire/*"):
+        if element.tag != f"{prefix}OpenCon" and element.get("UId") not in parts:
+            errors.append(f"Wire: {element.tag.removeprefix(prefix)} refers to UId {
+                          element.get('UId')}, which is no part")
+
+    return errors
+
+
+def schema_files(directory: Path) -> dict[str, Path]:
+    # the schema of every namespace in XMLNS, found by its target namespace
+    wanted = {namespace.value for namespace in XMLNS}
+    found: dict[str, Path] = {}
+    for path in sorted(directory.glob("*.xsd")):
+        for _, element in ET.iterparse(path, events=("start",)):
+            namespace = element.get("targetNamespace")
+            if namespace in wanted:
+                found.setdefault(namespace, path)
+            break
+
+    return found
+
+
+@lru_cache(maxsize=None)
+def compiled(directory: Path) -> dict[str, Any]:
+    # parsing the Openness schemas takes longer than checking a document,
+    # so every process compiles them once
+    if etree is None:
+        raise ValueError(f"Validating against {directory} needs lxml installed")
+    schemas = {namespace: etree.XMLSchema(etree.parse(str(path)))
+               for namespace, path in schema_files(directory).items()}
+    if not schemas:
+        raise ValueError(f"No Openness schemas found in {directory}")
+
+    return schemas
+
+
+def check_schemas(text: str, directory: Path) -> list[str]:
+    schemas = compiled(directory)
+    root = etree.fromstring(text.encode('utf-8'))
+    errors: list[str] = []
+    for element in root.iter():
+        namespace = etree.QName(element).namespace if isinstance(element.tag, str) else None
+        parent = element.getparent()
+        if namespace not in schemas or (parent is not None and etree.QName(parent).namespace == namespace):
+            continue
+        schema = schemas[namespace]
+        if not schema.validate(etree.ElementTree(etree.fromstring(etree.tostring(element)))):
+            errors.extend(f"line {element.sourceline + error.line - 1}: {error.message}"
+                          for error in schema.error_log)
+
+    return errors
+
+
+def check_file(path: Path, schemas: Path | None = None) -> list[str]:
+    return check(path.read_bytes().decode('utf-8'), schemas)
+
+
+def check_plan(plan: Plan, workers: int = 1, schemas: Path | None = None) -> dict[str, list[str]]:
+    # Problems of every XML document of a plan by its key, only those with
+    # any; external sources are SCL
+    sources = {operation.Args['document'] for operation in plan.Operations
+               if operation.Kind == 'import_source'}
+    keys = [key for key in plan.Documents if key not in sources]
+    # documents are read one at a time, by the workers checking them
+    paths = [plan.Documents.path(key) for key in keys]
+    if workers <= 1 or len(paths) < 2:
+        results = [check_file(path, schemas) for path in paths]
+    else:
+        with ProcessPoolExecutor(min(workers, len(paths))) as pool:
+            results = list(pool.map(check_file, paths, [schemas] * len(paths),
+                                    chunksize=max(1, len(paths) // (4 * workers))))
+
+    return {key: errors for key, errors in zip(keys, results) if errors}
+
+
+def validate_plan(plan: Plan, settings: dict[str, Any]):
+    # Raises with every invalid document before TIA Portal is started
+    schemas = settings.get('schema_directory')
+    invalid = check_plan(plan, settings.get('xml_workers', 1),
+                         Path(schemas) if schemas else None)
+    if not invalid:
+        logger.info(f"Validated {len(plan.Documents)} documents")
+        return
+
+    names: dict[str, list[str]] = {}
+    for operation in plan.Operations:
+        if operation.Args.get('document') in invalid:
+            names.setdefault(operation.Args['document'], []).append(
+                f"{operation.Args['name']} (device {operation.Args['device']})")
+    lines = []
+    for key, errors in invalid.items():
+        lines.append(f"{', '.join(dict.fromkeys(names.get(key, [key])))}:")
+        lines.extend(f"  {error}" for error in errors)
+
+    raise ValueError(f"{len(invalid)} of {len(plan.Documents)} generated documents are invalid:\n{
+                     '\n'.join(lines)}")
@@ -0,0 +1,110 @@
+from __future__ import annotations
+from pathlib import Path
+from schema import Schema, Or, Optional
+from typing import Any, Callable
+import logging
+
+from src.core import logs
+from src.schemas import configuration
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+VARIANTS: str = "Variants"
+REMOVE: str = "remove"
+
+# Fields telling entries of a list apart: an overlay entry with the same
+# values replaces the base entry, any other is appended.
+IDENTITIES: dict[str, tuple[str, ...]] = {
+    "devices": ("id",),
+    "Program blocks": ("id",),
+    "Network sources": ("id",),
+    "Instances": ("id",),
+    "Variable sections": ("plc_block_id", "name"),
+    "Wire parameters": ("plc_block_id",),
+    "Wire template": ("block_name",),
+    "PLC tags": ("DeviceID", "Name"),
+    "PLC data types": ("Name",),
+    "Local modules": ("DeviceID", "positionNumber"),
+    "libraries": ("path",),
+}
+
+removals = Schema({Optional(Or(*IDENTITIES)): [Or(str, int, list)]})
+
+
+def identity(key: str, entry: dict) -> tuple:
+    # as strings, so validated values such as library paths compare equal
+    # to what a "remove" list names
+    return tuple(str(entry.get(field)) for field in IDENTITIES[key])
+
+
+def apply(base: dict, overlay: dict, directory: Path | None = None) -> dict:
+    # Config of one variant: the validated base with the overlay's entries
+    # merged in. Entries the overlay leaves alone are the base's own
+    # objects, which is how translate recognises what it can reuse.
+    changes = configuration.validate(overlay, directory)
+    removed = removals.validate(overlay.get(REMOVE, {}))
+
+    config = dict(base)
+    for key, value in changes.items():
+        if isinstance(value, list):
+            if key in IDENTITIES:
+                config[key] = replace(key, base.get(key, []), value)
+            else:
+                config[key] = base.get(key, []) + value
+        elif key in overlay:
+            config[key] = value
+
+    for key, identities in removed.items():
+        identities = {tuple(map(str, value)) if isinstance(value, list) else (str(value),)
+                      for value in identities}
+        config[key] = [entry for entry in config.get(key, [])
+                       if identity(key, entry) not in identities]
+    config[VARIANTS] = {}
+
+    return config
+
+
+def replace(key: str, entries: list[dict], changes: list[dict]) -> list[dict]:
+    entries = list(entries)
+    positions = {identity(key, entry): index
+                 for index, entry in enumerate(entries)}
+    for entry in changes:
+        index = positions.get(identity(key, entry))
+        if index is None:
+            positions[identity(key, entry)] = len(entries)
+            entries.append(entry)
+        else:
+            entries[index] = entry
+
+    return entries
+
+
+def configs(config: dict, directory: Path | None = None) -> dict[str, dict]:
+    return {name: apply(config, overlay, directory)
+            for name, overlay in config.get(VARIANTS, {}).items()}
+
+
+class Shared:
+    # Objects built by translate, keyed by the identity of the config
+    # entries they were made from, for every variant to reuse. The configs
+    # are kept alive so those ids are never handed to other entries.
+
+    def __init__(self):
+        self.objects: dict[tuple, Any] = {}
+        self.configs: list[dict] = []
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def keep(self, config: dict):
+        if not any(kept is config for kept in self.configs):
+            self.configs.append(config)
+
+    def get(self, key: tuple, build: Callable[[], Any]) -> Any:
+        if key in self.objects:
+            self.hits += 1
+            return self.objects[key]
+        self.misses += 1
+        value = self.objects[key] = build()
+
+        return value
@@ -0,0 +1,149 @@
+from __future__ import annotations
+from collections.abc import Iterator, MutableMapping
+from pathlib import Path
+from typing import Any
+import logging
+import re
+import shutil
+import tempfile
+import weakref
+
+from src.core import logs
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+PREFIX: str = 'tia-run-'
+DOCUMENTS_PREFIX: str = 'tia-documents-'
+# characters Windows does not allow in file names
+UNSAFE = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+
+
+class Workspace:
+    # One directory per run for the files handed to TIA Portal, laid out as
+    # folders/name.xml, e.g. project/device/group/Main.xml. mkdtemp gives
+    # every run a directory of its own, so runs started at the same time
+    # never share files. Files stay until close removes the directory in
+    # one go, or are all kept with `keep`.
+
+    def __init__(self, root: Path | None = None, keep: bool = False):
+        if root is not None:
+            root.mkdir(parents=True, exist_ok=True)
+        self.directory: Path = Path(tempfile.mkdtemp(prefix=PREFIX, dir=root))
+        self.keep: bool = keep
+        self.files: int = 0
+
+    @classmethod
+    def from_settings(cls, settings: dict[str, Any]) -> Workspace:
+        # scratch_directory may point at a RAM disk
+        root = settings.get('scratch_directory')
+        return cls(Path(root) if root else None, settings.get('keep_scratch', False))
+
+    def path(self, name: str, *folders: Any, suffix: str = '.xml') -> Path:
+        # folders may be paths such as a block group "/Motors/Drives"
+        directory = self.directory
+        for folder in folders:
+            for part in str(folder).replace('\\', '/').split('/'):
+                if part:
+                    directory /= safe(part)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        # the same name again, such as a block imported into two projects
+        path = directory / f"{safe(name)}{suffix}"
+        number = 1
+        while path.exists():
+            path = directory / f"{safe(name)}_{number}{suffix}"
+            number += 1
+        self.files += 1
+
+        return path
+
+    def write(self, text: str, name: str, *folders: Any, suffix: str = '.xml') -> Path:
+        path = self.path(name, *folders, suffix=suffix)
+        path.write_bytes(text.encode('utf-8'))
+
+        return path
+
+    def close(self):
+        if self.keep:
+            logger.info(f"Kept {self.files} scratch files in {self.directory}")
+            return
+        shutil.rmtree(self.directory, ignore_errors=True)
+        logger.debug(f"Removed {self.files} scratch files in {self.directory}")
+
+    def __enter__(self) -> Workspace:
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+class DocumentStore(MutableMapping[str, str]):
+    # Texts of the documents of a plan by key, each in a file instead of in
+    # memory, so a plan of many blocks only holds their keys. The files are
+    # imported from where they are, so a document is written once per run.
+    # New texts go to a directory of the store's own, removed with the last
+    # store using it unless `keep`; files of a saved plan are read where
+    # they are.
+
+    def __init__(self, root: Path | None = None, files: dict[str, Path] | None = None,
+                 keep: bool = False):
+        self.root: Path | None = root
+        self.files: dict[str, Path] = dict(files or {})
+        self.keep: bool = keep
+        self.directory: Path | None = None
+        # stores whose files this one reads, kept until it goes
+        self.owners: list[DocumentStore] = []
+
+    @classmethod
+    def from_settings(cls, settings: dict[str, Any]) -> DocumentStore:
+        # the scratch directory of a run, see Workspace.from_settings
+        root = settings.get('scratch_directory')
+        return cls(Path(root) if root else None, keep=settings.get('keep_scratch', False))
+
+    def path(self, key: str) -> Path:
+        return self.files[key]
+
+    def only(self, keys: set[str]) -> DocumentStore:
+        # the documents of `keys`, sharing their files
+        store = DocumentStore(self.root, {key: path for key, path in self.files.items() if key in keys},
+                              self.keep)
+        store.owners.append(self)
+
+        return store
+
+    def add(self, key: str, text: str, suffix: str = '.xml') -> Path:
+        # TIA Portal tells documents apart by suffix, e.g. .scl for sources
+        if self.directory is None:
+            if self.root is not None:
+                self.root.mkdir(parents=True, exist_ok=True)
+            self.directory = Path(tempfile.mkdtemp(prefix=DOCUMENTS_PREFIX, dir=self.root))
+            if self.keep:
+                logger.info(f"Keeping the documents of the plan in {self.directory}")
+            else:
+                weakref.finalize(self, shutil.rmtree, self.directory, True)
+        path = self.directory / f"{safe(key)}{suffix}"
+        path.write_bytes(text.encode('utf-8'))
+        self.files[key] = path
+
+        return path
+
+    def __getitem__(self, key: str) -> str:
+        return self.files[key].read_bytes().decode('utf-8')
+
+    def __setitem__(self, key: str, text: str):
+        self.add(key, text, self.files[key].suffix if key in self.files else '.xml')
+
+    def __delitem__(self, key: str):
+        del self.files[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+
+def safe(part: str) -> str:
+    part = UNSAFE.sub('_', part).strip()
+    return part if part not in ('', '.', '..') else '_'
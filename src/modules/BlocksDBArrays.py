@@ -0,0 +1,212 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable
+import csv
+import logging
+import math
+import re
+
+from src.core import logs
+from src.modules.ProgramBlocks import VariableArray
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+INTEGERS: dict[str, tuple[int, int]] = {
+    "SInt": (-2**7, 2**7 - 1),
+    "Int": (-2**15, 2**15 - 1),
+    "DInt": (-2**31, 2**31 - 1),
+    "LInt": (-2**63, 2**63 - 1),
+    "USInt": (0, 2**8 - 1),
+    "UInt": (0, 2**16 - 1),
+    "UDInt": (0, 2**32 - 1),
+    "ULInt": (0, 2**64 - 1),
+}
+BITS: dict[str, int] = {"Byte": 8, "Word": 16, "DWord": 32, "LWord": 64}
+REALS: dict[str, float] = {"Real": 3.4028235e38, "LReal": 1.7976931348623157e308}
+# elementary types whose start values are written as TIA Portal literals,
+# e.g. T#5s or D#2024-01-01; they are passed on as given
+LITERALS: frozenset[str] = frozenset((
+    "Time", "LTime", "S5Time", "Date", "Time_Of_Day", "TOD", "LTime_Of_Day", "LTOD",
+    "Date_And_Time", "DT", "LDT", "DTL",
+))
+STRING = re.compile(r'^(W?String)(?:\[(\d+)\])?$')
+CONTROL = re.compile(r'[\x00-\x1f]')
+
+
+def load_values(source: list | dict, directory: Path = Path()) -> list:
+    # The raw start values of an array config, in element order
+    if isinstance(source, list):
+        return source
+    if "fill" in source:
+        return [source["fill"]] * source["count"]
+    if "npy" in source:
+        if numpy is None:
+            raise ValueError(f"Reading {source['npy']} needs numpy installed")
+        return numpy.load(directory / source["npy"], allow_pickle=False).ravel().tolist()
+
+    path = directory / source["csv"]
+    column = source["column"]
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        rows = csv.reader(file, delimiter=source["delimiter"])
+        if source["header"]:
+            header = next(rows, [])
+            if isinstance(column, str):
+                if column not in header:
+                    raise ValueError(f"{path} has no column {column!r}, only {header}")
+                column = header.index(column)
+        elif isinstance(column, str):
+            raise ValueError(f"Column {column!r} of {path} needs a header row")
+        try:
+            return [row[column] for row in rows if row]
+        except IndexError:
+            raise ValueError(f"{path} has rows with less than {column + 1} columns")
+
+
+def boolean(value: Any) -> str:
+    if isinstance(value, str):
+        value = {"true": True, "false": False, "1": True, "0": False}[value.strip().lower()]
+    if value not in (0, 1):
+        raise ValueError("not a Bool")
+    return "true" if value else "false"
+
+
+def integer(value: Any) -> int:
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError("not a whole number")
+        return int(value)
+    if isinstance(value, str) and value.strip().upper().startswith("16#"):
+        return int(value.strip()[3:], 16)
+    return int(value)
+
+
+def real(value: Any) -> str:
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError("not a finite number")
+    text = repr(number)
+    mantissa, e, exponent = text.partition('e')
+    if '.' not in mantissa:
+        text = f"{mantissa}.0{e}{exponent}"
+    return text
+
+
+def quoted(value: Any) -> str:
+    text = str(value)
+    if CONTROL.search(text):
+        raise ValueError("control characters are not allowed")
+    return "'" + text.replace("$", "$$").replace("'", "$'") + "'"
+
+
+def formatter(datatype: str) -> Callable[[list], list[str]]:
+    # A function formatting a whole column of start values of `datatype`
+    # the way TIA Portal writes them. Range checks run once over the column.
+    if datatype == "Bool":
+        return lambda values: list(map(boolean, values))
+
+    if datatype in INTEGERS:
+        low, high = INTEGERS[datatype]
+
+        def integers(values: list) -> list[str]:
+            numbers = list(map(integer, values))
+            if numbers and (min(numbers) < low or max(numbers) > high):
+                bad = next(number for number in numbers if not low <= number <= high)
+                raise ValueError(f"{bad} is outside {low}..{high}")
+            return list(map(str, numbers))
+        return integers
+
+    if datatype in BITS:
+        high = 2**BITS[datatype] - 1
+        digits = BITS[datatype] // 4
+
+        def bits(values: list) -> list[str]:
+            numbers = list(map(integer, values))
+            if numbers and (min(numbers) < 0 or max(numbers) > high):
+                bad = next(number for number in numbers if not 0 <= number <= high)
+                raise ValueError(f"{bad} does not fit in {BITS[datatype]} bits")
+            return [f"16#{number:0{digits}X}" for number in numbers]
+        return bits
+
+    if datatype in REALS:
+        limit = REALS[datatype]
+
+        def reals(values: list) -> list[str]:
+            texts = list(map(real, values))
+            numbers = list(map(float, texts))
+            if numbers and max(map(abs, numbers)) > limit:
+                raise ValueError(f"{max(numbers, key=abs)} is outside the range of {datatype}")
+            return texts
+        return reals
+
+    if datatype in ("Char", "WChar"):
+        def chars(values: list) -> list[str]:
+            if any(len(str(value)) != 1 for value in values):
+                raise ValueError("not a single character")
+            texts = list(map(quoted, values))
+            return texts if datatype == "Char" else [f"WCHAR#{text}" for text in texts]
+        return chars
+
+    if match := STRING.match(datatype):
+        kind, length = match.group(1), int(match.group(2) or 254)
+
+        def strings(values: list) -> list[str]:
+            texts = list(map(str, values))
+            if texts and max(map(len, texts)) > length:
+                raise ValueError(f"{max(texts, key=len)!r} is longer than {length} characters")
+            texts = list(map(quoted, texts))
+            return texts if kind == "String" else [f"WSTRING#{text}" for text in texts]
+        return strings
+
+    if datatype in LITERALS:
+        def literals(values: list) -> list[str]:
+            texts = [str(value).strip() for value in values]
+            if not all(texts) or any(map(CONTROL.search, texts)):
+                raise ValueError("empty or not printable")
+            return texts
+        return literals
+
+    raise ValueError(f"Arrays of {datatype} can not have bulk start values, "
+                     "only arrays of elementary types")
+
+
+def format_values(datatype: str, values: list) -> list[str]:
+    convert = formatter(datatype)
+    try:
+        return convert(values)
+    except (ValueError, TypeError, KeyError, OverflowError) as e:
+        # find the element, the whole column was converted at once
+        for index, value in enumerate(values):
+            try:
+                convert([value])
+            except (ValueError, TypeError, KeyError, OverflowError) as error:
+                raise ValueError(f"Start value {index} ({value!r}) is not a valid {
+                                 datatype}: {error}") from None
+        raise ValueError(f"Start values are not valid {datatype}: {e}") from None
+
+
+def variable_array(config: dict, directory: Path = Path()) -> VariableArray:
+    # A bulk array member from its config, with every start value formatted
+    values = format_values(config['datatype'], load_values(config['start_values'], directory))
+    length = config.get('length', len(values))
+    if not length:
+        raise ValueError(f"Array {config['name']} has no elements")
+    if len(values) > length:
+        raise ValueError(f"Array {config['name']} has {length} elements but {
+                         len(values)} start values")
+
+    lower = config['lower_bound']
+    logger.debug(f"Formatted {len(values)} start values of {config['name']}")
+    return VariableArray(
+        Name=config['name'],
+        Datatype=f"Array[{lower}..{lower + length - 1}] of {config['datatype']}",
+        Retain=config['retain'],
+        Attributes=config['attributes'],
+        Lower=lower,
+        StartValues=values,
+    )
@@ -7,6 +7,7 @@ import logging
 from src.core import logs
 
 from src.modules.BlocksDatabase import Database
+import src.modules.Identities as Identities
 
 logs.setup(logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -45,5 +46,6 @@ def create(plc_software: Siemens.Engineering.HW.Software,
 
     blockgroup = locate_blockgroup(
         plc_software, data.BlockGroupPath, mkdir=True)
-    blockgroup.Blocks.CreateInstanceDB(
+    instance_db = blockgroup.Blocks.CreateInstanceDB(
         db_name, True, data.Number, data.InstanceOfName)
+    Identities.of(plc_software).add_block(data.BlockGroupPath, db_name, instance_db)
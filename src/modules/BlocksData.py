@@ -4,10 +4,12 @@ import logging
 import xml.etree.ElementTree as ET
 
 from src.core import logs
+from src.core.workspace import Workspace
 from src.modules.BlocksDatabase import Database
 from src.modules.ProgramBlocks import VariableSection
 from src.modules.ProgramBlocks import Base, PlcEnum
 from src.modules.ProgramBlocks import generate
+from src.modules.XML import DocumentCache, Streamed, Writer
 
 logs.setup(logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -24,8 +26,7 @@ class XML(Base):
     DOCUMENT = PlcEnum.GlobalDB.value
 
     def __init__(self, data: DataBlock):
-        data.Number = max(1, min(data.Number, 599999))
-        super().__init__(data.Name, data.Number, "DB", data.VariableSections)
+        super().__init__(data.Name, clamp_number(data.Number), "DB", data.VariableSections)
 
         for section in data.VariableSections:
             match section.Name:
@@ -46,20 +47,49 @@ class XML(Base):
 
         return
 
+    @classmethod
+    def _number(cls, data: DataBlock) -> int:
+        return clamp_number(data.Number)
+
+    @classmethod
+    def _sections(cls, data: DataBlock) -> list[str]:
+        return [section.Name for section in data.VariableSections
+                if section.Name in ("Static", "Input", "InOut", "Output")]
+
+    @classmethod
+    def _variables(cls, data: DataBlock) -> list[VariableSection]:
+        return data.VariableSections
+
+    @classmethod
+    def _language(cls, data: DataBlock) -> str:
+        return "DB"
+
+    @classmethod
+    def _stream_attributes(cls, writer: Writer, data: DataBlock):
+        for attrib in data.Attributes:
+            writer.element(attrib, text=data.Attributes[attrib])
+
+
+def clamp_number(number: int) -> int:
+    return max(1, min(number, 599999))
+
 
 def create(TIA: Siemens.Engineering.TiaPortal,
            imports: Imports,
            plc_software: Siemens.Engineering.HW.Software,
-           data: DataBlock
+           data: DataBlock,
+           documents: DocumentCache | None = None,
+           workspace: Workspace | None = None
            ):
     logger.info(f"Generation of Data Block {data.Name} started")
 
     if not data.Name:
         return
 
-    xml = XML(data)
+    xml = documents.render(XML, data) if documents else Streamed(XML, data)
     generate(imports=imports,
              TIA=TIA,
              plc_software=plc_software,
              data=data,
-             xml=xml)
+             xml=xml,
+             workspace=workspace)
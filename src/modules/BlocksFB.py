@@ -5,10 +5,12 @@ import xml.etree.ElementTree as ET
 import logging
 
 from src.core import logs
+from src.core.workspace import Workspace
 
 from src.modules.BlocksDBInstances import InstanceDB
 from src.modules.ProgramBlocks import generate
-from src.modules.ProgramBlocks import Base, PlcEnum, LibraryData, ProgramBlock, BlockCompileUnit, VariableStruct, generate_boolean_attributes, WireParameter
+from src.modules.ProgramBlocks import Base, PlcEnum, LibraryData, ProgramBlock, render_compile_unit, VariableSection, VariableStruct, VariableArray, generate_boolean_attributes, stream_member_content, WireParameter
+from src.modules.XML import DocumentCache, Streamed, Writer, escape_attrib
 
 logs.setup(logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -27,6 +29,7 @@ class FunctionBlock(ProgramBlock):
 
 class XML(Base):
     DOCUMENT = PlcEnum.FunctionBlock.value
+    SECTIONS = ("Input", "Output", "InOut", "Static", "Temp", "Constant")
 
     def __init__(self, data: FunctionBlock) -> None:
         super().__init__(data.Name, data.Number, data.ProgrammingLanguage, data.Variables)
@@ -42,9 +45,8 @@ class XML(Base):
 
         id = 3
         for network_source in data.NetworkSources:
-            CompileUnit = BlockCompileUnit(
-                data.ProgrammingLanguage, network_source, id).root
-            self.ObjectList.append(CompileUnit)
+            self.append_fragment(self.ObjectList, render_compile_unit(
+                data.ProgrammingLanguage, network_source, id))
             id += 5
 
         return
@@ -66,23 +68,43 @@ class XML(Base):
             bool_attribs = generate_boolean_attributes(struct)
             if len(bool_attribs):
                 Member.append(bool_attribs)
+            if isinstance(struct, VariableArray) and struct.StartValues:
+                self.append_fragment(Member, struct.subelements())
 
         return
 
+    @classmethod
+    def _variables(cls, data: FunctionBlock) -> list[VariableSection]:
+        return data.Variables
+
+    @classmethod
+    def _compile_units(cls, data: FunctionBlock) -> list[str]:
+        return [render_compile_unit(data.ProgrammingLanguage, network_source, 3 + 5 * index)
+                for index, network_source in enumerate(data.NetworkSources)]
+
+    @classmethod
+    def _stream_member(cls, writer: Writer, struct: VariableStruct):
+        writer.write(f'<Member Name="{escape_attrib(struct.Name)}" Datatype="{
+                     escape_attrib(struct.Datatype)}" Accessibility="Public"')
+        stream_member_content(writer, struct)
+
 
 def create(TIA: Siemens.Engineering.TiaPortal,
            imports: Imports,
            plc_software: Siemens.Engineering.HW.Software,
-           data: FunctionBlock
+           data: FunctionBlock,
+           documents: DocumentCache | None = None,
+           workspace: Workspace | None = None
            ):
     logger.info(f"Generation of Function Block {data.Name} started")
 
     if not data.Name:
         return
 
-    xml = XML(data)
+    xml = documents.render(XML, data) if documents else Streamed(XML, data)
     generate(imports=imports,
              TIA=TIA,
              plc_software=plc_software,
              data=data,
-             xml=xml)
+             xml=xml,
+             workspace=workspace)
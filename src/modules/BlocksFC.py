@@ -4,9 +4,11 @@ from pathlib import PurePosixPath
 import logging
 
 from src.core import logs
+from src.core.workspace import Workspace
 
 from src.modules.ProgramBlocks import generate
 from src.modules.ProgramBlocks import Base, ProgramBlock, WireParameter
+from src.modules.XML import DocumentCache, Streamed
 
 logs.setup(logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -23,6 +25,8 @@ class Function(ProgramBlock):
 
 class XML(Base):
     DOCUMENT = "SW.Blocks.FC"
+    SECTIONS = ("Input", "Output", "InOut", "Temp", "Constant", "Return")
+    FIXED = {"Return": '<Member Name="Ret_Val" Datatype="Void" />'}
 
     def __init__(self, data: ProgramBlock) -> None:
         super().__init__(data.Name, data.Number, data.ProgrammingLanguage, data.Variables)
@@ -38,16 +42,19 @@ class XML(Base):
 def create(TIA: Siemens.Engineering.TiaPortal,
            imports: Imports,
            plc_software: Siemens.Engineering.HW.Software,
-           data: Function
+           data: Function,
+           documents: DocumentCache | None = None,
+           workspace: Workspace | None = None
            ):
     logger.info(f"Generation of Function {data.Name} started")
 
     if not data.Name:
         return
 
-    xml = XML(data)
+    xml = documents.render(XML, data) if documents else Streamed(XML, data)
     generate(imports=imports,
              TIA=TIA,
              plc_software=plc_software,
              data=data,
-             xml=xml)
+             xml=xml,
+             workspace=workspace)
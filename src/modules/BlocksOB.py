@@ -6,8 +6,10 @@ import xml.etree.ElementTree as ET
 import logging
 
 from src.core import logs
+from src.core.workspace import Workspace
 from src.modules.ProgramBlocks import generate
-from src.modules.ProgramBlocks import Base, PlcEnum, LibraryData, ProgramBlock, NetworkSource, BlockCompileUnit, WireParameter
+from src.modules.ProgramBlocks import Base, PlcEnum, LibraryData, ProgramBlock, NetworkSource, render_compile_unit, WireParameter
+from src.modules.XML import DocumentCache, Streamed, Writer
 
 logs.setup(logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -31,12 +33,13 @@ class OrganizationBlock(ProgramBlock):
 
 class XML(Base):
     DOCUMENT = PlcEnum.OrganizationBlock.value
+    SECTIONS = ("Input", "Temp", "Constant")
+    FIXED = {"Input": '<Member Name="Initial_Call" Datatype="Bool" Informative="true" />'
+             '<Member Name="Remanence" Datatype="Bool" Informative="true" />'}
 
     def __init__(self, data: OrganizationBlock) -> None:
         # EventClasses have different number rules
-        data.Number = max(123, min(data.Number, 32767)
-                          ) if data.Number != 1 else 1
-        super().__init__(data.Name, data.Number, data.ProgrammingLanguage, data.Variables)
+        super().__init__(data.Name, clamp_number(data.Number), data.ProgrammingLanguage, data.Variables)
 
         # default is ProgramCycle
         ET.SubElement(self.AttributeList,
@@ -57,25 +60,44 @@ class XML(Base):
 
         block_id = 3
         for network_source in data.NetworkSources:
-            CompileUnit = BlockCompileUnit(
-                data.ProgrammingLanguage, network_source, block_id).root
-            self.ObjectList.append(CompileUnit)
+            self.append_fragment(self.ObjectList, render_compile_unit(
+                data.ProgrammingLanguage, network_source, block_id))
             block_id += 5
 
+    @classmethod
+    def _number(cls, data: OrganizationBlock) -> int:
+        return clamp_number(data.Number)
+
+    @classmethod
+    def _stream_attributes(cls, writer: Writer, data: OrganizationBlock):
+        writer.element("SecondaryType", text=data.EventClass.value)
+
+    @classmethod
+    def _compile_units(cls, data: OrganizationBlock) -> list[str]:
+        return [render_compile_unit(data.ProgrammingLanguage, network_source, 3 + 5 * index)
+                for index, network_source in enumerate(data.NetworkSources)]
+
+
+def clamp_number(number: int) -> int:
+    return max(123, min(number, 32767)) if number != 1 else 1
+
 
 def create(imports: Imports,
            TIA: Siemens.Engineering.TiaPortal,
            plc_software: Siemens.Engineering.HW.Software,
-           data: OrganizationBlock
+           data: OrganizationBlock,
+           documents: DocumentCache | None = None,
+           workspace: Workspace | None = None
            ):
     logger.info(f"Generation of Organization Block {data.Name} started")
 
     if not data.Name:
         return
 
-    xml = XML(data)
+    xml = documents.render(XML, data) if documents else Streamed(XML, data)
     generate(imports=imports,
              TIA=TIA,
              plc_software=plc_software,
              data=data,
-             xml=xml)
+             xml=xml,
+             workspace=workspace)
@@ -0,0 +1,260 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+import logging
+import re
+
+from src.core import logs
+from src.modules.ProgramBlocks import (AccessValue, NetworkSource, PlcEnum, ProgramBlock, VariableArray,
+                                       VariableSection, VariableStruct)
+import src.modules.BlocksDBInstances as BlocksDBInstances
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# blocks that can be written as SCL source
+KEYWORDS: dict[PlcEnum, str] = {
+    PlcEnum.FunctionBlock: "FUNCTION_BLOCK",
+    PlcEnum.Function: "FUNCTION",
+}
+SECTIONS: dict[str, str] = {
+    "Input": "VAR_INPUT",
+    "Output": "VAR_OUTPUT",
+    "InOut": "VAR_IN_OUT",
+    "Static": "VAR",
+    "Temp": "VAR_TEMP",
+    "Constant": "VAR CONSTANT",
+}
+IDENTIFIER = re.compile(r'[A-Za-z_]\w*')
+UNSAFE = re.compile(r'\W')
+
+MAX_BLOCKS: int = 500
+MAX_BYTES: int = 4 * 2**20
+
+
+@dataclass
+class Source:
+    # SCL blocks written to one external source, callees first
+    Name: str
+    Folder: PurePosixPath
+    Blocks: list[str] = field(default_factory=list)
+    Texts: list[str] = field(default_factory=list)
+    Size: int = 0
+
+    def text(self) -> str:
+        return '\n'.join(self.Texts)
+
+
+def group(blocks: list[ProgramBlock],
+          by_folder: bool = True,
+          max_blocks: int = MAX_BLOCKS,
+          max_bytes: int = MAX_BYTES,
+          instances: dict[str, list[BlocksDBInstances.InstanceDB]] | None = None) -> list[Source]:
+    # Sources of at most `max_blocks` blocks and `max_bytes` each, one
+    # series per block group folder with `by_folder`. The single `instances`
+    # of a block follow it in its source, so blocks calling them are
+    # generated after them.
+    instances = instances or {}
+    sources: list[Source] = []
+    current: dict[PurePosixPath, Source] = {}
+    for block in ordered(blocks):
+        names = [block.Name, *(instance_name(instance) for instance in instances.get(block.Name, []))]
+        text = block_source(block) + ''.join(map(instance_source, instances.get(block.Name, [])))
+        size = len(text.encode('utf-8'))
+        folder = PurePosixPath(block.BlockGroupPath) if by_folder else PurePosixPath('/')
+        source = current.get(folder)
+        if source is not None and (len(source.Blocks) + len(names) > max_blocks
+                                   or source.Blocks and source.Size + size > max_bytes):
+            source = None
+        if source is None:
+            number = sum(1 for other in sources if other.Folder == folder) + 1
+            source = Source(f"{UNSAFE.sub('_', '_'.join(folder.parts[1:])) or 'Blocks'}_{number}", folder)
+            sources.append(source)
+            current[folder] = source
+        source.Blocks.extend(names)
+        source.Texts.append(text)
+        source.Size += size
+
+    return sources
+
+
+def ordered(blocks: list[ProgramBlock]) -> list[ProgramBlock]:
+    # a block is generated after the blocks it calls
+    by_name = {block.Name: block for block in blocks}
+    seen: set[str] = set()
+    result: list[ProgramBlock] = []
+
+    def visit(block: ProgramBlock):
+        if block.Name in seen:
+            return
+        seen.add(block.Name)
+        for network_source in getattr(block, 'NetworkSources', []):
+            for called in network_source.PlcBlocks:
+                if called.Name in by_name:
+                    visit(by_name[called.Name])
+        result.append(block)
+
+    for block in blocks:
+        visit(block)
+
+    return result
+
+
+def block_source(block: ProgramBlock) -> str:
+    keyword = KEYWORDS[block.PlcType]
+    lines = [f'{keyword} "{block.Name}"' + (" : Void" if block.PlcType == PlcEnum.Function else ''),
+             "{ S7_Optimized_Access := 'TRUE' }",
+             "VERSION : 0.1"]
+    for section in block.Variables:
+        lines.extend(declarations(section))
+    lines.append("")
+    lines.append("BEGIN")
+    for number, network_source in enumerate(getattr(block, 'NetworkSources', []), 1):
+        lines.extend(region(network_source, number))
+    lines.append(f"END_{keyword}")
+    lines.append("")
+
+    return '\n'.join(lines)
+
+
+def instance_name(instance: BlocksDBInstances.InstanceDB) -> str:
+    return instance.Name or f"{instance.InstanceOfName}_DB"
+
+
+def instance_source(instance: BlocksDBInstances.InstanceDB) -> str:
+    # TIA Portal numbers the DB, as it does the blocks of a source
+    return '\n'.join([f'DATA_BLOCK "{instance_name(instance)}"',
+                      "{ S7_Optimized_Access := 'TRUE' }",
+                      "VERSION : 0.1",
+                      "NON_RETAIN",
+                      f'"{instance.InstanceOfName}"',
+                      "",
+                      "BEGIN",
+                      "",
+                      "END_DATA_BLOCK",
+                      ""])
+
+
+def declarations(section: VariableSection) -> list[str]:
+    # the return value is the Void of the function's head
+    if section.Name == "Return":
+        return []
+    if section.Name not in SECTIONS:
+        raise ValueError(f"Section {section.Name} can not be declared in SCL")
+    lines = [f"   {SECTIONS[section.Name]} "]
+    lines.extend(f"      {declaration(struct)}" for struct in section.Structs)
+    lines.append("   END_VAR")
+
+    return lines
+
+
+def declaration(struct: VariableStruct | VariableArray) -> str:
+    text = scl_name(struct.Name)
+    if struct.Attributes:
+        text += " {" + '; '.join(
+            f"{attribute} := '{'True' if str(value).lower() == 'true' else 'False'}'"
+            for attribute, value in struct.Attributes.items()) + "}"
+    text += f" : {struct.Datatype}"
+    if isinstance(struct, VariableArray) and struct.StartValues:
+        text += f" := [{', '.join(struct.StartValues)}]"
+    elif struct.StartValue != '':
+        text += f" := {struct.StartValue}"
+
+    return text + ";"
+
+
+def region(network_source: NetworkSource, number: int) -> list[str]:
+    title = ' '.join(network_source.Title.split()) or f"Network {number}"
+    lines = [f"   REGION {title}"]
+    lines.extend(f"      // {line}".rstrip() for line in network_source.Comment.splitlines())
+    for called in network_source.PlcBlocks:
+        lines.extend(f"      {line}" for line in call(called))
+    lines.append("   END_REGION")
+    lines.append("")
+
+    return lines
+
+
+def call(block: ProgramBlock) -> list[str]:
+    # `"Motor_DB"(Start := "IO".Start, Running => #Running);`, only done
+    # while its en is true
+    if block.PlcType == PlcEnum.Function:
+        target = f'"{block.Name}"'
+    else:
+        instance = block.Database.Name or f"{block.Name}_DB"
+        if block.Database.CallOption == BlocksDBInstances.CallOptionEnum.Multi:
+            target = f"#{scl_name(instance)}"
+        else:
+            target = f'"{instance}"'
+
+    en = None
+    arguments = []
+    for parameter in block.Parameters:
+        if parameter.Name == "en":
+            en = parameter.Value
+            continue
+        if not parameter.Value.Scope:
+            continue
+        value = access(parameter.Value)
+        if parameter.Section == "Output":
+            arguments.append(f"{scl_name(parameter.Name)} => {value}")
+        else:
+            arguments.append(f"{scl_name(parameter.Name)} := {'NOT ' if parameter.Negated else ''}{value}")
+
+    indent = ' ' * (len(target) + 1)
+    text = f"{target}({f',\n{indent}'.join(arguments)});".split('\n')
+    if en is None or not en.Scope or (not en.Components and en.Constant.lower() == 'true'):
+        return text
+
+    return [f"IF {access(en)} THEN", *(f"   {line}" for line in text), "END_IF;"]
+
+
+def access(value: AccessValue) -> str:
+    # a wire value as SCL writes it: "DB".Motors[1, #i].Speed, #Local, 15
+    if not value.Components:
+        return value.Constant
+
+    parts = []
+    for position, component in enumerate(value.Components):
+        if position == 0 and value.Scope == "GlobalVariable":
+            part = f'"{component.Name}"'
+        elif position == 0:
+            part = f"#{scl_name(component.Name)}"
+        else:
+            part = scl_name(component.Name)
+        if component.Indexes:
+            part += f"[{', '.join(access(index) for index in component.Indexes)}]"
+        parts.append(part)
+
+    return '.'.join(parts)
+
+
+def scl_name(text: str) -> str:
+    return text if IDENTIFIER.fullmatch(text) else f'"{text}"'
+
+
+def import_source(imports: Imports,
+                  plc_software: Siemens.Engineering.HW.Software,
+                  path: Path,
+                  name: str,
+                  folder: PurePosixPath):
+    # One Openness round trip for every block of the source: the source
+    # replaces one of the same name, and its blocks replace existing ones.
+    # TIA Portal generates them in the program blocks folder.
+    SE: Siemens.Engineering = imports.DLL
+
+    group = plc_software.ExternalSourceGroup
+    for part in PurePosixPath(folder).parts[1:]:
+        group = group.Groups.Find(part) or group.Groups.Create(part)
+    existing = group.ExternalSources.Find(f"{name}.scl")
+    if existing is not None:
+        existing.Delete()
+
+    logging.info(f"Generating blocks of external source {name} from {path}")
+    source = group.ExternalSources.CreateFromFile(f"{name}.scl", path.absolute().as_posix())
+    try:
+        # keep the blocks of a source with errors, as imported XML does
+        source.GenerateBlocksFromSource(SE.SW.ExternalSources.GenerateBlockOption.KeepOnError)
+    except AttributeError:
+        source.GenerateBlocksFromSource()
+    logging.info(f"Finished: generated blocks of external source {name}")
@@ -0,0 +1,144 @@
+from __future__ import annotations
+from pathlib import PurePosixPath
+from typing import Any, Callable
+import logging
+
+from src.core import logs
+
+logs.setup(logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+ROOT: PurePosixPath = PurePosixPath('/')
+
+
+class IdentityMap:
+    # Block groups, blocks and tag tables of one PLC software, each
+    # found through Openness once. Objects that were not found are kept as
+    # None, objects the tool creates are added as they are created. Nothing
+    # else is expected to change the software while the map is used.
+
+    def __init__(self, plc_software: Siemens.Engineering.HW.Software):
+        self.plc_software: Siemens.Engineering.HW.Software = plc_software
+        self.groups: dict[PurePosixPath, Any] = {ROOT: plc_software.BlockGroup}
+        self.blocks: dict[str, dict[PurePosixPath, Any]] = {}
+        self.tables: dict[str, Any] = {}
+        # groups this map created, which start empty
+        self.created: set[PurePosixPath] = set()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.calls: int = 0
+
+    def group(self, path: PurePosixPath | str, mkdir: bool = False) -> Siemens.Engineering.SW.Blocks.PlcBlockGroup | None:
+        path = ROOT / path
+        if path in self.groups:
+            self.hits += 1
+            if self.groups[path] is not None or not mkdir:
+                return self.groups[path]
+        else:
+            self.misses += 1
+
+        parent = self.group(path.parent, mkdir)
+        if parent is None:
+            self.groups[path] = None
+            return
+
+        found = None
+        if path not in self.groups and path.parent not in self.created:
+            self.calls += 1
+            found = parent.Groups.Find(path.name)
+        if found is None and mkdir:
+            self.calls += 1
+            found = parent.Groups.Create(path.name)
+            self.created.add(path)
+        self.groups[path] = found
+
+        return found
+
+    def prepare(self, paths: list[PurePosixPath | str]) -> int:
+        # Creates the folders of all `paths` in one pass, parents first;
+        # returns how many were created
+        count = len(self.created)
+        for path in tree(paths):
+            self.group(path, mkdir=True)
+
+        return len(self.created) - count
+
+    def block(self, path: PurePosixPath | str, name: str) -> Siemens.Engineering.SW.Blocks.PlcBlock | None:
+        path = ROOT / path
+        found = self.blocks.setdefault(name, {})
+        if path in found:
+            self.hits += 1
+            return found[path]
+
+        self.misses += 1
+        group = self.group(path)
+        if group is None or path in self.created:
+            found[path] = None
+        else:
+            self.calls += 1
+            found[path] = group.Blocks.Find(name)
+
+        return found[path]
+
+    def add_block(self, path: PurePosixPath | str, name: str, block: Siemens.Engineering.SW.Blocks.PlcBlock):
+        # a block name is unique in the software, wherever it was found
+        self.blocks[name] = {ROOT / path: block}
+
+    def forget_block(self, name: str):
+        # imported blocks may replace one of any group
+        self.blocks.pop(name, None)
+
+    def table(self, name: str) -> Siemens.Engineering.SW.Tags.PlcTagTable | None:
+        return self._lookup(self.tables, name, self.plc_software.TagTableGroup.TagTables.Find)
+
+    def add_table(self, name: str, table: Siemens.Engineering.SW.Tags.PlcTagTable):
+        self.tables[name] = table
+
+    def _lookup(self, cache: dict[str, Any], name: str, find: Callable[[str], Any]) -> Any:
+        if name in cache:
+            self.hits += 1
+            return cache[name]
+
+        self.misses += 1
+        self.calls += 1
+        cache[name] = find(name)
+
+        return cache[name]
+
+
+# one map per PLC software object, which the map keeps alive so its id is
+# not reused
+MAPS: dict[int, IdentityMap] = {}
+
+
+def of(plc_software: Siemens.Engineering.HW.Software) -> IdentityMap:
+    identity = MAPS.get(id(plc_software))
+    if identity is None:
+        identity = MAPS[id(plc_software)] = IdentityMap(plc_software)
+
+    return identity
+
+
+def clear():
+    # objects of another project are never found again
+    if MAPS:
+        logger.debug(f"Identity maps: {stats()}")
+    MAPS.clear()
+
+
+def stats() -> dict[str, int]:
+    return {
+        'hits': sum(identity.hits for identity in MAPS.values()),
+        'misses': sum(identity.misses for identity in MAPS.values()),
+        'calls': sum(identity.calls for identity in MAPS.values()),
+    }
+
+
+def tree(paths: list[PurePosixPath | str]) -> list[str]:
+    # every folder of `paths` with its parents, once, parents first
+    folders: set[PurePosixPath] = set()
+    for path in paths:
+        path = ROOT / path
+        folders.update(parent for parent in [path, *path.parents] if parent != ROOT)
+
+    return [str(folder) for folder in sorted(folders, key=lambda folder: folder.parts)]
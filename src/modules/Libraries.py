@@ -1,31 +1,52 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path, PurePosixPath
-from typing import Optional
+from typing import Any, Optional
 import logging
+import os
+import time
 
-from src.core import logs
+from src.core import catalog, logs
+from src.core.mirror import Mirror
+import src.modules.Identities as Identities
 
 logs.setup(logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+ROOT: PurePosixPath = PurePosixPath('/')
+
 
 @dataclass
 class GlobalLibrary:
     FilePath: Path
     ReadOnly: Optional[bool] = None
+    # "all" copies the whole library into every PLC, "used" only the
+    # mastercopies the PLC's blocks use and what they depend on
+    Copy: str = "all"
+    # "folder/name" of a mastercopy: those it needs
+    Dependencies: dict[str, list[str]] = field(default_factory=dict)
 
 
-def import_library(imports: Imports, data: GlobalLibrary, TIA: Siemens.Engineering.TiaPortal) -> Siemens.Engineering.Library.GlobalLibrary:
+def import_library(imports: Imports, data: GlobalLibrary, TIA: Siemens.Engineering.TiaPortal,
+                   mirror: Mirror | None = None) -> Siemens.Engineering.Library.GlobalLibrary:
     SE: Siemens.Engineering = imports.DLL
     FileInfo: FileInfo = imports.FileInfo
 
-    library_path: FileInfo = FileInfo(data.FilePath.as_posix())
+    # a portal the tool attached to may have it open already
+    library: Siemens.Engineering.Library.GlobalLibrary = index(TIA).library(data.FilePath.stem)
+    if library:
+        FILES[library.Name] = reusable(library, data, mirror)
+        logger.info(f"Reusing open Global Library: {library.Name}")
+        return library
+
+    # read-only libraries may be opened from a local copy
+    path = mirror.local(data.FilePath) if mirror is not None and data.ReadOnly else data.FilePath
+    library_path: FileInfo = FileInfo(path.as_posix())
 
     logger.info(f"Opening Global Library: {
                 library_path} (ReadOnly: {data.ReadOnly})")
 
-    library: Siemens.Engineering.Library.GlobalLibrary = SE.Library.GlobalLibrary
+    start = time.perf_counter()
     if data.ReadOnly:
         library = TIA.GlobalLibraries.Open(library_path, SE.OpenMode.ReadOnly)
         logger.info(f"Opened Global Library in Read-Only Mode: {library.Name}")
@@ -33,10 +54,36 @@ def import_library(imports: Imports, data: GlobalLibrary, TIA: Siemens.Engineeri
         library = TIA.GlobalLibraries.Open(library_path, SE.OpenMode.ReadWrite)
         logger.info(
             f"Opened Global Library in Read-Write Mode: {library.Name}")
+    logger.info(f"Opened Global Library {library.Name} in {time.perf_counter() - start:.1f} s"
+                + (f" (mirror: {mirror.hits} hits, {mirror.misses} misses)" if mirror is not None else ''))
+    index(TIA).add(library)
+    FILES[library.Name] = path
 
     return library
 
 
+def reusable(library: Siemens.Engineering.Library.GlobalLibrary, data: GlobalLibrary,
+             mirror: Mirror | None = None) -> Path:
+    # The file of an open library with the name of `data`, if it is the file
+    # `data` asks for (or a mirror of it) in a mode that serves it. TIA
+    # Portal opens one library of a name at a time, so any other is an error.
+    info = getattr(library, 'Path', None)
+    path = Path(info.FullName) if info is not None else data.FilePath
+    mirrored = (mirror is not None and data.ReadOnly and path.name == data.FilePath.name
+                and same_file(path.parent.parent.parent, mirror.directory))
+    if not same_file(path, data.FilePath) and not mirrored:
+        raise ValueError(f"Global Library {library.Name} is open from {path}, not from {data.FilePath}")
+    if not data.ReadOnly and getattr(library, 'IsReadOnly', False):
+        raise ValueError(f"Global Library {library.Name} is open read-only, but {data.FilePath} "
+                         f"is to be opened for writing")
+
+    return path
+
+
+def same_file(first: Path, second: Path) -> bool:
+    return os.path.normcase(os.path.abspath(first)) == os.path.normcase(os.path.abspath(second))
+
+
 def copy_mastercopies_to_plc_group(mastercopyfolder: Siemens.Engineering.Library.MasterCopies.MasterCopyFolder, block_group: Siemens.Engineering.SW.Blocks.PlcBlockGroup):
     if not mastercopyfolder:
         return
@@ -78,14 +125,78 @@ def generate_mastercopies(name: str, plc_software: Siemens.Engineering.HW.Softwa
     return
 
 
+def copied_from(data: GlobalLibrary, block: Any) -> tuple[PurePosixPath, str] | None:
+    # The mastercopy an instance without a library source takes from the
+    # copy of the library in the PLC: TGT_LD_Motor in
+    # /TGTLibrary/Drives/Motors is Drives/Motors/TGT_LD_Motor of TGTLibrary
+    source = block.LibraryData
+    if not block.IsInstance or source.Name:
+        return
+    root = ROOT / data.FilePath.stem
+    group = ROOT / block.BlockGroupPath
+    if group != root and root not in group.parents:
+        return
+
+    return group.relative_to(root), block.Name
+
+
+def used(data: GlobalLibrary, blocks: list[Any]) -> list[tuple[PurePosixPath, str]]:
+    # Folder and name of the mastercopies `blocks` and the blocks called in
+    # their networks take from the library, then of their dependencies
+    wanted: dict[tuple[PurePosixPath, str], None] = {}
+    seen: set[int] = set()
+    pending = list(blocks)
+    while pending:
+        block = pending.pop()
+        if id(block) in seen:
+            continue
+        seen.add(id(block))
+        mastercopy = copied_from(data, block)
+        if mastercopy:
+            wanted[mastercopy] = None
+        for network_source in getattr(block, 'NetworkSources', []):
+            pending.extend(network_source.PlcBlocks)
+
+    closure = sorted(wanted, key=lambda mastercopy: (mastercopy[0].parts, mastercopy[1]))
+    for folder, name in closure:
+        for dependency in data.Dependencies.get(str(folder / name), []):
+            path = PurePosixPath(dependency)
+            mastercopy = (PurePosixPath(str(path.parent).lstrip('/')), path.name)
+            if mastercopy not in wanted:
+                wanted[mastercopy] = None
+                closure.append(mastercopy)
+
+    return closure
+
+
+def copy_used(data: GlobalLibrary, blocks: list[Any],
+              plc_software: Siemens.Engineering.HW.Software, TIA: Siemens.Engineering.TiaPortal):
+    # Only what `used` finds, each in its folder of the library's copy
+    name = data.FilePath.stem
+    library = find(TIA, name)
+    if not library:
+        return
+
+    mastercopies = used(data, blocks)
+    logger.info(f"Copying {len(mastercopies)} mastercopies of Global Library {
+                name} to {plc_software.Name} started")
+    identity = Identities.of(plc_software)
+    for folder, mastercopy_name in mastercopies:
+        mastercopy = find_mastercopy(library, folder, mastercopy_name)
+        if not mastercopy:
+            logger.warning(f"MasterCopy {mastercopy_name} not found in {folder} of {name}")
+            continue
+        group = ROOT / name / folder
+        identity.add_block(group, mastercopy_name,
+                           identity.group(group, mkdir=True).Blocks.CreateFrom(mastercopy))
+
+
 def find(TIA: Siemens.Engineering.TiaPortal, name: str) -> Siemens.Engineering.Library.GlobalLibrary:
-    logger.info(f"Search for Library {name} started")
-    logger.debug(f"List of GlobalLibraries: {TIA.GlobalLibraries}")
+    library = index(TIA).library(name)
+    if library:
+        logger.info(f"Found Library {library.Name}")
 
-    for global_library in TIA.GlobalLibraries:
-        if global_library.Name == name:
-            logger.info(f"Found Library {global_library.Name}")
-            return global_library
+    return library
 
 
 def find_mastercopy(library: Siemens.Engineering.Library.GlobalLibrary,
@@ -96,29 +207,123 @@ def find_mastercopy(library: Siemens.Engineering.Library.GlobalLibrary,
     if not library:
         return
 
-    mastercopyfolder = locate_mastercopyfolder(
-        library=library, mastercopyfolder_path=mastercopyfolder_path)
+    return mastercopies(library).mastercopy(mastercopyfolder_path, name)
 
-    if not mastercopyfolder:
-        return
 
-    mastercopy = mastercopyfolder.MasterCopies.Find(name)
+def locate_mastercopyfolder(library: Siemens.Engineering.Library.GlobalLibrary,
+                            mastercopyfolder_path: PurePosixPath) -> Siemens.Engineering.Library.MasterCopies.MasterCopyUserFolder:
+    return mastercopies(library).folder(mastercopyfolder_path)
 
-    return mastercopy
 
+class LibraryIndex:
+    # Global libraries of a TIA Portal by name, listed once. Libraries opened
+    # by the tool are added as they are opened.
 
-def locate_mastercopyfolder(library: Siemens.Engineering.Library.GlobalLibrary,
-                            mastercopyfolder_path: PurePosixPath) -> Siemens.Engineering.Library.MasterCopies.MasterCopyUserFolder:
+    def __init__(self, TIA: Siemens.Engineering.TiaPortal):
+        self.TIA: Siemens.Engineering.TiaPortal = TIA
+        self.libraries: dict[str, Siemens.Engineering.Library.GlobalLibrary] | None = None
 
-    if not mastercopyfolder_path.is_absolute():
-        mastercopyfolder_path = PurePosixPath('/') / mastercopyfolder_path
+    def library(self, name: str) -> Siemens.Engineering.Library.GlobalLibrary | None:
+        if self.libraries is None:
+            self.libraries = {library.Name: library for library in self.TIA.GlobalLibraries}
+            logger.debug(f"Indexed {len(self.libraries)} global libraries")
 
-    mastercopyfolder: Siemens.Engineering.Library.MasterCopies.MasterCopyUserFolder = library.MasterCopyFolder
-    for part in mastercopyfolder_path.parts:
-        if part == '/':
-            continue
-        mastercopyfolder = mastercopyfolder.Folders.Find(part)
-        if not mastercopyfolder:
+        return self.libraries.get(name)
+
+    def add(self, library: Siemens.Engineering.Library.GlobalLibrary):
+        if self.libraries is not None:
+            self.libraries[library.Name] = library
+
+
+class MasterCopyIndex:
+    # Mastercopy folders and mastercopies of one library by path and name.
+    # Without a current catalog of the library's file its folder tree is
+    # walked once (and the catalog written); with one nothing is listed and
+    # only the mastercopies asked for are found, each once.
+
+    def __init__(self, library: Siemens.Engineering.Library.GlobalLibrary, path: Path | None = None):
+        self.library: Siemens.Engineering.Library.GlobalLibrary = library
+        self.folders: dict[PurePosixPath, Siemens.Engineering.Library.MasterCopies.MasterCopyFolder] = {}
+        self.mastercopies: dict[tuple[PurePosixPath, str], Siemens.Engineering.Library.MasterCopies.MasterCopy] = {}
+        self.catalog: catalog.Catalog | None = catalog.load(path) if path else None
+        if self.catalog is not None:
+            self.folders[ROOT] = library.MasterCopyFolder
             return
 
-    return mastercopyfolder
+        entries: list[list[str]] | None = [] if path else None
+        self.walk(ROOT, library.MasterCopyFolder, entries)
+        logger.debug(f"Indexed Library {library.Name}: {len(self.folders)} folders, "
+                     f"{len(self.mastercopies)} mastercopies")
+        if path:
+            catalog.save(catalog.create(path, library.Name, [str(folder) for folder in self.folders], entries))
+
+    def walk(self, path: PurePosixPath, folder: Siemens.Engineering.Library.MasterCopies.MasterCopyFolder,
+             entries: list[list[str]] | None = None):
+        self.folders[path] = folder
+        for mastercopy in folder.MasterCopies:
+            self.mastercopies[(path, mastercopy.Name)] = mastercopy
+            if entries is not None:
+                entries.append([str(path), mastercopy.Name, content_type(mastercopy)])
+        for subfolder in folder.Folders:
+            self.walk(path / subfolder.Name, subfolder, entries)
+
+    def folder(self, path: PurePosixPath | str) -> Siemens.Engineering.Library.MasterCopies.MasterCopyFolder | None:
+        path = ROOT / path
+        if path in self.folders or self.catalog is None:
+            return self.folders.get(path)
+        if path not in self.catalog.folders:
+            return
+
+        parent = self.folder(path.parent)
+        self.folders[path] = parent.Folders.Find(path.name) if parent else None
+
+        return self.folders[path]
+
+    def mastercopy(self, path: PurePosixPath | str, name: str) -> Siemens.Engineering.Library.MasterCopies.MasterCopy | None:
+        key = (ROOT / path, name)
+        if key in self.mastercopies or self.catalog is None:
+            return self.mastercopies.get(key)
+        if not self.catalog.contains(*key):
+            return
+
+        folder = self.folder(key[0])
+        self.mastercopies[key] = folder.MasterCopies.Find(name) if folder else None
+
+        return self.mastercopies[key]
+
+
+def content_type(mastercopy: Siemens.Engineering.Library.MasterCopies.MasterCopy) -> str:
+    # what a mastercopy holds, e.g. Siemens.Engineering.SW.Blocks.FB; only
+    # known to newer versions of Openness
+    try:
+        return ' '.join(str(description.ContentType) for description in mastercopy.ContentDescriptions)
+    except AttributeError:
+        return ''
+
+
+# indexes of the running TIA Portal and its libraries, which they keep alive
+# so their ids are not reused
+INDEXES: dict[int, LibraryIndex] = {}
+MASTERCOPIES: dict[int, MasterCopyIndex] = {}
+# files of the libraries the tool opened, by library name
+FILES: dict[str, Path] = {}
+
+
+def index(TIA: Siemens.Engineering.TiaPortal) -> LibraryIndex:
+    if id(TIA) not in INDEXES:
+        INDEXES[id(TIA)] = LibraryIndex(TIA)
+
+    return INDEXES[id(TIA)]
+
+
+def mastercopies(library: Siemens.Engineering.Library.GlobalLibrary) -> MasterCopyIndex:
+    if id(library) not in MASTERCOPIES:
+        MASTERCOPIES[id(library)] = MasterCopyIndex(library, FILES.get(library.Name))
+
+    return MASTERCOPIES[id(library)]
+
+
+def clear():
+    INDEXES.clear()
+    MASTERCOPIES.clear()
+    FILES.clear()
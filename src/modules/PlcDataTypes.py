@@ -1,17 +1,19 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TextIO
 import xml.etree.ElementTree as ET
 import logging
 
 from src.core import logs
-from src.modules.XML import Software
+from src.core.workspace import Workspace
+from src.modules.XML import DocumentCache, Software, Streamed, Writer, XMLNS, escape_attrib
 
 logs.setup(logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class PlcStruct:
     Name: str
     Datatype: str
@@ -49,8 +51,36 @@ class XML(Software):
                 'SystemDefined': "true"
             }).text = str(attributes[attrib]).lower()
 
-
-def create(imports: Imports, plc_software: Siemens.Engineering.HW.Software, data: PlcDataType):
+    @classmethod
+    def stream(cls, data: PlcDataType, out: TextIO):
+        writer = Writer(out)
+        writer.write(f'<Document><{cls.DOCUMENT} ID="0"><AttributeList>')
+        writer.element("Name", text=data.Name)
+        writer.write(f'<Interface><Sections xmlns="{XMLNS.INTERFACE.value}">')
+        if not data.Types:
+            writer.write('<Section Name="None" />')
+        else:
+            writer.write('<Section Name="None">')
+            for udt in data.Types:
+                writer.write(f'<Member Name="{escape_attrib(udt.Name)}" Datatype="{
+                             escape_attrib(udt.Datatype)}"')
+                if not udt.attributes:
+                    writer.write(" />")
+                    continue
+                writer.write("><AttributeList>")
+                for attrib in udt.attributes:
+                    writer.element("BooleanAttribute", {
+                        'Name': attrib,
+                        'SystemDefined': "true"
+                    }, str(udt.attributes[attrib]).lower())
+                writer.write("</AttributeList></Member>")
+            writer.write("</Section>")
+        writer.write("</Sections></Interface><Namespace /></AttributeList>")
+        writer.write(f"</{cls.DOCUMENT}></Document>")
+
+
+def create(imports: Imports, plc_software: Siemens.Engineering.HW.Software, data: PlcDataType,
+           documents: DocumentCache | None = None, workspace: Workspace | None = None):
     logger.info(f"Generating of {data.Name} User Data Types started")
 
     if not data.Name or not data.Types:
@@ -58,8 +88,8 @@ def create(imports: Imports, plc_software: Siemens.Engineering.HW.Software, data
 
     logger.info(f"Generating of User Data Type {data.Name} started")
 
-    xml = XML(data)
-    filename: Path = xml.write()
+    xml = documents.render(XML, data) if documents else Streamed(XML, data)
+    filename: Path = xml.write(workspace.path(data.Name, "types") if workspace else None)
 
     logger.info(f"Written User Data Type {data.Name} XML to: {filename}")
 
@@ -67,7 +97,7 @@ def create(imports: Imports, plc_software: Siemens.Engineering.HW.Software, data
 
     logger.info(f"Importing User Data Type {data.Name} started")
 
-    if filename.exists():
+    if not workspace and filename.exists():
         filename.unlink()
 
 
@@ -3,11 +3,12 @@ from dataclasses import dataclass
 import logging
 
 from src.core import logs
+import src.modules.Identities as Identities
 
 logs.setup(logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(slots=True)
 class PlcTag:
     Name: str
     DataTypeName: str
@@ -25,6 +26,7 @@ def new(imports: Imports, plc_software: Siemens.Engineering.HW.Software, data: P
         table: Siemens.Engineering.SW.Tags.PlcTagTable = find_table(imports, plc_software, data.Name)
     else:
         table: Siemens.Engineering.SW.Tags.PlcTagTable = plc_software.TagTableGroup.TagTables.Create(data.Name)
+        Identities.of(plc_software).add_table(data.Name, table)
 
     for tag in data.Tags:
         add_tag(table, tag)
@@ -51,7 +53,7 @@ def find_table(imports: Imports, plc_software: Siemens.Engineering.HW.Software,
 
     logging.info(f"Search for Tag Table {name} in Software {plc_software.Name} started")
 
-    tag_table: Siemens.Engineering.SW.Tags.PlcTagTable = plc_software.TagTableGroup.TagTables.Find(name)
+    tag_table: Siemens.Engineering.SW.Tags.PlcTagTable = Identities.of(plc_software).table(name)
 
     if not isinstance(tag_table, SE.SW.Tags.PlcTagTable):
         return
@@ -1,5 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from pathlib import Path
 import logging
 
 from src.core import logs
@@ -15,6 +16,17 @@ class Imports:
     FileInfo: System.IO.FileInfo
 
 
+def load(dll: Path) -> Imports:
+    # Openness of one TIA Portal version, only available on Windows
+    import clr
+    from System.IO import DirectoryInfo, FileInfo
+    clr.AddReference(dll.as_posix())
+
+    import Siemens.Engineering as SE
+
+    return Imports(SE, DirectoryInfo, FileInfo)
+
+
 def get_process_ids(imports: Imports) -> list[int]:
     SE: Siemens.Engineering = imports.DLL
 
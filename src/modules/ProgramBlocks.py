@@ -1,22 +1,28 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 from pathlib import Path, PurePosixPath
-from typing import Optional
+from typing import TextIO
+import copy
+import itertools
 import logging
+import re
+import shutil
 import tempfile
 import xml.etree.ElementTree as ET
 
 from src.core import logs
-from src.modules.XML import Document, XMLNS
+from src.core.workspace import Workspace
+from src.modules.XML import Document, XMLNS, MARKER, Writer, escape_attrib, escape_cdata
 import src.modules.BlocksDBInstances as BlocksDBInstances
+import src.modules.Identities as Identities
 import src.modules.Libraries as Libraries
 
 logs.setup(logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class VariableStruct:
     Name: str
     Datatype: str
@@ -25,10 +31,31 @@ class VariableStruct:
     Attributes: dict
 
 
-@dataclass
+@dataclass(slots=True)
+class VariableArray:
+    # A one-dimensional array member with a start value per element, already
+    # formatted for its element type. Written like a VariableStruct, plus
+    # its Subelement/StartValue list.
+    Name: str
+    Datatype: str
+    Retain: bool
+    Attributes: dict
+    Lower: int
+    StartValues: list[str]
+    StartValue: str = ''
+
+    def subelements(self) -> str:
+        # one escape over all values: "\x00" is not allowed in start values
+        values = escape_cdata('\x00'.join(self.StartValues)).split('\x00')
+        lower = self.Lower
+        return ''.join([f'<Subelement Path="{lower + index}"><StartValue>{value}</StartValue></Subelement>'
+                        for index, value in enumerate(values)])
+
+
+@dataclass(slots=True)
 class VariableSection:
     Name: str
-    Structs: list[VariableStruct]
+    Structs: list[VariableStruct | VariableArray]
 
 
 @dataclass
@@ -53,7 +80,7 @@ class NetworkSource:
     PlcBlocks: list[ProgramBlock]
 
 
-@dataclass
+@dataclass(slots=True)
 class WireParameter:
     Name: str
     Section: str
@@ -62,32 +89,134 @@ class WireParameter:
     Negated: bool
 
 
-@dataclass
-class AccessValue:
-    Root: str
-    Variable: Optional[str]
-    Index: Optional[int]
-
-    def __init__(self, raw: str):
-        if not raw:
-            self.Root = ''
-            self.Variable = None
-            self.Index = None
-            return
-        parts = raw.split('.')
-
-        self.Root = parts[0]
-        self.Variable = None
-        self.Index = None
+@dataclass(frozen=True, slots=True)
+class AccessComponent:
+    Name: str
+    Indexes: tuple[AccessValue, ...] = ()
 
-        if len(parts) == 2:
-            var_part = parts[1]
-            self.Variable = var_part
 
-            if '[' in var_part and var_part.endswith(']'):
-                bracket_start = var_part.find('[')
-                self.Variable = var_part[:bracket_start]
-                self.Index = var_part[bracket_start + 1: -1]
+@dataclass(frozen=True, slots=True)
+class AccessValue:
+    # A parsed wire value. Scope is '' for an open connection,
+    # LiteralConstant or TypedConstant for a constant, else the scope of a
+    # variable with its path of components, e.g. DB.Motors[1, #i].Speed.
+    Scope: str = ''
+    Components: tuple[AccessComponent, ...] = ()
+    Constant: str = ''
+
+    def texts(self) -> list[str]:
+        # names and constants, in the order the access is written
+        if not self.Components:
+            return [self.Constant] if self.Scope else []
+        texts: list[str] = []
+        for component in self.Components:
+            texts.append(component.Name)
+            for index in component.Indexes:
+                texts.extend(index.texts())
+        return texts
+
+    def shape(self) -> tuple:
+        # everything but the texts
+        return (self.Scope, tuple(tuple(index.shape() for index in component.Indexes)
+                                  for component in self.Components))
+
+    def marked(self, marker) -> AccessValue:
+        # the same access with marker() in place of every text
+        if not self.Components:
+            return AccessValue(self.Scope, (), marker()) if self.Scope else self
+        return AccessValue(self.Scope, tuple(
+            AccessComponent(marker(), tuple(index.marked(marker) for index in component.Indexes))
+            for component in self.Components))
+
+
+# Wire values repeat a lot (true, false, T#5s, IO.Start, ...), so every
+# value is parsed once.
+ACCESS_PATHS: dict[str, AccessValue] = {}
+MAX_ACCESS_PATHS: int = 65536
+ACCESS_NAME = re.compile(r'"((?:[^"]|"")*)"|([A-Za-z_]\w*)')
+INDEX_CONSTANT = re.compile(r'\s*(?:([+-]?\d[\w#]*)|([A-Za-z_]\w*#[\w#.+-]+))\s*')
+SPACES = re.compile(r'\s*')
+TYPED_CONSTANT = re.compile(r'[A-Za-z_]\w*#')
+LITERAL_CONSTANT = re.compile(r"(?i:true|false)|[+-]?\.?\d.*|'.*'", re.DOTALL)
+BARE_NAME = re.compile(r'[A-Za-z_]\w*')
+
+
+def parse_access(raw: str | None) -> AccessValue:
+    # Constants as TIA Portal writes them (true, 15, 1.5, 'text', 16#FF,
+    # T#5s, Int#3) and paths of global ("DB".Var) or local (#Var)
+    # variables of any depth, with array indexes that are constants or
+    # paths themselves, e.g. DB.Matrix[1, #i].Value. A bare name stays a
+    # constant as it always was (literal for Int, Bool, UInt and DInt,
+    # typed otherwise); "Name" or #Name is a variable.
+    if not raw:
+        return AccessValue()
+    value = ACCESS_PATHS.get(raw)
+    if value is not None:
+        return value
+
+    text = raw.strip()
+    if TYPED_CONSTANT.match(text):
+        value = AccessValue("TypedConstant", (), text)
+    elif LITERAL_CONSTANT.fullmatch(text) or BARE_NAME.fullmatch(text):
+        value = AccessValue("LiteralConstant", (), text)
+    else:
+        value, position = _parse_path(raw, text, 0)
+        if position != len(text):
+            raise ValueError(f"Wire value {raw!r} has {text[position:]!r} after the access path")
+
+    if len(ACCESS_PATHS) >= MAX_ACCESS_PATHS:
+        ACCESS_PATHS.clear()
+    ACCESS_PATHS[raw] = value
+
+    return value
+
+
+def _parse_path(raw: str, text: str, position: int) -> tuple[AccessValue, int]:
+    scope = "GlobalVariable"
+    if text.startswith('#', position):
+        scope = "LocalVariable"
+        position += 1
+
+    components: list[AccessComponent] = []
+    while True:
+        match = ACCESS_NAME.match(text, position)
+        if match is None:
+            raise ValueError(f"Wire value {raw!r} has no name at {text[position:]!r}")
+        name = match.group(2) if match.group(2) is not None else match.group(1).replace('""', '"')
+        position = match.end()
+
+        # "All_Drives.[4]" is taken as "All_Drives[4]"
+        if text.startswith('.[', position):
+            position += 1
+        indexes: tuple[AccessValue, ...] = ()
+        if text.startswith('[', position):
+            indexes, position = _parse_indexes(raw, text, position + 1)
+        components.append(AccessComponent(name, indexes))
+
+        if not text.startswith('.', position):
+            return AccessValue(scope, tuple(components)), position
+        position += 1
+
+
+def _parse_indexes(raw: str, text: str, position: int) -> tuple[tuple[AccessValue, ...], int]:
+    indexes: list[AccessValue] = []
+    while True:
+        match = INDEX_CONSTANT.match(text, position)
+        if match is not None:
+            scope = "LiteralConstant" if match.group(1) else "TypedConstant"
+            indexes.append(AccessValue(scope, (), match.group(1) or match.group(2)))
+            position = match.end()
+        else:
+            index, position = _parse_path(raw, text, SPACES.match(text, position).end())
+            indexes.append(index)
+            position = SPACES.match(text, position).end()
+
+        if text.startswith(',', position):
+            position += 1
+        elif text.startswith(']', position):
+            return tuple(indexes), position + 1
+        else:
+            raise ValueError(f"Wire value {raw!r} has an unclosed index at {text[position:]!r}")
 
 
 class PlcEnum(Enum):
@@ -195,8 +324,122 @@ class Base(Document):
             bool_attribs = generate_boolean_attributes(struct)
             if len(bool_attribs):
                 Member.append(bool_attribs)
+            if isinstance(struct, VariableArray) and struct.StartValues:
+                self.append_fragment(Member, struct.subelements())
+
+        return
+
+    # Streaming: the same document written without a tree. Subclasses name
+    # the sections they create, in order, and what they add to them.
+    SECTIONS: tuple[str, ...] = ()
+    # serialized members a section is created with
+    FIXED: dict[str, str] = {}
+
+    @classmethod
+    def stream(cls, data: ProgramBlock, out: TextIO):
+        writer = Writer(out)
+        writer.write(f'<Document><{cls.DOCUMENT} ID="0"><AttributeList>')
+        writer.element("Name", text=data.Name)
+        cls._stream_interface(writer, cls._sections(data),
+                              cls._variables(data))
+        writer.element("Number", text=str(cls._number(data)))
+        writer.element("ProgrammingLanguage", text=cls._language(data))
+        cls._stream_attributes(writer, data)
+        writer.write("</AttributeList>")
+
+        units = cls._compile_units(data)
+        if units:
+            writer.write("<ObjectList>")
+            for unit in units:
+                writer.write(unit)
+            writer.write("</ObjectList>")
+        else:
+            writer.write("<ObjectList />")
+        writer.write(f"</{cls.DOCUMENT}></Document>")
+
+    @classmethod
+    def _sections(cls, data) -> list[str]:
+        return list(cls.SECTIONS)
+
+    @classmethod
+    def _variables(cls, data) -> list[VariableSection]:
+        return []
+
+    @classmethod
+    def _number(cls, data) -> int:
+        return data.Number
+
+    @classmethod
+    def _language(cls, data) -> str:
+        return data.ProgrammingLanguage
+
+    @classmethod
+    def _stream_attributes(cls, writer: Writer, data):
+        return
+
+    @classmethod
+    def _compile_units(cls, data) -> list[str]:
+        return []
 
+    @classmethod
+    def _stream_interface(cls, writer: Writer, sections: list[str], variables: list[VariableSection]):
+        if not sections:
+            writer.write(f'<Interface><Sections xmlns="{
+                         XMLNS.INTERFACE.value}" /></Interface><Namespace />')
+            return
+
+        # members go to the last section created with their section's name
+        last = {name: index for index, name in enumerate(sections)}
+        structs: list[list[list[VariableStruct]]] = [[] for _ in sections]
+        for section in variables:
+            if section.Name in last:
+                structs[last[section.Name]].append(section.Structs)
+
+        writer.write(f'<Interface><Sections xmlns="{XMLNS.INTERFACE.value}">')
+        for index, name in enumerate(sections):
+            fixed = cls.FIXED.get(name, '') if last[name] == index else ''
+            if not fixed and not any(structs[index]):
+                writer.write(f'<Section Name="{name}" />')
+                continue
+            writer.write(f'<Section Name="{name}">{fixed}')
+            for group in structs[index]:
+                for struct in group:
+                    cls._stream_member(writer, struct)
+            writer.write("</Section>")
+        writer.write("</Sections></Interface><Namespace />")
+
+    @classmethod
+    def _stream_member(cls, writer: Writer, struct: VariableStruct):
+        writer.write(f'<Member Name="{escape_attrib(struct.Name)}" Datatype="{escape_attrib(struct.Datatype)}" Remanence="{
+                     "Retain" if struct.Retain else "NonRetain"}" Accessibility="Public"')
+        stream_member_content(writer, struct)
+
+
+def stream_member_content(writer: Writer, struct: VariableStruct | VariableArray):
+    # what follows the attributes of a member's start tag
+    array = isinstance(struct, VariableArray) and bool(struct.StartValues)
+    if struct.StartValue == '' and not struct.Attributes and not array:
+        writer.write(" />")
+        return
+    writer.write(">")
+    if struct.StartValue != '':
+        writer.element("StartValue", text=struct.StartValue)
+    stream_boolean_attributes(writer, struct.Attributes)
+    if array:
+        writer.write(struct.subelements())
+    writer.write("</Member>")
+
+
+def stream_boolean_attributes(writer: Writer, attributes: dict):
+    if not attributes:
         return
+    writer.write("<AttributeList>")
+    for attrib in attributes:
+        writer.element("BooleanAttribute", {
+            'Name': attrib,
+            'SystemDefined': "true"
+        }, str(attributes[attrib]).lower())
+    writer.write("</AttributeList>")
 
 
 # might clean below
@@ -240,22 +483,24 @@ class BlockCompileUnit:
         for plcblock in plcblocks:
             # for now, we only do 1 instance per network source
             if len(plcblocks) == 1:
-                last_uid = self._insert_parts(plcblock, 21)
-                self._insert_wires(plcblock, last_uid + 2)
+                uids, call_uid = self._insert_parts(plcblock, 21)
+                self._insert_wires(plcblock, uids, call_uid)
 
         return
 
-    def _insert_parts(self, plcblock: ProgramBlock, uid: int) -> int:
+    def _insert_parts(self, plcblock: ProgramBlock, uid: int) -> tuple[list[int], int]:
+        # UIds of the parts wired to each parameter, kept here rather than on
+        # the parameters so the same block can be built concurrently
+        uids: list[int] = []
         for parameter in plcblock.Parameters:
-            if not parameter.Value.Root:
+            if not parameter.Value.Scope:
+                uids.append(-1)
                 continue
 
-            parameter.__dict__['UId'] = uid
+            uids.append(uid)
             access = generate_access(parameter, uid)
             self.Parts.append(access)
             uid += 1
-        for parameter in plcblock.Parameters:
-            parameter.__dict__['call'] = uid
 
         Call = ET.SubElement(self.Parts, "Call", attrib={'UId': str(uid)})
         CallInfo = ET.SubElement(
@@ -288,16 +533,15 @@ class BlockCompileUnit:
                 'Type': parameter.Datatype
             })
 
-        return uid
+        return uids, uid
 
-    def _insert_wires(self, instance: ProgramBlock, last_uid: int):
+    def _insert_wires(self, instance: ProgramBlock, uids: list[int], call_uid: int):
+        last_uid = call_uid + 2
         wire_values: list[tuple[ET.Element, ET.Element]] = []
-        for param in instance.Parameters:
-            p_call_uid = param.__dict__.get('call', 23)
+        for param, ident_uid in zip(instance.Parameters, uids):
             NameCon = ET.Element("NameCon", attrib={
-                                 'UId': str(p_call_uid), 'Name': param.Name})
-            if param.Value.Root:
-                ident_uid = param.__dict__.get('UId', 23)
+                                 'UId': str(call_uid), 'Name': param.Name})
+            if param.Value.Scope:
                 IdentCon = ET.Element("IdentCon", attrib={
                                       'UId': str(ident_uid)})
                 wire_values.append((NameCon, IdentCon))
@@ -316,6 +560,211 @@ class BlockCompileUnit:
         return
 
 
+# Compile units of networks with the same shape differ only in their IDs
+# and a few texts, so each shape is serialized once and later units are
+# rendered by filling in their own values.
+SLOT_BASE: int = 0xFFFF0000
+SLOT_PATTERN = re.compile(f'{MARKER}(\\d+){MARKER}|ID="(FFFF000[0-4])"')
+COMPILE_UNITS: dict[tuple, CompileUnitTemplate | None] = {}
+MAX_COMPILE_UNITS: int = 4096
+# Networks with the same content too, such as the same call with the same
+# wiring in many blocks, are filled in once and only their IDs relocated.
+FILLED_UNITS: dict[tuple, FilledCompileUnit] = {}
+MAX_FILLED_UNITS: int = 4096
+
+
+class CompileUnitTemplate:
+    def __init__(self, programming_language: str, network_source: NetworkSource):
+        marked, slots = _marked_network(network_source)
+        root = BlockCompileUnit(programming_language, marked, SLOT_BASE).root
+        text = ET.tostring(root, encoding='unicode')
+
+        # literal parts with a slot between each two: (value index, is an
+        # attribute) or (ID offset, None)
+        self.parts: list[str] = []
+        self.slots: list[tuple[int, bool | None]] = []
+        position = 0
+        for match in SLOT_PATTERN.finditer(text):
+            if match.group(1) is not None:
+                self.parts.append(text[position:match.start()])
+                self.slots.append((int(match.group(1)), text.rfind(
+                    '<', 0, match.start()) > text.rfind('>', 0, match.start())))
+                position = match.end()
+            else:
+                self.parts.append(text[position:match.start(2)])
+                self.slots.append((int(match.group(2), 16) - SLOT_BASE, None))
+                position = match.end(2)
+        self.parts.append(text[position:])
+
+        # a marker in a name or datatype would be taken for a slot
+        self.valid: bool = sorted(
+            slot for slot, attribute in self.slots if attribute is not None) == slots
+
+    def render(self, values: list[str], block_id: int) -> str:
+        return self.fill(values).render(block_id)
+
+    def fill(self, values: list[str]) -> FilledCompileUnit:
+        parts: list[str] = [self.parts[0]]
+        offsets: list[int] = []
+        for (slot, attribute), part in zip(self.slots, self.parts[1:]):
+            if attribute is None:
+                offsets.append(slot)
+                parts.append(part)
+            elif attribute:
+                parts[-1] += escape_attrib(values[slot]) + part
+            else:
+                parts[-1] += escape_cdata(values[slot]) + part
+
+        return FilledCompileUnit(parts, offsets)
+
+
+class FilledCompileUnit:
+    # A compile unit with its values in place and its IDs as offsets from
+    # the ID of the unit, which is all that differs between the blocks it is
+    # placed in.
+
+    def __init__(self, parts: list[str], offsets: list[int]):
+        self.parts: list[str] = parts
+        self.offsets: list[int] = offsets
+
+    def render(self, block_id: int) -> str:
+        out: list[str] = [self.parts[0]]
+        for offset, part in zip(self.offsets, self.parts[1:]):
+            out.append(format(block_id + offset, 'X'))
+            out.append(part)
+
+        return ''.join(out)
+
+
+def render_compile_unit(programming_language: str, network_source: NetworkSource, block_id: int) -> str:
+    # Same text as serializing BlockCompileUnit(...).root
+    try:
+        content = _network_content(programming_language, network_source)
+        hash(content)
+    except (AttributeError, TypeError):
+        content = None
+    filled = FILLED_UNITS.get(content) if content is not None else None
+    if filled is not None:
+        return filled.render(block_id)
+
+    try:
+        values = _network_values(network_source)
+        key = _network_shape(programming_language, network_source, values)
+    except AttributeError:
+        key = None  # incomplete data, raised again while building it
+    template = COMPILE_UNITS.get(key) if key is not None else None
+    if key is not None and key not in COMPILE_UNITS:
+        if len(COMPILE_UNITS) >= MAX_COMPILE_UNITS:
+            COMPILE_UNITS.clear()
+        template = CompileUnitTemplate(programming_language, network_source)
+        if not template.valid:
+            template = None
+        COMPILE_UNITS[key] = template
+    if template is None:
+        return ET.tostring(BlockCompileUnit(programming_language, network_source, block_id).root, encoding='unicode')
+
+    filled = template.fill(values)
+    if content is not None:
+        if len(FILLED_UNITS) >= MAX_FILLED_UNITS:
+            FILLED_UNITS.clear()
+        FILLED_UNITS[content] = filled
+
+    return filled.render(block_id)
+
+
+def _called_block(network_source: NetworkSource) -> ProgramBlock | None:
+    # only a network with exactly one call renders it
+    if len(network_source.PlcBlocks) == 1:
+        return network_source.PlcBlocks[0]
+
+
+def _network_content(programming_language: str, network_source: NetworkSource) -> tuple:
+    # Everything BlockCompileUnit reads from a network
+    call = None
+    plcblock = _called_block(network_source)
+    if plcblock is not None:
+        database = None
+        if plcblock.PlcType != PlcEnum.Function:
+            database = (plcblock.Database.Name, plcblock.Database.CallOption)
+        call = (plcblock.PlcType, plcblock.Name, database, tuple(
+            (parameter.Name, parameter.Section, parameter.Datatype, parameter.Negated,
+             parameter.Value)
+            for parameter in plcblock.Parameters))
+
+    return (programming_language, network_source.Title, network_source.Comment,
+            len(network_source.PlcBlocks), call)
+
+
+def _network_shape(programming_language: str, network_source: NetworkSource,
+                   values: list) -> tuple | None:
+    # Everything of a compile unit that is not a slot, or None when it must
+    # be built directly because a slot value is not a string.
+    if not all(isinstance(value, str) for value in values[2:]):
+        return None
+    if not all(isinstance(text, str) for text in values[:2] if text):
+        return None
+
+    call = None
+    plcblock = _called_block(network_source)
+    if plcblock is not None:
+        scope = None
+        if plcblock.PlcType != PlcEnum.Function:
+            scope = plcblock.Database.CallOption == BlocksDBInstances.CallOptionEnum.Multi
+        call = (plcblock.PlcType, scope, tuple(
+            (parameter.Name, parameter.Section, parameter.Datatype,
+             parameter.Negated, parameter.Value.shape())
+            for parameter in plcblock.Parameters))
+
+    return (programming_language, bool(values[0]), bool(values[1]),
+            len(network_source.PlcBlocks), call)
+
+
+def _network_values(network_source: NetworkSource) -> list:
+    # Slot values, numbered as _marked_network numbers them.
+    values = [network_source.Title, network_source.Comment]
+    plcblock = _called_block(network_source)
+    if plcblock is None:
+        return values
+
+    values.append(plcblock.Name)
+    if plcblock.PlcType != PlcEnum.Function:
+        values.append(plcblock.Database.Name if plcblock.Database.Name != "" else f"{
+            plcblock.Name}_DB")
+    for parameter in plcblock.Parameters:
+        values.extend(parameter.Value.texts())
+
+    return values
+
+
+def _marked_network(network_source: NetworkSource) -> tuple[NetworkSource, list[int]]:
+    # Copy of the network with a marker in place of every slot value, and
+    # the slots that were marked.
+    marked: list[int] = []
+    numbers = itertools.count(2)
+
+    def marker(slot: int) -> str:
+        marked.append(slot)
+        return f"{MARKER}{slot}{MARKER}"
+
+    title = marker(0) if network_source.Title else network_source.Title
+    comment = marker(1) if network_source.Comment else network_source.Comment
+    plcblocks = network_source.PlcBlocks
+
+    plcblock = _called_block(network_source)
+    if plcblock is not None:
+        plcblock = copy.copy(plcblock)
+        plcblock.Name = marker(next(numbers))
+        if plcblock.PlcType != PlcEnum.Function:
+            plcblock.Database = copy.copy(plcblock.Database)
+            plcblock.Database.Name = marker(next(numbers))
+        parameters = [replace(parameter, Value=parameter.Value.marked(lambda: marker(next(numbers))))
+                      for parameter in plcblock.Parameters]
+        plcblock.Parameters = parameters
+        plcblocks = [plcblock]
+
+    return NetworkSource(Title=title, Comment=comment, PlcBlocks=plcblocks), marked
+
+
 class Access:
     def __init__(self, uid: int, scope: str) -> None:
         if uid == -1:
@@ -338,21 +787,21 @@ class Access:
         return
 
 
-class AccessGlobalVariable(Access):
-    def __init__(self, value: list, uid: int) -> None:
-        super().__init__(uid, "GlobalVariable")
+class AccessVariable(Access):
+    def __init__(self, value: AccessValue, uid: int) -> None:
+        super().__init__(uid, value.Scope)
 
         self._create_symbol_constant("Symbol")
-        ET.SubElement(self.Value, "Component", attrib={'Name': value.Root})
+        for component in value.Components:
+            if not component.Indexes:
+                ET.SubElement(self.Value, "Component",
+                              attrib={'Name': component.Name})
+                continue
 
-        if value.Index:
             Component = ET.SubElement(self.Value, "Component", attrib={
-                'Name': value.Variable, 'AccessModifier': "Array"})
-            Component.append(AccessLiteralConstant(
-                value.Index, "DInt", -1).Access)
-        else:
-            ET.SubElement(self.Value, "Component",
-                          attrib={'Name': value.Variable})
+                'Name': component.Name, 'AccessModifier': "Array"})
+            for index in component.Indexes:
+                Component.append(generate_index(index))
 
         return
 
@@ -422,29 +871,43 @@ def generate_boolean_attributes(struct: VariableStruct) -> ET.Element:
 
 
 def generate_access(parameter: WireParameter, uid: int) -> ET.Element:
-    if parameter.Value.Variable:
-        Access = AccessGlobalVariable(parameter.Value, uid)
+    value = parameter.Value
+    if value.Components:
+        Access = AccessVariable(value, uid)
         return Access.Access
 
-    if parameter.Datatype in ["Int", "Bool", "UInt", "DInt"]:
+    if value.Scope == "LiteralConstant" and parameter.Datatype in ["Int", "Bool", "UInt", "DInt"]:
         Access = AccessLiteralConstant(
-            parameter.Value.Root, parameter.Datatype, uid)
+            value.Constant, parameter.Datatype, uid)
         return Access.Access
 
-    Access = AccessTypedConstant(parameter.Value.Root, uid)
+    Access = AccessTypedConstant(value.Constant, uid)
     return Access.Access
 
 
+def generate_index(value: AccessValue) -> ET.Element:
+    # array indexes have no UId, constant ones are DInt unless typed
+    if value.Components:
+        return AccessVariable(value, -1).Access
+    if value.Scope == "LiteralConstant":
+        return AccessLiteralConstant(value.Constant, "DInt", -1).Access
+    return AccessTypedConstant(value.Constant, -1).Access
+
+
 def export_xml(imports: Imports,
-               plcblock: Siemens.Engineering.SW.Blocks.PlcBlock
+               plcblock: Siemens.Engineering.SW.Blocks.PlcBlock,
+               workspace: Workspace | None = None
                ) -> str:
     SE: Siemens.Engineering = imports.DLL
     FileInfo: FileInfo = imports.FileInfo
 
     logging.info(f"Started export of PlcBlock {plcblock.Name} XML")
 
-    filename = tempfile.mktemp()
-    filepath = Path(filename)
+    # Export refuses a file that exists, so it gets a name no one has taken
+    if workspace:
+        filepath = workspace.path(plcblock.Name, "exports")
+    else:
+        filepath = Path(tempfile.mkdtemp()) / f"{plcblock.Name}.xml"
     plcblock.Export(FileInfo(filepath.absolute().as_posix()),
                     getattr(SE.ExportOptions, "None"))
 
@@ -452,7 +915,8 @@ def export_xml(imports: Imports,
         file.seek(3)  # get rid of the random weird bytes
         xml_data = file.read()
 
-    filepath.unlink()
+    if not workspace:
+        shutil.rmtree(filepath.parent, ignore_errors=True)
 
     logging.debug(f"Extracted XML: {xml_data}")
 
@@ -486,23 +950,8 @@ def import_xml_to_block_group(imports: Imports,
 def locate_blockgroup(plc_software: Siemens.Engineering.HW.Software,
                       blockgroup_folder: PurePosixPath,
                       mkdir: bool = False) -> Siemens.Engineering.SW.Blocks.BlockGroup | None:
-    if not blockgroup_folder.is_absolute():
-        blockgroup_folder = PurePosixPath('/') / blockgroup_folder
-
-    current_blockgroup: Siemens.Engineering.SW.Blocks.PlcBlockGroup | None = plc_software.BlockGroup
-    previous_blockgroup: Siemens.Engineering.SW.Blocks.PlcBlockGroup | None = plc_software.BlockGroup
-    for part in blockgroup_folder.parts:
-        if part == '/':
-            continue
-        current_blockgroup = current_blockgroup.Groups.Find(part)
-        if not current_blockgroup:
-            if mkdir:
-                current_blockgroup = previous_blockgroup.Groups.Create(part)
-            else:
-                return
-        previous_blockgroup = current_blockgroup
-
-    return current_blockgroup
+    # found once per software, see Identities
+    return Identities.of(plc_software).group(blockgroup_folder, mkdir)
 
 
 def find(plc_software: Siemens.Engineering.HW.Software,
@@ -512,23 +961,15 @@ def find(plc_software: Siemens.Engineering.HW.Software,
     if not name:
         return
 
-    blockgroup: Siemens.Engineering.SW.Blocks.PlcBlockGroup = locate_blockgroup(
-        plc_software, blockgroup_folder)
-
-    if not blockgroup:
-        return
-
-    plcblock: Siemens.Engineering.SW.Blocks.PlcBlock = blockgroup.Blocks.Find(
-        name)
-
-    return plcblock
+    return Identities.of(plc_software).block(blockgroup_folder, name)
 
 
 def generate(imports: Imports,
              TIA: Siemens.Engineering.TiaPortal,
              plc_software: Siemens.Engineering.HW.Software,
              data: ProgramBlock,
-             xml: Base
+             xml: Base,
+             workspace: Workspace | None = None
              ):
 
     if isinstance(data, ProgramBlock) and data.IsInstance:
@@ -559,10 +1000,12 @@ def generate(imports: Imports,
             if not blockgroup:
                 return
 
-            blockgroup.Blocks.CreateFrom(mastercopy)
+            Identities.of(plc_software).add_block(
+                data.BlockGroupPath, data.Name, blockgroup.Blocks.CreateFrom(mastercopy))
 
     else:
-        filename: Path = xml.write()
+        filename: Path = xml.write(workspace.path(
+            data.Name, data.DeviceID, data.BlockGroupPath) if workspace else None)
 
         logger.info(f"Written Program Block ({
                     data.Name}) XML data to: {filename}")
@@ -572,6 +1015,8 @@ def generate(imports: Imports,
             xml_location=filename,
             blockgroup_folder=data.BlockGroupPath,
             mkdir=True)
+        Identities.of(plc_software).forget_block(data.Name)
 
-        if filename.exists():
+        # the workspace removes its files at the end of the run
+        if not workspace and filename.exists():
             filename.unlink()
@@ -1,15 +1,41 @@
 from __future__ import annotations
+from dataclasses import fields, is_dataclass
 from enum import Enum
-from pathlib import Path
+from pathlib import Path, PurePath
+from typing import Any, TextIO
+import functools
+import importlib
+import io
+import json
 import logging
+import re
 import tempfile
 import xml.etree.ElementTree as ET
+import zlib
 
 from src.core import logs
+from src.core.cache import CACHE_DIRECTORY, DiskCache, digest
+from src.schemas.compiler import fingerprint
 
 logs.setup(logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# private use character, delimits placeholders in serialized XML
+MARKER: str = "\ue000"
+
+# modules whose code decides what a document holds, see generator_version
+BUILDERS: tuple[str, ...] = (
+    'src.modules.XML', 'src.modules.ProgramBlocks', 'src.modules.BlocksData',
+    'src.modules.BlocksDBInstances', 'src.modules.BlocksFB', 'src.modules.BlocksFC',
+    'src.modules.BlocksOB', 'src.modules.PlcDataTypes')
+# constants of the builders that do not change a document: caches filled
+# while documents are built and their limits
+UNVERSIONED: frozenset[str] = frozenset({
+    'ACCESS_PATHS', 'COMPILE_UNITS', 'FILLED_UNITS', 'MAX_ACCESS_PATHS',
+    'MAX_COMPILE_UNITS', 'MAX_FILLED_UNITS', 'ARTIFACTS_SIZE'})
+ARTIFACTS_DIRECTORY: Path = CACHE_DIRECTORY.parent / 'xml'
+ARTIFACTS_SIZE: int = 128 * 2**20
+
 
 class XMLNS(Enum):
     INTERFACE = "http://www.siemens.com/automation/Openness/SW/Interface/v5"
@@ -31,18 +57,283 @@ class Base:
             self.SWDoc, "AttributeList")
         ET.SubElement(self.AttributeList, "Name").text = name
 
+        # serialized elements, spliced in where their placeholders are
+        self.fragments: list[str] = []
+
+    def append_fragment(self, parent: ET.Element, fragment: str):
+        parent.append(ET.Comment(f"{MARKER}{len(self.fragments)}{MARKER}"))
+        self.fragments.append(fragment)
+
     def export(self, root: ET.Element) -> str:
-        return ET.tostring(root, encoding='utf-8').decode('utf-8')
+        text = ET.tostring(root, encoding='utf-8').decode('utf-8')
+        if not self.fragments:
+            return text
+
+        parts = text.split(f"<!--{MARKER}")
+        out = [parts[0]]
+        for part in parts[1:]:
+            number, rest = part.split(f"{MARKER}-->", 1)
+            out.append(self.fragments[int(number)])
+            out.append(rest)
+
+        return ''.join(out)
 
     def xml(self) -> str:
         return self.export(self.root)
 
-    def write(self) -> Path:
-        with tempfile.NamedTemporaryFile(suffix='.xml', delete=False) as temp:
+    def write(self, filename: Path | None = None) -> Path:
+        return write(self.xml(), filename)
+
+    @classmethod
+    def stream(cls, data: object, out: TextIO):
+        # Writes the document of `data` to `out`. Subclasses that know their
+        # layout write it directly instead of building the tree first.
+        out.write(cls(data).xml())
+
+
+class Writer:
+    # Writes elements straight to a text stream, serialized the way
+    # ET.tostring serializes the same tree.
+
+    def __init__(self, out: TextIO):
+        self.write = out.write
+
+    def start(self, tag: str, attrib: dict[str, str] | None = None):
+        self.write(f"<{tag}{attributes(attrib)}>")
+
+    def end(self, tag: str):
+        self.write(f"</{tag}>")
+
+    def element(self, tag: str, attrib: dict[str, str] | None = None, text: str | None = None):
+        if text:
+            self.write(f"<{tag}{attributes(attrib)}>{
+                       escape_cdata(text)}</{tag}>")
+        else:
+            self.write(f"<{tag}{attributes(attrib)} />")
+
+
+# the escaping ET.tostring applies, kept here rather than taken from its
+# private helpers
+CDATA_ESCAPES: dict[int, str] = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+ATTRIB_ESCAPES: dict[int, str] = str.maketrans({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;',
+    '\r': '&#13;', '\n': '&#10;', '\t': '&#09;'})
+
+
+def escape_cdata(text: str) -> str:
+    return text.translate(CDATA_ESCAPES)
+
+
+def escape_attrib(text: str) -> str:
+    return text.translate(ATTRIB_ESCAPES)
+
+
+def attributes(attrib: dict[str, str] | None) -> str:
+    if not attrib:
+        return ''
+    return ''.join(f' {key}="{escape_attrib(value)}"' for key, value in attrib.items())
+
+
+class Streamed:
+    # The document of `data`, generated only when it is written.
+
+    def __init__(self, xml: type[Base], data: object):
+        self.XML: type[Base] = xml
+        self.data: object = data
+
+    def xml(self) -> str:
+        out = io.StringIO()
+        self.XML.stream(self.data, out)
+        return out.getvalue()
+
+    def write(self, filename: Path | None = None) -> Path:
+        # to `filename`, or a new temporary file
+        if filename is None:
+            temp = tempfile.NamedTemporaryFile('w', encoding='utf-8', newline='',
+                                               suffix='.xml', delete=False)
             filename = Path(temp.name)
-            temp.write(self.xml().encode('utf-8'))
+        else:
+            temp = open(filename, 'w', encoding='utf-8', newline='')
+        with temp:
+            try:
+                self.XML.stream(self.data, temp)
+            except BaseException:
+                temp.close()
+                filename.unlink(missing_ok=True)
+                raise
+
+        return filename
+
+
+class Rendered:
+    # A serialized document, written out again for every import of it.
+
+    def __init__(self, text: str):
+        self.text: str = text
+
+    def xml(self) -> str:
+        return self.text
 
+    def write(self, filename: Path | None = None) -> Path:
+        return write(self.text, filename)
+
+
+class DocumentCache:
+    # Serialized documents by the data object they were generated from, so
+    # projects sharing translated objects generate each of them once. The
+    # data is kept so its id is not reused by another object.
+
+    def __init__(self, artifacts: ArtifactCache | None = None):
+        self.documents: dict[tuple[type, int], tuple[object, Rendered]] = {}
+        self.artifacts: ArtifactCache | None = artifacts
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def render(self, xml: type[Base], data: object) -> Rendered:
+        rendered = self.get(xml, data)
+        if rendered is None:
+            text = self.artifacts.render(xml, data).xml() if self.artifacts else Streamed(xml, data).xml()
+            rendered = self.store(xml, data, text)
+
+        return rendered
+
+    def get(self, xml: type[Base], data: object) -> Rendered | None:
+        entry = self.documents.get((xml, id(data)))
+        if entry is None:
+            return None
+        self.hits += 1
+
+        return entry[1]
+
+    def store(self, xml: type[Base], data: object, text: str) -> Rendered:
+        self.misses += 1
+        rendered = Rendered(text)
+        self.documents[(xml, id(data))] = (data, rendered)
+
+        return rendered
+
+
+@functools.cache
+def generator_version() -> str:
+    # A fingerprint of the code and constants of the builders, as
+    # configuration.VERSION is of the templates, so documents cached by other
+    # code are not reused. The builders import this module, so they are
+    # imported here, late.
+    parts: list[str] = []
+    for name in BUILDERS:
+        for attribute, value in sorted(vars(importlib.import_module(name)).items()):
+            if getattr(value, '__module__', None) == name:
+                parts.append(f"{name}.{attribute}={_builder(value)}")
+            elif attribute.isupper() and attribute not in UNVERSIONED:
+                constant = _constant(value)
+                if constant is not None:
+                    parts.append(f"{name}.{attribute}={constant}")
+
+    return digest(*(part.encode('utf-8') for part in parts))[:16]
+
+
+def _builder(value: Any) -> str:
+    value = getattr(value, '__wrapped__', value)
+    if not isinstance(value, type) or issubclass(value, Enum):
+        return fingerprint(value)
+
+    members: list[str] = [fingerprint(base) for base in value.__bases__]
+    for attribute, member in sorted(vars(value).items()):
+        member = getattr(member, '__func__', member)
+        if hasattr(member, '__code__'):
+            members.append(f"{attribute}={fingerprint(member)}")
+        elif not attribute.startswith('__') and isinstance(member, (str, int, float, tuple, list, dict)):
+            members.append(f"{attribute}={member!r}")
+
+    return f"{value.__qualname__}({', '.join(members)})"
+
+
+def _constant(value: Any) -> str | None:
+    # module constants such as escape tables and patterns; sets in order
+    if isinstance(value, re.Pattern):
+        return f"re({value.pattern!r}, {value.flags})"
+    if isinstance(value, (set, frozenset)):
+        return f"{type(value).__name__}({sorted(map(repr, value))})"
+    if isinstance(value, (str, int, float, tuple, dict)):
+        return fingerprint(value)
+
+    return None
+
+
+def normalized(value: Any) -> Any:
+    # Data as JSON: dataclasses as objects with their type, enums by value,
+    # paths as text. DeviceID does not change a document, so documents of
+    # equal blocks on other devices share their key.
+    if is_dataclass(value) and not isinstance(value, type):
+        return {'': type(value).__qualname__} | {
+            field.name: normalized(getattr(value, field.name))
+            for field in fields(value) if field.name != 'DeviceID'}
+    if isinstance(value, Enum):
+        return normalized(value.value)
+    if isinstance(value, PurePath):
+        return value.as_posix()
+    if isinstance(value, dict):
+        return {str(key): normalized(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalized(item) for item in value]
+
+    return value
+
+
+class ArtifactCache:
+    # Documents of earlier runs, compressed on disk and keyed by a hash of
+    # the builder and the data it was given, under the generator version,
+    # so blocks that did not change are not generated again.
+
+    def __init__(self, directory: Path = ARTIFACTS_DIRECTORY, max_size: int = ARTIFACTS_SIZE):
+        self.disk: DiskCache = DiskCache(
+            f"xml{generator_version()}", directory, max_size)
+
+    def key(self, xml: type[Base], data: object) -> str:
+        return digest(f"{xml.__module__}.{xml.__qualname__}".encode('utf-8'), json.dumps(
+            normalized(data), sort_keys=True, separators=(',', ':')).encode('utf-8'))
+
+    def get(self, key: str) -> str | None:
+        compressed = self.disk.get(key)
+        if compressed is None:
+            return None
+        try:
+            return zlib.decompress(compressed).decode('utf-8')
+        except (zlib.error, TypeError, UnicodeDecodeError) as e:
+            logger.warning(f"Discarding unreadable XML cache entry {key}: {e}")
+            self.disk.path(key).unlink(missing_ok=True)
+            self.disk.hits -= 1
+            self.disk.misses += 1
+            return None
+
+    def put(self, key: str, text: str):
+        self.disk.put(key, zlib.compress(text.encode('utf-8')), evict=False)
+
+    def render(self, xml: type[Base], data: object) -> Rendered:
+        key = self.key(xml, data)
+        text = self.get(key)
+        if text is None:
+            text = Streamed(xml, data).xml()
+            self.put(key, text)
+
+        return Rendered(text)
+
+    def finish(self):
+        # entries were written without eviction, the cap applies from here
+        self.disk.evict()
+        logger.info(f"XML cache: {self.disk.hits} documents reused, {
+                    self.disk.misses} generated")
+
+
+def write(text: str, filename: Path | None = None) -> Path:
+    if filename is not None:
+        filename.write_bytes(text.encode('utf-8'))
         return filename
+    with tempfile.NamedTemporaryFile(suffix='.xml', delete=False) as temp:
+        filename = Path(temp.name)
+        temp.write(text.encode('utf-8'))
+
+    return filename
 
 
 class Document(Base):
@@ -0,0 +1,31 @@
+from schema import Schema, And, Or, Optional
+
+Value = Or(str, int, float, bool)
+
+# start values of an array: a list, a column of a CSV file, a NumPy .npy
+# file or one value repeated
+Column = Schema({
+    "csv": str,
+    Optional("column", default=0): Or(str, And(int, lambda i: i >= 0)),
+    Optional("delimiter", default=","): And(str, lambda d: len(d) == 1),
+    Optional("header", default=True): bool,
+})
+
+Npy = Schema({
+    "npy": str,
+})
+
+Fill = Schema({
+    "fill": Value,
+    "count": And(int, lambda n: n > 0),
+})
+
+VariableArray = Schema({
+    "name": str,
+    "datatype": str,
+    Optional("retain", default=True): bool,
+    Optional("lower_bound", default=0): int,
+    Optional("length"): And(int, lambda n: n > 0),
+    "start_values": Or(And(list, [Value]), Column, Npy, Fill),
+    Optional("attributes", default={}): dict,
+})
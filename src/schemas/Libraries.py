@@ -4,4 +4,6 @@ from schema import Schema, And, Or, Use, Optional, SchemaError
 GlobalLibrary = Schema({
     "path": And(str, Use(Path), lambda p: Path(p)),
     Optional("read_only", default=True): bool,
+    Optional("copy", default="all"): Or("all", "used"),
+    Optional("dependencies", default={}): {Optional(str): [str]},
 })
@@ -2,6 +2,7 @@ from pathlib import PurePosixPath
 from schema import Schema, And, Or, Use, Optional, SchemaError
 
 from src.modules.ProgramBlocks import PlcEnum
+from src.schemas.BlocksDBArrays import VariableArray
 
 VariableStruct = Schema({
     "name": str,
@@ -14,7 +15,7 @@ VariableStruct = Schema({
 VariableSection = Schema({
     "plc_block_id": int,
     "name": str,
-    "data": And(list, [VariableStruct]),
+    "data": And(list, [Or(VariableStruct, VariableArray)]),
 })
 
 PlcBlock = Schema({
@@ -0,0 +1,14 @@
+from schema import Schema, And, Or, Optional
+
+Parameter = Or(
+    [Or(str, int, float, bool)],
+    Schema({"range": And([int], lambda r: 1 <= len(r) <= 3)}),
+)
+
+Template = Schema({
+    "name": str,
+    "parameters": {str: Parameter},
+    Optional("zip", default=False): bool,
+    # any top-level list, e.g. "Program blocks", with {parameter} placeholders
+    Optional(str): And(list, [dict]),
+})
@@ -0,0 +1,334 @@
+from __future__ import annotations
+from enum import Enum
+from typing import Any, Callable
+
+from schema import Schema, And, Or, Use, Optional, Hook, Literal, SchemaError
+
+Check = Callable[[Any], Any]
+
+
+class Invalid(Exception):
+    # Raised by compiled checks without building a message; the caller
+    # re-runs the original schema to get the library's own error.
+    pass
+
+
+def compile_schema(schema: Schema) -> Check:
+    # Turns a schema.Schema tree into nested closures with the same results.
+    # Invalid data is handed back to schema itself, so error messages stay
+    # exactly what they were.
+    check = _compile(schema, False)
+
+    def validate(data: Any) -> Any:
+        try:
+            return check(data)
+        except Invalid:
+            return schema.validate(data)
+
+    return validate
+
+
+def _compile(s: Any, ignore: bool) -> Check:
+    # `ignore` is ignore_extra_keys as Schema passes it down: into raw dicts
+    # and lists, but not through Schema, And or Or, which use their own.
+    if type(s) is Schema:
+        if s._error or s._name:
+            return _fallback(s, ignore)
+        return _compile(s._schema, s._ignore_extra_keys)
+    if type(s) is Optional:
+        if s._error or s._name:
+            return _fallback(s, ignore)
+        return _compile(s._schema, ignore)
+    if type(s) is And:
+        if s._error:
+            return _fallback(s, ignore)
+        return _and([_compile(arg, s._ignore_extra_keys) for arg in s._args])
+    if type(s) is Or:
+        if s._error or s.only_one:
+            return _fallback(s, ignore)
+        return _or(s._args, s._ignore_extra_keys)
+    if type(s) is Use:
+        if s._error:
+            return _fallback(s, ignore)
+        return _use(s._callable)
+    if type(s) in (list, tuple, set, frozenset):
+        return _iterable(type(s), _or(s, ignore))
+    if type(s) is dict:
+        return _dict(s, ignore)
+    if isinstance(s, type):
+        return _type(s)
+    if isinstance(s, Literal) or hasattr(s, 'validate'):
+        return _fallback(s, ignore)
+    if callable(s):
+        return _callable(s)
+
+    def equal(data):
+        if s == data:
+            return data
+        raise Invalid
+
+    return equal
+
+
+def _fallback(s: Any, ignore: bool) -> Check:
+    schema = Schema(s, ignore_extra_keys=ignore)
+
+    def check(data):
+        try:
+            return schema.validate(data)
+        except SchemaError:
+            raise Invalid
+
+    return check
+
+
+def _type(s: type) -> Check:
+    if s is int:
+        def check(data):
+            if isinstance(data, int) and not isinstance(data, bool):
+                return data
+            raise Invalid
+        return check
+
+    def check(data):
+        if isinstance(data, s):
+            return data
+        raise Invalid
+
+    return check
+
+
+def _callable(f: Callable) -> Check:
+    def check(data):
+        try:
+            if f(data):
+                return data
+        except Exception:
+            raise Invalid
+        raise Invalid
+
+    return check
+
+
+def _use(f: Callable) -> Check:
+    if isinstance(f, type) and issubclass(f, Enum):
+        # Enum lookups by value skip Enum.__call__
+        members = f._value2member_map_
+
+        def check(data):
+            try:
+                return members[data]
+            except (KeyError, TypeError):
+                pass
+            try:
+                return f(data)
+            except Exception:
+                raise Invalid
+        return check
+
+    def check(data):
+        try:
+            return f(data)
+        except Exception:
+            raise Invalid
+
+    return check
+
+
+def _and(checks: list[Check]) -> Check:
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(data):
+        for step in checks:
+            data = step(data)
+        return data
+
+    return check
+
+
+def _iterable(kind: type, item: Check) -> Check:
+    def check(data):
+        if not isinstance(data, kind):
+            raise Invalid
+        return type(data)(item(entry) for entry in data)
+
+    return check
+
+
+def _or(args: tuple, ignore: bool) -> Check:
+    checks = [_compile(arg, ignore) for arg in args]
+    if len(checks) == 1:
+        return checks[0]
+    shapes = [_shape(arg, ignore) for arg in args]
+    dispatch: dict[frozenset, list[Check]] = {}
+
+    def candidates(keys: frozenset) -> list[Check]:
+        # Alternatives that can match a dict with these keys, in Or order.
+        # Which one matches first depends only on the key set, so it is
+        # worked out once per set instead of trying each on every entry.
+        found = dispatch.get(keys)
+        if found is None:
+            found = [check for check, shape in zip(checks, shapes)
+                     if shape is None or (shape[1] <= keys
+                                          and (shape[2] or keys <= shape[0]))]
+            dispatch[keys] = found
+        return found
+
+    def check(data):
+        for alternative in (candidates(frozenset(data))
+                            if isinstance(data, dict) else checks):
+            try:
+                return alternative(data)
+            except Invalid:
+                continue
+        raise Invalid
+
+    return check
+
+
+def _shape(s: Any, ignore: bool) -> tuple[frozenset, frozenset, bool] | None:
+    # (allowed keys, required keys, ignore_extra_keys) of a dict schema with
+    # plain string keys, or None when it cannot be told from the keys alone.
+    if type(s) is Schema and not (s._error or s._name):
+        s, ignore = s._schema, s._ignore_extra_keys
+    if type(s) is not dict:
+        return None
+    fields = _fields(s)
+    if fields is None:
+        return None
+    return frozenset(fields[0]), frozenset(fields[1]), ignore
+
+
+def _fields(s: dict) -> tuple[dict, set, list] | None:
+    # Splits a dict schema whose keys are all strings into
+    # (key -> value schema, required keys, defaults).
+    values: dict[str, Any] = {}
+    required: set[str] = set()
+    defaults: list[tuple[str, Any]] = []
+    for skey, svalue in s.items():
+        if type(skey) is Optional and type(skey._schema) is str and not (skey._error or skey._name):
+            values.setdefault(skey._schema, svalue)
+            if hasattr(skey, 'default'):
+                defaults.append((skey.key, skey.default))
+        elif type(skey) is str:
+            # a plain key is tried before an Optional with the same name
+            values[skey] = svalue
+            required.add(skey)
+        else:
+            return None
+    return values, required, defaults
+
+
+def _dict(s: dict, ignore: bool) -> Check:
+    if any(isinstance(skey, Hook) for skey in s):
+        return _fallback(s, ignore)
+    fields = _fields(s)
+    if fields is None:
+        return _generic_dict(s, ignore)
+
+    values = {key: _compile(svalue, ignore) for key, svalue in fields[0].items()}
+    required = frozenset(fields[1])
+    defaults = fields[2]
+
+    def check(data):
+        if not isinstance(data, dict):
+            raise Invalid
+        new = type(data)()
+        nested = None
+        for key, value in data.items():
+            # dict values are validated last, as Schema does
+            if isinstance(value, dict):
+                if nested is None:
+                    nested = []
+                nested.append((key, value))
+                continue
+            step = values.get(key)
+            if step is not None:
+                new[key] = step(value)
+        if nested is not None:
+            for key, value in nested:
+                step = values.get(key)
+                if step is not None:
+                    new[key] = step(value)
+        if not required <= new.keys():
+            raise Invalid
+        if not ignore and len(new) != len(data):
+            raise Invalid
+        for key, default in defaults:
+            if key not in new:
+                new[key] = default() if callable(default) else default
+        return new
+
+    return check
+
+
+def _generic_dict(s: dict, ignore: bool) -> Check:
+    # Dicts keyed by types or other schemas, e.g. {str: str}: every data key
+    # is matched against the schema keys in Schema's priority order.
+    skeys = sorted(s, key=Schema._dict_key_priority)
+    keys = [(skey, _compile(skey, False), _compile(s[skey], ignore))
+            for skey in skeys]
+    required = [skey for skey in s if not isinstance(skey, Optional)]
+    defaults = [skey for skey in s if isinstance(skey, Optional)
+                and hasattr(skey, 'default')]
+
+    def check(data):
+        if not isinstance(data, dict):
+            raise Invalid
+        new = type(data)()
+        coverage = set()
+        for key, value in sorted(data.items(),
+                                 key=lambda item: isinstance(item[1], dict)):
+            for skey, key_check, value_check in keys:
+                try:
+                    nkey = key_check(key)
+                except Invalid:
+                    continue
+                new[nkey] = value_check(value)
+                coverage.add(skey)
+                break
+        if any(skey not in coverage for skey in required):
+            raise Invalid
+        if not ignore and len(new) != len(data):
+            raise Invalid
+        for skey in defaults:
+            if skey not in coverage:
+                new[skey.key] = skey.default() if callable(
+                    skey.default) else skey.default
+        return new
+
+    return check
+
+
+def fingerprint(s: Any) -> str:
+    # Stable description of a schema tree, including the code of its
+    # callables, to version data validated by it.
+    if isinstance(s, Schema):
+        default = f"={s.default!r}" if hasattr(s, 'default') else ''
+        return f"{type(s).__name__}({fingerprint(s._schema)}{default}, {s._ignore_extra_keys}, {s._error!r}, {s._name!r})"
+    if isinstance(s, And):
+        return f"{type(s).__name__}({', '.join(map(fingerprint, s._args))}, {s._ignore_extra_keys}, {getattr(s, 'only_one', False)}, {s._error!r})"
+    if isinstance(s, Use):
+        return f"Use({fingerprint(s._callable)}, {s._error!r})"
+    if type(s) is dict:
+        return "{" + ", ".join(sorted(f"{fingerprint(key)}: {fingerprint(value)}" for key, value in s.items())) + "}"
+    if type(s) in (list, tuple, set, frozenset):
+        return f"{type(s).__name__}({', '.join(map(fingerprint, s))})"
+    if isinstance(s, type) and issubclass(s, Enum):
+        return f"{s.__module__}.{s.__qualname__}{[member.value for member in s]}"
+    if isinstance(s, type):
+        return f"{s.__module__}.{s.__qualname__}"
+    if hasattr(s, '__code__'):
+        return f"{s.__module__}.{s.__qualname__}:{_code(s.__code__)}"
+
+    return repr(s)
+
+
+def _code(code) -> str:
+    # nested functions are code objects among the constants, their repr
+    # holds an address; the order of a frozenset (`in {...}`) is its hash's
+    consts = ", ".join(_code(const) if hasattr(const, 'co_code') else
+                       f"frozenset({sorted(map(repr, const))})" if isinstance(const, frozenset) else
+                       repr(const) for const in code.co_consts)
+    return f"{code.co_code.hex()}:({consts}):{code.co_names!r}"
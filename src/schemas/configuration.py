@@ -1,6 +1,12 @@
 from __future__ import annotations
+from dataclasses import dataclass
+from pathlib import Path
 from schema import Schema, And, Or, Optional
+from typing import Any
+import json
 
+from src.core import templates
+from src.core.cache import DiskCache, digest
 from src.schemas.BlocksDBInstances import InstanceDB
 from src.schemas.BlocksData import GlobalDB
 from src.schemas.BlocksFB import FunctionBlock
@@ -13,6 +19,7 @@ from src.schemas.NetworkSources import NetworkSource, WireTemplate, WireParamete
 from src.schemas.PlcDataTypes import PlcDataType
 from src.schemas.PlcTags import PlcTagTable
 from src.schemas.ProgramBlocks import PlcBlock, VariableSection
+from src.schemas.compiler import compile_schema, fingerprint
 
 root = Schema(
     {
@@ -38,10 +45,124 @@ root = Schema(
         # )]),
         Optional("Instances", default=[]): And(list, [InstanceDB]),
         Optional("Wire parameters", default=[]): And(list, [WireParameter]),
+        # overlays on this config, one project each (see core.variants)
+        Optional("Variants", default={}): {str: dict},
     },
     ignore_extra_keys=True
 )
 
+INCLUDE: str = "include"
+includes = Schema(And(list, [str]))
 
-def validate(data):
-    return root.validate(data)
+# Lists whose entries are looked up by id, and must not reuse one across
+# fragments.
+ID_KEYS: tuple[str, ...] = (
+    "devices", "Program blocks", "Network sources", "Instances")
+
+compiled = compile_schema(root)
+# entries are cached after template expansion, so its code is part of it
+VERSION: str = digest(fingerprint(root).encode(), fingerprint(templates.Template).encode(), *(
+    fingerprint(function).encode() for _, function in sorted(vars(templates).items())
+    if callable(function) and getattr(function, '__module__', None) == templates.__name__))[:16]
+
+
+class IdCollisionError(ValueError):
+    def __init__(self, collisions: list[tuple[str, Any, list[str]]]):
+        self.collisions: list[tuple[str, Any, list[str]]] = collisions
+        super().__init__("Config fragments reuse ids: " + "; ".join(
+            f"{key} id {id} in {', '.join(files)}" for key, id, files in collisions))
+
+
+@dataclass
+class Fragment:
+    Config: dict  # validated content of this file alone
+    Keys: list[str]  # top-level keys set in the file
+    Includes: list[str]  # as written, relative to the file
+
+
+def validate(data, directory: Path | None = None):
+    # `directory` resolves relative includes, the working directory if None.
+    data = templates.expand(data)
+    if not isinstance(data, dict) or INCLUDE not in data:
+        return compiled(data)
+
+    fragment = Fragment(compiled(data), list(data),
+                        includes.validate(data[INCLUDE]))
+    return merge(collect("config", fragment, directory or Path.cwd(), None, []))
+
+
+def load(path: Path, cache: DiskCache | None = None) -> dict:
+    # Validated config of a JSON file and the files it includes. Every file
+    # is cached on its own, so only the ones whose content changed are
+    # parsed and validated again.
+    path = path.absolute()
+    fragment = load_fragment(path, cache)
+    if not fragment.Includes:
+        return fragment.Config
+
+    return merge(collect(str(path), fragment, path.parent, cache, [path]))
+
+
+def load_fragment(path: Path, cache: DiskCache | None = None) -> Fragment:
+    data = path.read_bytes()
+    key = digest(data)
+    fragment = cache.get(key) if cache else None
+    if fragment is None:
+        raw = templates.expand(json.loads(data))
+        config = compiled(raw)
+        fragment = Fragment(config, list(raw),
+                            includes.validate(raw.get(INCLUDE, [])))
+        if cache:
+            cache.put(key, fragment)
+
+    return fragment
+
+
+def collect(name: str, fragment: Fragment, directory: Path, cache: DiskCache | None,
+            stack: list[Path], seen: set[Path] | None = None) -> list[tuple[str, Fragment]]:
+    # The fragment and everything it includes, depth first in include order.
+    # A file included twice is used once; including an ancestor is an error.
+    seen = set(stack) if seen is None else seen
+    fragments = [(name, fragment)]
+    for include in fragment.Includes:
+        path = (directory / include).absolute()
+        if path in stack:
+            raise ValueError(f"Config includes itself: {
+                             ' -> '.join(map(str, stack + [path]))}")
+        if path in seen:
+            continue
+        seen.add(path)
+        fragments += collect(str(path), load_fragment(path, cache),
+                             path.parent, cache, stack + [path], seen)
+
+    return fragments
+
+
+def merge(fragments: list[tuple[str, Fragment]]) -> dict:
+    # Lists are concatenated in include order, other values are taken from
+    # the first file that sets them.
+    config: dict = {}
+    explicit: set[str] = set()
+    owners: dict[str, dict[Any, list[str]]] = {key: {} for key in ID_KEYS}
+    for name, fragment in fragments:
+        for key, value in fragment.Config.items():
+            if isinstance(value, list):
+                # always a new list, defaults are shared by validated configs
+                config.setdefault(key, []).extend(value)
+            elif key in fragment.Keys and key not in explicit:
+                config[key] = value
+                explicit.add(key)
+            else:
+                config.setdefault(key, value)
+        for key in ID_KEYS:
+            for entry in fragment.Config.get(key, []):
+                names = owners[key].setdefault(entry.get("id"), [])
+                if name not in names:
+                    names.append(name)
+
+    collisions = [(key, id, names) for key, ids in owners.items()
+                  for id, names in ids.items() if len(names) > 1]
+    if collisions:
+        raise IdCollisionError(collisions)
+
+    return config
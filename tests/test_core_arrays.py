@@ -0,0 +1,88 @@
+from pathlib import Path
+import json
+import time
+
+import pytest
+
+from src.core import core, validation
+from src.modules.BlocksDBArrays import format_values
+from src.modules.XML import Streamed
+from src.schemas import configuration
+import src.modules.BlocksData as BlocksData
+
+BASE_DIR = Path(__file__).parent
+
+global_dbs = BASE_DIR / "configs" / "global_dbs.json"
+
+
+def test_recipe_from_csv(tmp_path, monkeypatch):
+    # the CSV is next to the config, not in the working directory
+    monkeypatch.chdir(BASE_DIR)
+    with open(tmp_path / "recipe.csv", "w") as file:
+        file.write("step;speed\n")
+        file.writelines(f"{step};{step * 0.25}\n" for step in range(100000))
+    with open(global_dbs) as file:
+        config = json.load(file)
+    config["Variable sections"][0]["data"].extend([
+        {"name": "Speeds", "datatype": "LReal", "lower_bound": 1,
+         "start_values": {"csv": "recipe.csv", "column": "speed", "delimiter": ";"}},
+        {"name": "Names", "datatype": "String[8]", "length": 4, "retain": False,
+         "start_values": ["A&B", "it's", "$1"]},
+    ])
+
+    start = time.perf_counter()
+    translation = core.translate(configuration.validate(config), {}, directory=tmp_path)
+    db = next(plc for plc in translation.DataBlocks[1] if plc.Name == "DB_Event_Queue")
+    text = Streamed(BlocksData.XML, db).xml()
+    assert time.perf_counter() - start < 10
+
+    assert text == BlocksData.XML(db).xml()
+    assert validation.check(text) == []
+    assert ('<Member Name="Speeds" Datatype="Array[1..100000] of LReal" Remanence="Retain" '
+            'Accessibility="Public"><Subelement Path="1"><StartValue>0.0</StartValue></Subelement>'
+            '<Subelement Path="2"><StartValue>0.25</StartValue></Subelement>') in text
+    assert ('<Member Name="Names" Datatype="Array[0..3] of String[8]" Remanence="NonRetain" '
+            'Accessibility="Public"><Subelement Path="0"><StartValue>\'A&amp;B\'</StartValue>'
+            '</Subelement><Subelement Path="1"><StartValue>\'it$\'s\'</StartValue></Subelement>'
+            '<Subelement Path="2"><StartValue>\'$$1\'</StartValue></Subelement></Member>') in text
+
+
+def test_start_values_are_checked():
+    assert format_values("Bool", [True, 0, "TRUE"]) == ["true", "false", "true"]
+    assert format_values("Word", [255, "16#ff"]) == ["16#00FF", "16#00FF"]
+    assert format_values("Real", [1, "1e20", -0.5]) == ["1.0", "1.0e+20", "-0.5"]
+    assert format_values("Time", [" T#5s"]) == ["T#5s"]
+
+    with pytest.raises(ValueError, match=r"Start value 2 \(128\) is not a valid SInt"):
+        format_values("SInt", [1, -128, 128])
+    with pytest.raises(ValueError, match=r"Start value 1 \(1.5\) is not a valid Int"):
+        format_values("Int", [1, 1.5])
+    with pytest.raises(ValueError, match=r"Start value 0 \('abc'\) is not a valid String\[2\]"):
+        format_values("String[2]", ["abc"])
+    with pytest.raises(ValueError, match="only arrays of elementary types"):
+        format_values('"Motor_UDT"', [1])
+
+    with open(global_dbs) as file:
+        config = json.load(file)
+    config["Variable sections"][0]["data"] = [
+        {"name": "A", "datatype": "Int", "length": 2, "start_values": {"fill": 0, "count": 3}}]
+    with pytest.raises(ValueError, match="A has 2 elements but 3 start values"):
+        core.translate(configuration.validate(config), {})
+
+
+def test_start_values_next_to_the_config(tmp_path, monkeypatch):
+    monkeypatch.chdir(BASE_DIR)
+    (tmp_path / "plant").mkdir()
+    (tmp_path / "plant" / "recipe.csv").write_text("speed\n1.5\n2.5\n")
+    with open(global_dbs) as file:
+        config = json.load(file)
+    config["Variable sections"][0]["data"].append(
+        {"name": "Speeds", "datatype": "LReal", "start_values": {"csv": "recipe.csv", "column": "speed"}})
+    path = tmp_path / "plant" / "config.json"
+    path.write_text(json.dumps(config))
+    project = {"name": "Plant", "directory": tmp_path, "overwrite": True}
+
+    plan = core.plan(configuration.load(path) | project, {}, path.parent)
+    streamed = [operations.Documents for operations in core.stream_plans(path, project, {})]
+    for documents in (plan.Documents, *streamed[1:]):
+        assert any("<StartValue>2.5</StartValue>" in text for text in documents.values())
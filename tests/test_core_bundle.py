@@ -0,0 +1,66 @@
+from pathlib import Path
+import json
+import sys
+import zipfile
+
+import pytest
+
+from src.core import bundle, core
+from src.schemas import configuration
+
+BASE_DIR = Path(__file__).parent
+
+smc = BASE_DIR / "configs" / "smc.json"
+libraries = BASE_DIR / "configs" / "multiple_devices_with_libraries.json"
+
+
+def load(config_path: Path) -> dict:
+    with open(config_path) as file:
+        return configuration.validate(json.load(file)) | {
+            "name": config_path.stem, "directory": Path("/build/projects"), "overwrite": True}
+
+
+def test_replayed_plan_is_the_built_one(tmp_path):
+    config = load(smc)
+    built = core.build_bundle(config, {"xml_workers": 2}, tmp_path / "smc.zip")
+    # nothing of Openness is needed to build a bundle
+    assert "clr" not in sys.modules
+
+    replayed = bundle.read(tmp_path / "smc.zip")
+    assert replayed.Operations == built.Operations
+    assert replayed.Documents == built.Documents == core.plan(config, {}).Documents
+    assert [path.name for path in tmp_path.iterdir()] == ["smc.zip"]
+
+    with zipfile.ZipFile(tmp_path / "smc.zip") as archive:
+        manifest = json.loads(archive.read(bundle.MANIFEST))
+    assert [document["Key"] for document in manifest["Documents"]] == list(dict.fromkeys(
+        operation.Args["document"] for operation in built.Operations if "document" in operation.Args))
+
+
+def test_damaged_bundles_are_refused(tmp_path):
+    path = tmp_path / "smc.zip"
+    core.build_bundle(load(smc), {}, path)
+    with zipfile.ZipFile(path) as archive:
+        entries = {name: archive.read(name) for name in archive.namelist()}
+    name = next(name for name in entries if name.startswith(bundle.DOCUMENTS))
+    entries[name] = entries[name][:-1] + b" "
+    with zipfile.ZipFile(path, "w") as archive:
+        for entry, data in entries.items():
+            archive.writestr(entry, data)
+
+    with pytest.raises(ValueError, match=f"has a damaged {name}"):
+        bundle.read(path)
+
+
+def test_relocate(tmp_path):
+    plan = core.build_bundle(load(libraries), {}, tmp_path / "libraries.zip")
+    assert any(operation.Kind == "open_library" for operation in plan.Operations)
+
+    plan = bundle.relocate(bundle.read(tmp_path / "libraries.zip"), Path("D:/Projects"),
+                           Path("D:/Libraries"))
+    for operation in plan.Operations:
+        if operation.Kind == "create_project":
+            assert operation.Args["directory"] == str(Path("D:/Projects"))
+        if operation.Kind == "open_library":
+            assert operation.Args["path"].startswith("D:/Libraries/")
+    assert bundle.name("C:\\Libs\\Motors.al18") == bundle.name("/libs/Motors.al18") == "Motors.al18"
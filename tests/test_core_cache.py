@@ -0,0 +1,124 @@
+from pathlib import Path
+import copy
+import json
+import os
+import subprocess
+import sys
+
+from src.core import core, planner
+from src.core.cache import DiskCache
+from src.modules.XML import ArtifactCache, generator_version
+from src.schemas import configuration
+import src.modules.ProgramBlocks as ProgramBlocks
+
+BASE_DIR = Path(__file__).parent
+
+smc = BASE_DIR / "configs" / "smc.json"
+
+
+def test_load_uses_cache(tmp_path):
+    cache = DiskCache(configuration.VERSION, tmp_path)
+    with open(smc) as file:
+        expected = configuration.validate(json.load(file))
+
+    assert configuration.load(smc, cache) == expected
+    assert configuration.load(smc, cache) == expected
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # a changed file is a different key
+    changed = tmp_path / "changed.json"
+    changed.write_text(smc.read_text().replace("Main", "Main_1", 1))
+    assert configuration.load(changed, cache) != expected
+    assert cache.misses == 2
+
+
+def test_stale_and_broken_entries(tmp_path):
+    DiskCache("old", tmp_path).put("key", {"a": 1})
+    cache = DiskCache("new", tmp_path)
+
+    # entries of another version are removed on open
+    assert list(tmp_path.iterdir()) == []
+    assert cache.get("key") is None
+
+    cache.put("key", {"a": 1})
+    cache.path("key").write_bytes(b"not a pickle")
+    assert cache.get("key") is None
+    assert not cache.path("key").exists()
+
+
+def test_eviction_keeps_recently_used(tmp_path):
+    value = "x" * 1000
+    cache = DiskCache("v1", tmp_path, max_size=3500)
+    for index, key in enumerate(("a", "b", "c")):
+        cache.put(key, value)
+        os.utime(cache.path(key), (index, index))
+    cache.get("a")  # now the most recently used
+    cache.put("d", value)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("d") == value
+    assert sum(entry.stat().st_size for entry in tmp_path.iterdir()) <= 3500
+
+
+def test_generated_documents_are_reused(tmp_path):
+    with open(smc) as file:
+        config = configuration.validate(json.load(file)) | {
+            "name": "Plant", "directory": Path("projects"), "overwrite": True}
+    expected = planner.build(core.translate(config, {}), config)
+
+    artifacts = ArtifactCache(tmp_path)
+    assert planner.build(core.translate(config, {}), config,
+                         artifacts=artifacts) == expected
+    assert (artifacts.disk.hits, artifacts.disk.misses) == (0, len(expected.Documents))
+    stored = sum(entry.stat().st_size for entry in tmp_path.iterdir())
+    assert stored < sum(len(text) for text in expected.Documents.values())
+
+    # a fresh translation of the same config hashes to the same keys
+    artifacts = ArtifactCache(tmp_path)
+    assert planner.build(core.translate(config, {}), config,
+                         artifacts=artifacts) == expected
+    assert (artifacts.disk.hits, artifacts.disk.misses) == (len(expected.Documents), 0)
+
+    artifacts.disk.max_size = stored // 2
+    artifacts.finish()
+    assert sum(entry.stat().st_size for entry in tmp_path.iterdir()) <= stored // 2
+
+
+def test_artifact_keys(tmp_path):
+    with open(smc) as file:
+        translation = core.translate(configuration.validate(json.load(file)), {})
+    block = translation.PlcBlocks[1][0]
+    artifacts = ArtifactCache(tmp_path)
+
+    # the same block on another device has the same key, another block not
+    moved = copy.deepcopy(block)
+    moved.DeviceID += 1
+    renamed = copy.deepcopy(block)
+    renamed.Name += "2"
+    xml = type(block)
+    assert artifacts.key(xml, moved) == artifacts.key(xml, block) != artifacts.key(xml, renamed)
+
+    # the version follows the code, not the hash seed of the process
+    versions = {subprocess.run(
+        [sys.executable, "-c", "from src.modules.XML import generator_version; print(generator_version())"],
+        capture_output=True, text=True, check=True, cwd=BASE_DIR.parent,
+        env=os.environ | {"PYTHONHASHSEED": seed}).stdout.strip() for seed in ("1", "2")}
+    assert versions == {generator_version()}
+
+
+def test_version_follows_builder_constants(monkeypatch):
+    version = generator_version()
+    # documents built meanwhile fill caches, which do not change a document
+    with open(smc) as file:
+        config = configuration.validate(json.load(file)) | {
+            "name": "Plant", "directory": Path("projects"), "overwrite": True}
+    core.plan(config, {})
+    generator_version.cache_clear()
+    assert generator_version() == version
+
+    monkeypatch.setattr(ProgramBlocks, "SLOT_BASE", ProgramBlocks.SLOT_BASE + 1)
+    generator_version.cache_clear()
+    assert generator_version() != version
+    monkeypatch.undo()
+    generator_version.cache_clear()
@@ -0,0 +1,91 @@
+from pathlib import PurePosixPath
+import os
+
+from src.core import catalog, planner
+import src.modules.Libraries as Libraries
+
+
+class Listed(list):
+    # an Openness collection, counting its listings and searches
+    calls: int = 0
+
+    def __iter__(self):
+        Listed.calls += 1
+        return super().__iter__()
+
+    def Find(self, name: str):
+        Listed.calls += 1
+        return next((item for item in list.__iter__(self) if item.Name == name), None)
+
+
+class Item:
+    def __init__(self, name: str, **children):
+        self.Name = name
+        for attribute, value in children.items():
+            setattr(self, attribute, value)
+
+
+def folder(name: str, mastercopies: list[str], folders: list[Item] = []) -> Item:
+    return Item(name, MasterCopies=Listed(Item(mastercopy) for mastercopy in mastercopies),
+                Folders=Listed(folders))
+
+
+def library_file(directory):
+    (directory / "Motors" / "System").mkdir(parents=True)
+    (directory / "Motors" / "System" / "PEData.plf").write_bytes(b"mastercopies")
+    path = directory / "Motors" / "Motors.al19"
+    path.write_bytes(b"library")
+
+    return path
+
+
+def test_catalog_replaces_the_walk(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "CATALOG_DIRECTORY", tmp_path / "catalogs")
+    path = library_file(tmp_path)
+    drives = folder("Drives", ["Motor", "Pump"], [folder("Bins", ["Bin"])])
+    library = Item("Motors", MasterCopyFolder=folder("Master copies", ["Valve"], [drives]))
+
+    # the first run walks the library and writes its catalog
+    Libraries.FILES["Motors"] = path
+    assert Libraries.find_mastercopy(library, PurePosixPath("/Drives"), "Pump").Name == "Pump"
+    Libraries.clear()
+    written = catalog.load(path)
+    assert written.Folders == ["/", "/Drives", "/Drives/Bins"]
+    assert ["/Drives/Bins", "Bin", ""] in written.MasterCopies
+
+    # later runs only find what they use
+    Libraries.FILES["Motors"] = path
+    Listed.calls = 0
+    assert Libraries.find_mastercopy(library, PurePosixPath("/Drives/Bins"), "Bin").Name == "Bin"
+    assert Listed.calls == 3
+    assert Libraries.find_mastercopy(library, PurePosixPath("/Drives"), "Bin") is None
+    assert Libraries.find_mastercopy(library, PurePosixPath("/Pumps"), "Pump") is None
+    assert Libraries.locate_mastercopyfolder(library, PurePosixPath("/Drives")).Name == "Drives"
+    assert Listed.calls == 3
+    Libraries.clear()
+
+
+def test_catalog_follows_its_library(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "CATALOG_DIRECTORY", tmp_path / "catalogs")
+    path = library_file(tmp_path)
+    catalog.save(catalog.create(path, "Motors", ["/", "/Drives"], [["/Drives", "Motor", ""]]))
+
+    plan = planner.Plan()
+    plan.add("open_library", path=path.as_posix(), read_only=True)
+    for name in ("Motor", "Pump"):
+        plan.add("create_from_mastercopy", device=1, name=name, group="/",
+                 library="Motors", folder="Drives")
+    assert catalog.check_plan(plan) == ["Pump in Drives of library Motors (device 1)"]
+
+    # touched but the same: kept; changed: built again
+    data = path.parent / "System" / "PEData.plf"
+    os.utime(data, ns=(4 * 10**18, 4 * 10**18))
+    assert catalog.load(path).MTime == 4 * 10**18
+    (path.parent / "Logs").mkdir()
+    (path.parent / "Logs" / "open.log").write_text("opened")
+    (path.parent / "Pumps.al19").write_bytes(b"another library")
+    assert catalog.load(path) is not None
+    data.write_bytes(b"mastercopieS")
+    os.utime(data, ns=(5 * 10**18, 5 * 10**18))
+    assert catalog.load(path) is None
+    assert catalog.check_plan(plan) == []
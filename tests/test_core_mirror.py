@@ -0,0 +1,81 @@
+from pathlib import Path
+import os
+
+import pytest
+
+from src.core.mirror import Mirror
+import src.modules.Libraries as Libraries
+
+
+def library_file(directory: Path) -> Path:
+    (directory / "share" / "Motors" / "System").mkdir(parents=True)
+    (directory / "share" / "Motors" / "System" / "PEData.plf").write_bytes(b"mastercopies")
+    path = directory / "share" / "Motors" / "Motors.al19"
+    path.write_bytes(b"library")
+
+    return path
+
+
+def test_libraries_are_mirrored_by_content(tmp_path):
+    path = library_file(tmp_path)
+    (path.parent / "Logs").mkdir()
+    (path.parent / "Logs" / "open.log").write_text("opened")
+    (path.parent / "Pumps.al19").write_bytes(b"another library")
+    mirror = Mirror(tmp_path / "mirror")
+
+    local = mirror.local(path)
+    assert local.read_bytes() == b"library" and local.parent.name == "Motors"
+    assert (local.parent / "System" / "PEData.plf").exists()
+    assert not (local.parent / "Logs").exists() and not (local.parent / "Pumps.al19").exists()
+    assert mirror.local(path) == local
+    assert (mirror.hits, mirror.misses) == (1, 1)
+
+    # touched only: the same copy
+    os.utime(path, ns=(4 * 10**18, 4 * 10**18))
+    assert mirror.local(path) == local and mirror.hits == 2
+
+    # changed: a new copy, the old one is gone
+    (path.parent / "System" / "PEData.plf").write_bytes(b"more mastercopies")
+    changed = mirror.local(path)
+    assert changed != local and not local.exists()
+    assert (changed.parent / "System" / "PEData.plf").read_bytes() == b"more mastercopies"
+    assert [entry.suffix for entry in (tmp_path / "mirror").iterdir()].count(".tmp") == 0
+
+
+class Item:
+    def __init__(self, name: str, **children):
+        self.Name = name
+        for attribute, value in children.items():
+            setattr(self, attribute, value)
+
+
+def test_open_libraries_are_reused(tmp_path):
+    path = library_file(tmp_path)
+    library = Item("Motors", Path=Item("Motors.al19", FullName=str(path)), IsReadOnly=True)
+    TIA = Item("TIA", GlobalLibraries=[library])
+    imports = Item("imports", DLL=None, FileInfo=None)
+
+    data = Libraries.GlobalLibrary(path, True)
+    assert Libraries.import_library(imports, data, TIA, Mirror(tmp_path / "mirror")) is library
+    # nothing was copied for a library that is open, and it gets its catalog
+    assert list((tmp_path / "mirror").iterdir()) == []
+    assert Libraries.FILES["Motors"] == path
+
+    with pytest.raises(ValueError, match="is open read-only"):
+        Libraries.import_library(imports, Libraries.GlobalLibrary(path, False), TIA)
+    other = tmp_path / "other" / "Motors" / "Motors.al19"
+    with pytest.raises(ValueError, match="is open from"):
+        Libraries.import_library(imports, Libraries.GlobalLibrary(other, True), TIA)
+    Libraries.clear()
+
+
+def test_copies_of_other_runs_are_kept(tmp_path):
+    path = library_file(tmp_path)
+    mirror = Mirror(tmp_path / "mirror")
+    local = mirror.local(path)
+    (local.parent / "System" / "open.lock").write_text("open in TIA Portal")
+
+    # another run, which found no copy, copies the same content
+    Mirror(tmp_path / "mirror").copy(path, local.parent.parent)
+    assert (local.parent / "System" / "open.lock").exists()
+    assert [entry.name for entry in (tmp_path / "mirror").iterdir() if entry.suffix == ".tmp"] == []
@@ -0,0 +1,139 @@
+from pathlib import Path
+import copy
+import json
+
+from src.core import core, planner
+from src.schemas import configuration
+
+BASE_DIR = Path(__file__).parent
+
+smc = BASE_DIR / "configs" / "smc.json"
+plc_tags = BASE_DIR / "configs" / "plc_tags.json"
+multiple_devices_with_plc_data_types = BASE_DIR / \
+    "configs" / "multiple_devices_with_plc_data_types.json"
+
+PROJECT = {"name": "Plant", "directory": Path("projects"), "overwrite": True}
+
+
+def build(config_path: Path, workers: int = 1) -> planner.Plan:
+    with open(config_path) as file:
+        config = configuration.validate(json.load(file)) | PROJECT
+    return planner.build(core.translate(config, {}), config, workers=workers)
+
+
+def kinds(plan: planner.Plan) -> list[str]:
+    return [operation.Kind for operation in plan.Operations]
+
+
+def test_plan_follows_execution_order():
+    plan = build(multiple_devices_with_plc_data_types)
+    order = kinds(plan)
+
+    assert order[0] == "create_project"
+    assert plan.Operations[0].Args["directory"] == "projects"
+    devices = [operation.Args["device"] for operation in plan.Operations
+               if operation.Kind == "create_device"]
+    assert order[1:1 + len(devices)] == ["create_device"] * len(devices)
+    # every device imports every data type, from one stored document
+    imports = [operation for operation in plan.Operations
+               if operation.Kind == "import_type"]
+    assert len(imports) == len(devices) * len(plan.Documents)
+    assert {operation.Args["document"]
+            for operation in imports} == set(plan.Documents)
+
+
+def test_optimize_merges_tags_and_drops_duplicate_groups():
+    plan = build(plc_tags)
+    optimized = planner.optimize(plan)
+
+    tags = sum(operation.Kind == "create_tag" for operation in plan.Operations)
+    merged = [operation for operation in optimized.Operations
+              if operation.Kind == "create_tags"]
+    assert "create_tag" not in kinds(optimized)
+    assert sum(len(operation.Args["tags"]) for operation in merged) == tags
+    assert len(merged) == kinds(plan).count("create_tag_table")
+
+    plan = build(smc)
+    optimized = planner.optimize(plan)
+    # one operation creates the folders of a device, parents first
+    groups = [operation.Args for operation in optimized.Operations
+              if operation.Kind == "create_groups"]
+    assert "create_group" not in kinds(plan)
+    assert [args["device"] for args in groups] == list(dict.fromkeys(
+        operation.Args["device"] for operation in plan.Operations if operation.Kind == "import_block"))
+    for args in groups:
+        blocks = {operation.Args["group"] for operation in plan.Operations
+                  if operation.Kind == "import_block" and operation.Args["device"] == args["device"]}
+        assert len(args["paths"]) == len(set(args["paths"]))
+        assert blocks - {"/"} <= set(args["paths"])
+        assert all(str(Path(path).parent) in args["paths"] + ["/"] for path in args["paths"])
+    assert [operation for operation in optimized.Operations
+            if operation.Kind == "import_block"] == [operation for operation in plan.Operations
+                                                     if operation.Kind == "import_block"]
+
+
+def test_optimize_opens_libraries_once():
+    plan = planner.Plan()
+    for name in ("A", "B"):
+        plan.add("create_project", name=name,
+                 directory="projects", overwrite=True)
+        plan.add("open_library", path="libraries/Motors.al19", read_only=True)
+        plan.add("create_device", device=1, type_identifier="PLC",
+                 name="PLC_1", device_name="")
+        plan.add("create_group", device=1, path="/Motors/Drives")
+        plan.add("create_group", device=1, path="/Motors")
+
+    assert kinds(planner.optimize(plan)) == [
+        "create_project", "open_library", "create_device", "create_group",
+        "create_project", "create_device", "create_group"]
+
+
+def test_plan_round_trip_and_estimate(tmp_path):
+    plan = planner.optimize(build(smc))
+    plan.save(tmp_path / "plan.json")
+    loaded = planner.Plan.load(tmp_path / "plan.json")
+
+    assert loaded == plan
+
+    costs = planner.DEFAULT_COSTS | {"import_block": 10.0}
+    totals = planner.estimate(loaded, costs)
+    assert totals["import_block"] == (kinds(plan).count("import_block"),
+                                      10.0 * kinds(plan).count("import_block"))
+    assert sum(count for count, _ in totals.values()) == len(plan.Operations)
+    assert "total" in planner.describe(loaded, costs)
+
+
+def test_parallel_generation_matches_serial():
+    plan = build(smc)
+
+    assert build(smc, workers=3) == plan
+    assert list(build(smc, workers=3).Documents) == list(plan.Documents)
+
+    # rendering leaves the translated blocks as they were
+    with open(smc) as file:
+        config = configuration.validate(json.load(file)) | PROJECT
+    translation = core.translate(config, {})
+    before = copy.deepcopy(translation)
+    planner.build(translation, config)
+    assert translation.PlcDataTypes == before.PlcDataTypes
+    for blocks in ("DataBlocks", "PlcBlocks"):
+        assert {device: value for device, value in getattr(translation, blocks).items()
+                if value} == getattr(before, blocks)
+
+
+def test_instances_without_a_library_source_are_skipped():
+    with open(smc) as file:
+        config = configuration.validate(json.load(file)) | PROJECT
+    translation = core.translate(config, {})
+    instances = [plc for plc in translation.PlcBlocks[1] if plc.IsInstance and not plc.LibraryData.Name]
+    assert instances
+    for plc in instances:
+        plc.BlockGroupPath = "/Unsourced"
+
+    plan = planner.build(translation, config)
+    copies = [operation.Args["name"] for operation in plan.Operations
+              if operation.Kind == "create_from_mastercopy"]
+    assert copies and not {plc.Name for plc in instances} & set(copies)
+    groups = [path for operation in plan.Operations if operation.Kind == "create_groups"
+              for path in operation.Args["paths"]]
+    assert "/Unsourced" not in groups
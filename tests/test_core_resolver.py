@@ -0,0 +1,128 @@
+from pathlib import Path
+import json
+
+import pytest
+
+from src.core.core import helper_clean_variable_sections, helper_clean_network_sources, helper_clean_wires, helper_get_plcblock_name
+from src.core.graph import NetworkCycleError
+from src.core.resolver import Resolver
+from src.modules.ProgramBlocks import PlcEnum
+from src.schemas import configuration
+
+BASE_DIR = Path(__file__).parent
+smc = BASE_DIR / "configs" / "smc.json"
+
+
+CONFIG = None
+with open(smc) as file:
+    CONFIG = configuration.validate(json.load(file))
+
+
+def test_resolver_matches_linear_helpers():
+    resolver = Resolver(CONFIG)
+
+    for block in CONFIG.get('Program blocks'):
+        assert helper_clean_variable_sections(
+            CONFIG.get('Variable sections'), block.get('id')
+        ) == helper_clean_variable_sections(
+            CONFIG.get('Variable sections'), block.get('id'), resolver)
+
+        assert helper_clean_wires(
+            block.get('name'), block.get('id'),
+            CONFIG.get('Wire parameters'), CONFIG.get('Wire template')
+        ) == helper_clean_wires(
+            block.get('name'), block.get('id'),
+            CONFIG.get('Wire parameters'), CONFIG.get('Wire template'), resolver)
+
+        assert helper_get_plcblock_name(
+            block.get('id'), CONFIG.get('Program blocks')
+        ) == block.get('name')
+
+
+def test_resolver_lookup_order():
+    resolver = Resolver({
+        'Program blocks': [
+            {'id': 1, 'name': "First"},
+            {'id': 1, 'name': "Second"},
+        ],
+        'Wire parameters': [
+            {'plc_block_id': 1, 'parameters': {'en': "A"}},
+            {'plc_block_id': 1, 'parameters': {'en': "B"}},
+        ],
+    })
+
+    # first block wins, last wire parameters win (as with the old scans)
+    assert resolver.block_name(1) == "First"
+    assert resolver.block_name(2) == ""
+    assert resolver.wire_parameters(1) == {'en': "B"}
+    assert resolver.network_sources(1) == []
+
+
+def test_compact_model_shares_strings_and_attributes():
+    resolver = Resolver(CONFIG)
+
+    structs = [struct
+               for block in CONFIG.get('Program blocks')
+               for section in helper_clean_variable_sections(None, block.get('id'), resolver)
+               for struct in section.Structs]
+    empty = [struct.Attributes for struct in structs if not struct.Attributes]
+    assert len(empty) > 1
+    assert all(attributes is empty[0] for attributes in empty)
+
+    with pytest.raises(TypeError):
+        empty[0]['ExternalAccessible'] = True
+
+    assert not hasattr(structs[0], '__dict__')
+
+
+def test_nested_network_sources():
+    for ob in CONFIG.get('Program blocks'):
+        networks = helper_clean_network_sources(
+            CONFIG.get('Network sources'),
+            CONFIG.get('Program blocks'),
+            CONFIG.get('Variable sections'),
+            ob.get('id'),
+            CONFIG.get('Wire template'),
+            CONFIG.get('Wire parameters'),
+            CONFIG.get('Instances'),
+            Resolver(CONFIG),
+        )
+        assert len(networks) == len(
+            [n for n in CONFIG.get('Network sources')
+             if n.get('plc_block_id') == ob.get('id')])
+
+
+def nested_config(calls: dict[int, list[int]]) -> dict:
+    return {
+        'Program blocks': [
+            {'id': block_id, 'DeviceID': 1, 'type': PlcEnum.FunctionBlock,
+             'name': f"FB_{block_id}", 'network_source_id': caller * 100}
+            for caller, callees in calls.items() for block_id in callees
+        ] + [{'id': 1, 'DeviceID': 1, 'type': PlcEnum.OrganizationBlock, 'name': "Main"}],
+        'Network sources': [
+            {'id': block_id * 100, 'plc_block_id': block_id}
+            for block_id in calls
+        ],
+    }
+
+
+def test_network_graph_shares_nested_blocks():
+    resolver = Resolver(nested_config({1: [2, 3], 2: [4], 3: [5]}))
+
+    assert resolver.graph.stats.Depth == 2
+    assert resolver.graph.stats.FanOut == 2
+
+    networks = helper_clean_network_sources(
+        None, None, None, 1, resolver=resolver)
+    assert [block.Name for block in networks[0].PlcBlocks] == ["FB_2", "FB_3"]
+    assert networks is helper_clean_network_sources(
+        None, None, None, 1, resolver=resolver)
+
+
+def test_network_graph_reports_cycles():
+    resolver = Resolver(nested_config({1: [2], 2: [3], 3: [2]}))
+
+    with pytest.raises(NetworkCycleError) as error:
+        resolver.graph
+
+    assert error.value.path == ["FB_2", "FB_3", "FB_2"]
@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+from src.core import settings
+
+
+def test_settings_file_over_defaults(tmp_path):
+    assert settings.load(tmp_path / "missing.json") == settings.DEFAULTS
+
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"scratch_directory": "R:/scratch"}))
+    loaded = settings.load(path)
+    assert loaded == settings.DEFAULTS | {"scratch_directory": "R:/scratch"}
+
+    # options that are not given keep the file's values
+    merged = settings.merge(loaded, {"scratch_directory": None, "keep_scratch": True})
+    assert merged["scratch_directory"] == "R:/scratch" and merged["keep_scratch"] is True
+
+
+def test_unknown_settings_are_refused(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text(json.dumps({"scratch_dir": "R:/scratch"}))
+    with pytest.raises(ValueError, match="unknown settings: scratch_dir"):
+        settings.load(path)
@@ -0,0 +1,76 @@
+from pathlib import Path
+import json
+
+from src.core import core, validation
+from src.modules import ExternalSources
+from src.modules.ProgramBlocks import NetworkSource, PlcEnum, WireParameter, parse_access
+from src.schemas import configuration
+import src.modules.BlocksFC as BlocksFC
+
+BASE_DIR = Path(__file__).parent
+
+smc = BASE_DIR / "configs" / "smc.json"
+
+
+def load_scl() -> dict:
+    # smc with its own FBs and FCs written in SCL
+    with open(smc) as file:
+        config = json.load(file)
+    for block in config["Program blocks"]:
+        if block["type"] in ("SW.Blocks.FB", "SW.Blocks.FC") and not block.get("is_instance"):
+            block["programming_language"] = "SCL"
+
+    return configuration.validate(config) | {"name": "Plant", "directory": Path("p"), "overwrite": True}
+
+
+def test_scl_blocks_share_sources():
+    config = load_scl()
+    plain = core.plan(config, {})
+    plan = core.plan(config, {"scl_sources": {}})
+    imported = [operation.Args["name"] for operation in plain.Operations if operation.Kind == "import_block"]
+
+    sources = [operation for operation in plan.Operations if operation.Kind == "import_source"]
+    generated = [name for source in sources for name in source.Args["blocks"]]
+    assert len(sources) == 1 and sources[0].Args["name"] == "FB_1"
+    created = [operation.Args["name"] for operation in plain.Operations if operation.Kind == "create_instance_db"]
+    assert sorted(generated + [operation.Args["name"] for operation in plan.Operations
+                               if operation.Kind in ("import_block", "create_instance_db")]) == sorted(imported + created)
+    # instance DBs of SCL blocks follow them in the source, the others are
+    # created before the source is generated
+    assert generated[generated.index("Elevator") + 1] == "Elevator_DB"
+    kinds = [operation.Kind for operation in plan.Operations]
+    assert max(index for index, kind in enumerate(kinds) if kind == "create_instance_db") < kinds.index("import_source")
+    validation.validate_plan(plan, {})
+
+    text = plan.Documents[sources[0].Args["document"]]
+    assert text.count("END_FUNCTION_BLOCK") == text.count("END_DATA_BLOCK") == len(generated) // 2
+    assert 'DATA_BLOCK "Elevator_DB"\n' in text and 'NON_RETAIN\n"Elevator"\n' in text
+    assert ('      #SA1(Offset := 30,\n           Auto := "IO".SA1_AUTO,\n' in text)
+    assert '           Power := NOT "IO".SA1_POWER_OK,\n' in text
+    assert '           Start => "IO".SA1_START);\n   END_REGION\n' in text
+
+    # limits start new sources, numbered per folder
+    limited = core.plan(config, {"scl_sources": {"max_blocks": 3}})
+    names = [operation.Args["name"] for operation in limited.Operations if operation.Kind == "import_source"]
+    assert names == [f"FB_{number}" for number in range(1, len(names) + 1)] and len(names) > 1
+
+
+def test_calls_and_order():
+    callee = BlocksFC.Function(PlcEnum.Function, "Scale", 1, "SCL", [], 1, "/",
+                               False, {}, [
+                                   WireParameter("en", "", "Bool", parse_access("#Enable"), False),
+                                   WireParameter("In", "Input", "Real", parse_access('"Line DB".Raw[1, #i]'), False),
+                                   WireParameter("Out", "Output", "Real", parse_access("#Scaled"), False),
+                                   WireParameter("Gain", "Input", "Real", parse_access(""), False),
+                               ])
+    assert ExternalSources.call(callee) == [
+        "IF #Enable THEN",
+        '   "Scale"(In := "Line DB".Raw[1, #i],',
+        "           Out => #Scaled);",
+        "END_IF;",
+    ]
+
+    caller = BlocksFC.Function(PlcEnum.Function, "Main", 2, "SCL", [], 1, "/", False, {}, [])
+    caller.NetworkSources = [NetworkSource("", "", [callee])]
+    assert [block.Name for block in ExternalSources.ordered([caller, callee])] == ["Scale", "Main"]
+    assert "   REGION Network 1\n" in ExternalSources.block_source(caller)
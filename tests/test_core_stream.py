@@ -0,0 +1,122 @@
+from pathlib import Path
+import json
+
+from src.core import core, planner, templates, validation
+from src.core.stream import INDEXED_KEYS, ConfigIndex, JSONStreamReader
+from src.schemas import configuration
+
+BASE_DIR = Path(__file__).parent
+
+smc = BASE_DIR / "configs" / "smc.json"
+plc_tags = BASE_DIR / "configs" / "plc_tags.json"
+
+
+def test_stream_reader_matches_json_load():
+    for config_path in (BASE_DIR / "configs").glob("*.json"):
+        with open(config_path) as file:
+            expected = json.load(file)
+
+        # a tiny chunk size forces values to span many buffer refills
+        with open(config_path, 'rb') as file:
+            config = {}
+            for key, value, is_array in JSONStreamReader(file, chunk_size=7).items():
+                config[key] = [entry for entry, _, _ in value] if is_array else value
+
+        assert config == expected
+
+
+def test_config_index_selects_device_entries():
+    for config_path in (smc, plc_tags):
+        with open(config_path) as file:
+            expected = json.load(file)
+        index = ConfigIndex(config_path)
+
+        for device in expected['devices']:
+            config = index.device(device['id'])
+            block_ids = {block['id'] for block in config['Program blocks']}
+
+            assert config['Program blocks'] == [
+                block for block in expected.get('Program blocks', [])
+                if block['DeviceID'] == device['id']]
+            assert config['Network sources'] == [
+                network for network in expected.get('Network sources', [])
+                if network['plc_block_id'] in block_ids]
+            assert config['PLC tags'] == [
+                table for table in expected.get('PLC tags', [])
+                if table['DeviceID'] == device['id']]
+            assert configuration.validate(config) is not None
+
+
+def test_config_index_follows_includes(tmp_path):
+    with open(smc) as file:
+        expected = json.load(file)
+    devices = {"devices": expected["devices"]}
+    (tmp_path / "blocks.json").write_text(json.dumps(
+        {key: value for key, value in expected.items() if key != "devices"}))
+    (tmp_path / "plant.json").write_text(json.dumps(
+        devices | {"include": ["blocks.json"]}))
+
+    index = ConfigIndex(tmp_path / "plant.json")
+    single = ConfigIndex(smc)
+
+    assert len(index.files) == 2
+    for device in expected["devices"]:
+        assert index.device(device["id"]) == single.device(device["id"])
+
+
+def test_streamed_plans_match_the_plan(tmp_path, monkeypatch):
+    with open(smc) as file:
+        raw = json.load(file)
+    raw["Templates"] = [{"name": "counters", "parameters": {"device": [1, 2, 3]}, "PLC tags": [{
+        "DeviceID": "{device}", "Name": "Counters", "Tags": [
+            {"Name": "Count_{device}", "DataTypeName": "Int", "LogicalAddress": "%MW200"}]}]}]
+    path = tmp_path / "plant.json"
+    path.write_text(json.dumps(raw))
+    project = {"name": "Plant", "directory": Path("projects"), "overwrite": True}
+    expected = core.plan(configuration.validate(raw) | project, {})
+
+    expansions = []
+    expand = templates.expand
+    monkeypatch.setattr(templates, "expand", lambda config: expansions.append(
+        templates.TEMPLATES in config) or expand(config))
+    operations, documents = [], {}
+    for plan in core.stream_plans(path, project, {}):
+        operations.extend(plan.Operations)
+        documents |= plan.Documents
+    assert operations == expected.Operations
+    assert documents == dict(expected.Documents)
+    # the templates were expanded once, not once per device
+    assert expansions.count(True) == 1
+    assert ("create_tag_table", 2, "Counters") in [
+        (operation.Kind, operation.Args.get("device"), operation.Args.get("name"))
+        for operation in operations]
+
+
+def test_device_configs_hold_only_their_entries():
+    index = ConfigIndex(smc)
+    assert set(index.device(1)) == set(INDEXED_KEYS)
+    assert "libraries" in index.common
+
+
+def test_execute_streaming_runs_checked_plans(tmp_path, monkeypatch):
+    with open(smc) as file:
+        raw = json.load(file)
+    for block in raw["Program blocks"]:
+        if block["type"] in ("SW.Blocks.FB", "SW.Blocks.FC") and not block.get("is_instance"):
+            block["programming_language"] = "SCL"
+    path = tmp_path / "plant.json"
+    path.write_text(json.dumps(raw))
+
+    validated, ran = [], []
+    check = validation.validate_plan
+    monkeypatch.setattr(validation, "validate_plan", lambda plan, settings: validated.append(
+        len(plan.Operations)) or check(plan, settings))
+    monkeypatch.setattr(planner, "run_plans", lambda imports, plans, settings: (
+        ran.extend(operation.Kind for plan in plans for operation in plan.Operations), ("TIA", {}))[1])
+    monkeypatch.setattr(planner, "save_costs", lambda measured: None)
+
+    project = {"name": "Plant", "directory": Path("projects"), "overwrite": True}
+    assert core.execute_streaming(None, path, project, {"scl_sources": {}}) == "TIA"
+    # the project, then every device, each validated before it runs
+    assert len(validated) == 1 + len(raw["devices"])
+    assert ran[0] == "create_project" and "import_source" in ran
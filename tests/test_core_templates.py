@@ -0,0 +1,122 @@
+from pathlib import Path
+import copy
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from src.core import core
+from src.core.templates import expand
+from src.modules.ProgramBlocks import BlockCompileUnit, FILLED_UNITS, render_compile_unit
+from src.schemas import configuration
+
+BASE_DIR = Path(__file__).parent
+
+smc = BASE_DIR / "configs" / "smc.json"
+
+
+def test_expand_parameters():
+    config = {"Program blocks": [{"id": 1}], "Templates": [{
+        "name": "motors",
+        "parameters": {"line": ["A", "B"], "n": {"range": [1, 3]}},
+        "Program blocks": [{"id": "{n*10+100}", "name": "M_{line}_{n:02d}",
+                            "label": "{{{line}}}", "position": "{index}"}],
+    }]}
+
+    blocks = expand(config)["Program blocks"]
+
+    assert "Templates" not in expand(config)
+    assert blocks[0] == {"id": 1}
+    assert [block["name"] for block in blocks[1:]] == [
+        "M_A_01", "M_A_02", "M_B_01", "M_B_02"]
+    assert [block["id"] for block in blocks[1:]] == [110, 120, 110, 120]
+    assert blocks[1]["label"] == "{A}"
+    assert blocks[4]["position"] == 3
+
+
+def test_expand_zip_and_errors():
+    template = {"name": "t", "zip": True,
+                "parameters": {"a": [1, 2], "b": ["x", "y"]},
+                "PLC tags": [{"Name": "{b}", "DeviceID": "{a}"}]}
+    tables = expand({"Templates": [template]})["PLC tags"]
+    assert tables == [{"Name": "x", "DeviceID": 1}, {"Name": "y", "DeviceID": 2}]
+
+    with pytest.raises(ValueError, match="different lengths"):
+        expand({"Templates": [template | {"parameters": {"a": [1], "b": ["x", "y"]}}]})
+    with pytest.raises(ValueError, match="no parameter 'c'"):
+        expand({"Templates": [template | {"PLC tags": [{"Name": "{c}"}]}]})
+
+
+def test_template_matches_written_out_config():
+    with open(smc) as file:
+        expected = json.load(file)
+    networks = [network for network in expected["Network sources"]
+                if network["plc_block_id"] == 1][:3]
+    config = dict(expected)
+    config["Network sources"] = [network for network in expected["Network sources"]
+                                 if network not in networks]
+    config["Templates"] = [{
+        "name": "networks", "zip": True,
+        "parameters": {"id": [network["id"] for network in networks],
+                       "title": [network["title"] for network in networks],
+                       "comment": [network.get("comment", "") for network in networks]},
+        "Network sources": [{"id": "{id}", "plc_block_id": 1, "title": "{title}",
+                             "comment": "{comment}"}],
+    }]
+
+    validated = configuration.validate(config)
+    validated["Network sources"].sort(key=lambda network: network["id"])
+    expected = configuration.validate(expected)
+    expected["Network sources"].sort(key=lambda network: network["id"])
+    assert validated == expected
+
+
+def test_compile_unit_templates_match_built_units():
+    with open(smc) as file:
+        translation = core.translate(configuration.validate(json.load(file)), {})
+
+    count = 0
+    for plc in translation.PlcBlocks[1]:
+        block_id = 3
+        for network_source in getattr(plc, "NetworkSources", []):
+            try:
+                expected = ET.tostring(BlockCompileUnit(
+                    plc.ProgrammingLanguage, network_source, block_id).root, encoding='unicode')
+            except AttributeError:
+                continue
+            assert render_compile_unit(
+                plc.ProgrammingLanguage, network_source, block_id) == expected
+            block_id += 5
+            count += 1
+    assert count > 0
+
+
+def test_same_networks_are_relocated():
+    with open(smc) as file:
+        translation = core.translate(configuration.validate(json.load(file)), {})
+    network_sources = [(plc.ProgrammingLanguage, network_source)
+                       for plc in translation.PlcBlocks[1]
+                       for network_source in getattr(plc, "NetworkSources", [])
+                       if network_source.PlcBlocks]
+
+    FILLED_UNITS.clear()
+    for language, network_source in network_sources:
+        render_compile_unit(language, network_source, 3)
+    filled = len(FILLED_UNITS)
+    assert filled > 0
+
+    # the same content in another block, or another object with equal
+    # content, is only given its IDs
+    for block_id in (8, 0x2A3):
+        for language, network_source in network_sources:
+            expected = ET.tostring(BlockCompileUnit(
+                language, network_source, block_id).root, encoding='unicode')
+            assert render_compile_unit(language, copy.deepcopy(network_source),
+                                       block_id) == expected
+    assert len(FILLED_UNITS) == filled
+
+    language, network_source = network_sources[0]
+    changed = copy.deepcopy(network_source)
+    changed.Title = "Changed <title>"
+    assert render_compile_unit(language, changed, 3) == ET.tostring(
+        BlockCompileUnit(language, changed, 3).root, encoding='unicode')
@@ -0,0 +1,82 @@
+from pathlib import Path
+import json
+
+import pytest
+
+from src.core import core, planner, validation
+from src.modules.XML import XMLNS
+from src.schemas import configuration
+
+BASE_DIR = Path(__file__).parent
+
+smc = BASE_DIR / "configs" / "smc.json"
+
+PROJECT = {"name": "Plant", "directory": Path("projects"), "overwrite": True}
+
+
+def build(config_path: Path) -> planner.Plan:
+    with open(config_path) as file:
+        config = configuration.validate(json.load(file)) | PROJECT
+    return planner.build(core.translate(config, {}), config)
+
+
+def network(parts: str, wires: str) -> str:
+    return (f'<Document><FlgNet xmlns="{XMLNS.FLGNET.value}"><Parts>{parts}</Parts>'
+            f'<Wires>{wires}</Wires></FlgNet></Document>')
+
+
+def test_generated_documents_are_valid():
+    plan = build(smc)
+
+    assert validation.check_plan(plan) == {}
+    assert validation.check_plan(plan, workers=2) == {}
+    validation.validate_plan(plan, {})
+
+
+def test_reports_every_problem():
+    interface = (f'<Document><Sections xmlns="{XMLNS.INTERFACE.value}"><Section Name="Stat">'
+                 '<Member Name="Speed" Remanence="Kept" /></Section></Sections></Document>')
+    assert validation.check(interface) == [
+        "Section Stat: Name='Stat' is not one of ['Base', 'Constant', 'InOut', 'Input', "
+        "'None', 'Output', 'Return', 'Static', 'Temp']",
+        "Member Speed: missing Datatype",
+        "Member Speed: Remanence='Kept' is not one of ['Classic', 'NonRetain', 'Retain', 'SetInIDB']",
+    ]
+
+    call = ('<Call UId="22"><CallInfo Name="Motor" BlockType="FB">'
+            '<Parameter Name="Start" Section="Input" Type="Bool" /></CallInfo></Call>')
+    assert validation.check(network(
+        '<Access Scope="GlobalVariable" UId="21"><Symbol><Component Name="Start" />'
+        f'</Symbol></Access>{call}',
+        '<Wire UId="24"><IdentCon UId="21" /><NameCon UId="22" Name="Start" /></Wire>')) == []
+    assert validation.check(network(
+        call, '<Wire UId="22"><IdentCon UId="30" /><NameCon UId="22" Name="Start" /></Wire>')) == [
+        "FlgNet: UId 22 is used twice",
+        "Wire: IdentCon refers to UId 30, which is no part",
+    ]
+
+    assert validation.check("<Document><Name>A\x01</Name></Document>")[0].startswith(
+        "not well-formed")
+
+
+def test_invalid_plan_fails_with_names():
+    plan = build(smc)
+    key = next(operation.Args["document"] for operation in plan.Operations
+               if operation.Kind == "import_block" and operation.Args["name"] == "Main")
+    plan.Documents[key] = plan.Documents[key].replace(
+        'Section Name="Temp"', 'Section Name="Tmp"')
+
+    with pytest.raises(ValueError, match=r"1 of \d+ generated documents are invalid:\nMain \(device 1\):"):
+        validation.validate_plan(plan, {"xml_workers": 2})
+
+
+def test_schema_directory(tmp_path):
+    pytest.importorskip("lxml")
+    (tmp_path / "FlgNet.xsd").write_text(
+        f'<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" '
+        f'targetNamespace="{XMLNS.FLGNET.value}" elementFormDefault="qualified">'
+        '<xs:element name="FlgNet"><xs:complexType><xs:sequence>'
+        '<xs:element name="Parts" /></xs:sequence></xs:complexType></xs:element></xs:schema>')
+
+    errors = validation.check(network("", ""), tmp_path)
+    assert len(errors) == 1 and "Wires" in errors[0]
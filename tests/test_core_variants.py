@@ -0,0 +1,85 @@
+from pathlib import Path
+import json
+
+from src.core import core, variants
+from src.modules.XML import DocumentCache
+from src.schemas import configuration
+import src.modules.PlcDataTypes as PlcDataTypes
+
+BASE_DIR = Path(__file__).parent
+
+smc = BASE_DIR / "configs" / "smc.json"
+
+
+def load_smc() -> dict:
+    with open(smc) as file:
+        return json.load(file)
+
+
+def by_name(translation: core.Translation) -> dict:
+    return {block.Name: block for blocks in translation.PlcBlocks.values()
+            for block in blocks}
+
+
+def test_overlay_replaces_appends_and_removes():
+    raw = load_smc()
+    base = configuration.validate(raw)
+    comment = {"id": 13, "plc_block_id": 9, "title": "Changed"}
+    table = {"DeviceID": 1, "Name": "Option tags", "Tags": []}
+    config = variants.apply(base, {
+        "Network sources": [comment],
+        "PLC tags": [table],
+        "remove": {"PLC data types": ["A_Drives"], "Instances": [1]},
+    })
+
+    networks = config["Network sources"]
+    assert len(networks) == len(base["Network sources"])
+    assert networks[12]["title"] == "Changed"
+    assert all(new is old for index, (new, old) in enumerate(
+        zip(networks, base["Network sources"])) if index != 12)
+    assert config["PLC tags"][-1]["Name"] == "Option tags"
+    assert "A_Drives" not in [t["Name"] for t in config["PLC data types"]]
+    assert 1 not in [instance["id"] for instance in config["Instances"]]
+    # the base is left as it was
+    assert base == configuration.validate(raw)
+
+
+def test_variants_reuse_unchanged_blocks():
+    raw = load_smc()
+    raw["Variants"] = {
+        "standard": {},
+        "option": {"Network sources": [
+            {"id": 13, "plc_block_id": 9, "title": "Changed"}]},
+    }
+    config = configuration.validate(raw)
+    configs = variants.configs(config)
+    shared = variants.Shared()
+
+    standard = core.translate(configs["standard"], {}, shared)
+    built = shared.misses
+    option = core.translate(configs["option"], {}, shared)
+    standard_blocks, option_blocks = by_name(standard), by_name(option)
+
+    # the changed network's block and its caller are built again
+    assert shared.misses > built
+    assert shared.hits > shared.misses - built
+    assert option_blocks["Main"] is not standard_blocks["Main"]
+    assert option_blocks["Common_Control Monitor"] is not standard_blocks["Common_Control Monitor"]
+    assert option_blocks["Elevator"] is standard_blocks["Elevator"]
+    assert option.DataBlocks[1][0] is standard.DataBlocks[1][0]
+
+    # and the result is what translating the variant on its own gives
+    assert option == core.translate(configs["option"], {})
+
+
+def test_document_cache_renders_once():
+    config = configuration.validate(load_smc())
+    translation = core.translate(config, {})
+    documents = DocumentCache()
+
+    for plc_data_type in translation.PlcDataTypes:
+        first = documents.render(PlcDataTypes.XML, plc_data_type)
+        assert documents.render(PlcDataTypes.XML, plc_data_type) is first
+        assert first.xml() == PlcDataTypes.XML(plc_data_type).xml()
+
+    assert documents.hits == len(translation.PlcDataTypes)
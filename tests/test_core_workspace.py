@@ -0,0 +1,122 @@
+from pathlib import Path
+import gc
+import json
+
+from src.core import core, planner
+from src.core.workspace import DocumentStore, Workspace
+from src.modules.XML import Streamed
+from src.schemas import configuration
+import src.modules.BlocksOB as BlocksOB
+
+BASE_DIR = Path(__file__).parent
+
+smc = BASE_DIR / "configs" / "smc.json"
+
+
+def test_layout_and_cleanup(tmp_path):
+    with open(smc) as file:
+        translation = core.translate(configuration.validate(json.load(file)), {})
+    main = next(plc for plc in translation.PlcBlocks[1] if plc.Name == "Main")
+
+    with Workspace(tmp_path) as workspace, Workspace(tmp_path) as other:
+        # runs at the same time have their own directories
+        assert workspace.directory != other.directory
+
+        path = workspace.path(main.Name, "Plant", 1, "/Motors/Drives")
+        assert path == workspace.directory / "Plant" / "1" / "Motors" / "Drives" / "Main.xml"
+        assert Streamed(BlocksOB.XML, main).write(path) == path
+        assert path.read_text(encoding='utf-8') == Streamed(BlocksOB.XML, main).xml()
+
+        # a name taken earlier in the run is not overwritten
+        again = workspace.write("<Document />", "Main", "Plant", 1, "/Motors/Drives")
+        assert again.name == "Main_1.xml"
+        assert workspace.path("../x", "..", "a:b").relative_to(workspace.directory) == \
+            Path("_") / "a_b" / ".._x.xml"
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_keep_for_debugging(tmp_path):
+    workspace = Workspace.from_settings(
+        {"scratch_directory": str(tmp_path / "ram"), "keep_scratch": True})
+    path = workspace.write("<Document />", "Main", "Plant", 1, "/")
+    workspace.close()
+
+    assert path.parent.parent.parent == workspace.directory
+    assert workspace.directory.parent == tmp_path / "ram"
+    assert path.read_text() == "<Document />"
+
+
+def test_plan_documents_are_files(tmp_path):
+    with open(smc) as file:
+        config = configuration.validate(json.load(file)) | {
+            "name": "Plant", "directory": Path("projects"), "overwrite": True}
+    plan = core.plan(config, {"scratch_directory": str(tmp_path)})
+    [directory] = tmp_path.iterdir()
+
+    # the plan holds keys, the texts are in the store's directory
+    assert len(plan.Documents) == len(list(directory.iterdir())) > 0
+    key = next(iter(plan.Documents))
+    assert plan.Documents.path(key).parent == directory
+    assert plan.Documents[key] == plan.Documents.path(key).read_text(encoding='utf-8')
+
+    # a store made of some documents keeps their files
+    only = planner.optimize(plan).Documents
+    del plan
+    gc.collect()
+    assert only[key] and directory.exists()
+    del only
+    gc.collect()
+    assert not directory.exists()
+
+
+def test_empty_store_writes_nothing(tmp_path):
+    store = DocumentStore(tmp_path / "documents")
+    assert len(store) == 0 and not (tmp_path / "documents").exists()
+
+
+class Item:
+    def __init__(self, name: str, **children):
+        self.Name = name
+        for attribute, value in children.items():
+            setattr(self, attribute, value)
+
+
+def test_documents_are_imported_where_they_are(tmp_path):
+    with open(smc) as file:
+        config = json.load(file)
+    for block in config["Program blocks"]:
+        if block["type"] in ("SW.Blocks.FB", "SW.Blocks.FC") and not block.get("is_instance"):
+            block["programming_language"] = "SCL"
+    config = configuration.validate(config) | {
+        "name": "Plant", "directory": Path("projects"), "overwrite": True}
+    plan = core.plan(config, {"scratch_directory": str(tmp_path / "ram"), "scl_sources": {}})
+    [directory] = (tmp_path / "ram").iterdir()
+    written = sorted(directory.iterdir())
+
+    imported = []
+    blocks = Item("Blocks", Import=lambda file, options: imported.append(file))
+    context = Item("Context", imports=Item("imports", DLL=Item("SE", ImportOptions=Item("options", Override=1)),
+                                           FileInfo=Path),
+                   group=lambda device, group: Item(group, Blocks=blocks),
+                   identity=lambda device: Item("identity", forget_block=lambda name: None))
+    operation = next(operation for operation in plan.Operations if operation.Kind == "import_block")
+    planner.import_block(context, plan, **operation.Args)
+    assert imported == [plan.Documents.path(operation.Args["document"]).absolute()]
+    assert sorted(directory.iterdir()) == written
+
+    # sources keep their suffix, also in a saved plan
+    source = next(operation for operation in plan.Operations if operation.Kind == "import_source")
+    assert plan.Documents.path(source.Args["document"]).suffix == ".scl"
+    plan.save(tmp_path / "plan.json")
+    loaded = planner.Plan.load(tmp_path / "plan.json")
+    assert loaded.Documents.path(source.Args["document"]).suffix == ".scl"
+    assert dict(loaded.Documents) == dict(plan.Documents)
+
+
+def test_keep_plan_documents(tmp_path):
+    store = DocumentStore.from_settings({"scratch_directory": str(tmp_path), "keep_scratch": True})
+    path = store.add("key", "<Document />")
+    del store
+    gc.collect()
+    assert path.read_text() == "<Document />"
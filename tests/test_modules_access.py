@@ -0,0 +1,80 @@
+from pathlib import Path
+import copy
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from src.core import core
+from src.modules.ProgramBlocks import (AccessComponent, AccessValue, BlockCompileUnit, WireParameter,
+                                       generate_access, parse_access, render_compile_unit)
+from src.schemas import configuration
+
+BASE_DIR = Path(__file__).parent
+
+smc = BASE_DIR / "configs" / "smc.json"
+
+
+def test_parse_access():
+    assert parse_access('') == parse_access(None) == AccessValue()
+    assert parse_access("T#5s") == AccessValue("TypedConstant", (), "T#5s")
+    assert [parse_access(value).Scope for value in ("true", "15", "-1.5e3", "16#FF", "'a.b'")] == \
+        ["LiteralConstant"] * 5
+    assert parse_access('#Stat."Motor 1".Speeds[1, #i]') == AccessValue("LocalVariable", (
+        AccessComponent("Stat"), AccessComponent("Motor 1"), AccessComponent("Speeds", (
+            AccessValue("LiteralConstant", (), "1"),
+            AccessValue("LocalVariable", (AccessComponent("i"),)))),
+    ))
+    # a bare name is a constant, as before access paths were parsed
+    assert parse_access("Start") == AccessValue("LiteralConstant", (), "Start")
+    assert parse_access('"Start"') == AccessValue("GlobalVariable", (AccessComponent("Start"),))
+    assert parse_access("DB.Drives.[4]") == parse_access("DB.Drives[4]")
+    assert parse_access("DB.Drives[4]") is parse_access("DB.Drives[4]")
+
+    for value in ("DB.", "DB.Drives[4", "DB.Drives[4]x", "DB..x"):
+        with pytest.raises(ValueError, match="Wire value"):
+            parse_access(value)
+
+
+def test_generate_access():
+    parameter = WireParameter("Drive", "Input", "Int", parse_access("DB.Matrix[1, Int#2, IO.n[3]].x"),
+                              False)
+    assert ET.tostring(generate_access(parameter, 21), encoding='unicode') == (
+        '<Access Scope="GlobalVariable" UId="21"><Symbol><Component Name="DB" />'
+        '<Component Name="Matrix" AccessModifier="Array">'
+        '<Access Scope="LiteralConstant"><Constant><ConstantType>DInt</ConstantType>'
+        '<ConstantValue>1</ConstantValue></Constant></Access>'
+        '<Access Scope="TypedConstant"><Constant><ConstantValue>Int#2</ConstantValue></Constant></Access>'
+        '<Access Scope="GlobalVariable"><Symbol><Component Name="IO" />'
+        '<Component Name="n" AccessModifier="Array"><Access Scope="LiteralConstant"><Constant>'
+        '<ConstantType>DInt</ConstantType><ConstantValue>3</ConstantValue></Constant></Access>'
+        '</Component></Symbol></Access></Component><Component Name="x" /></Symbol></Access>')
+
+
+def test_bare_names_are_constants():
+    def written(datatype: str) -> str:
+        parameter = WireParameter("Mode", "Input", datatype, parse_access("Auto"), False)
+        return ET.tostring(generate_access(parameter, 21), encoding='unicode')
+
+    assert written("Int") == ('<Access Scope="LiteralConstant" UId="21"><Constant>'
+                              '<ConstantType>Int</ConstantType><ConstantValue>Auto</ConstantValue>'
+                              '</Constant></Access>')
+    assert written("Time") == ('<Access Scope="TypedConstant" UId="21"><Constant>'
+                               '<ConstantValue>Auto</ConstantValue></Constant></Access>')
+
+
+def test_deep_paths_in_compile_units():
+    with open(smc) as file:
+        translation = core.translate(configuration.validate(json.load(file)), {})
+    language, network_source = next(
+        (plc.ProgrammingLanguage, network_source) for plc in translation.PlcBlocks[1]
+        for network_source in getattr(plc, "NetworkSources", [])
+        if network_source.PlcBlocks and len(network_source.PlcBlocks[0].Parameters) > 2)
+
+    for values in (["#a.b[1, #i]", "Real#1.5"], ['"x".y[DB.z[#j]].w', "#k"]):
+        changed = copy.deepcopy(network_source)
+        parameters = changed.PlcBlocks[0].Parameters
+        for parameter, value in zip(parameters[1:], values):
+            parameter.Value = parse_access(value)
+        expected = ET.tostring(BlockCompileUnit(language, changed, 5).root, encoding='unicode')
+        assert render_compile_unit(language, changed, 5) == expected
@@ -0,0 +1,76 @@
+from pathlib import PurePosixPath
+
+from src.modules import Identities
+import src.modules.ProgramBlocks as ProgramBlocks
+
+
+class Composition:
+    # Groups or Blocks of a block group, counting the Openness calls
+    calls: int = 0
+
+    def __init__(self):
+        self.items: dict[str, object] = {}
+
+    def Find(self, name: str):
+        Composition.calls += 1
+        return self.items.get(name)
+
+    def Create(self, name: str):
+        Composition.calls += 1
+        self.items[name] = Group(name)
+        return self.items[name]
+
+
+class Group:
+    def __init__(self, name: str):
+        self.Name = name
+        self.Groups = Composition()
+        self.Blocks = Composition()
+
+
+class Software:
+    def __init__(self):
+        self.BlockGroup = Group("Program blocks")
+
+
+def test_tree_is_created_once():
+    software = Software()
+    software.BlockGroup.Groups.Create("Motors")
+    paths = ["/Motors/Drives/Bins", "Motors/Drives", "/Valves", "/Motors/Drives/Bins"]
+    assert Identities.tree(paths) == ["/Motors", "/Motors/Drives", "/Motors/Drives/Bins", "/Valves"]
+
+    Composition.calls = 0
+    identity = Identities.of(software)
+    assert identity.prepare(paths) == 3
+    # the folders of new folders are not searched
+    assert Composition.calls == 1 + 2 + 1 + 2
+
+    Composition.calls = 0
+    bins = ProgramBlocks.locate_blockgroup(software, PurePosixPath("Motors/Drives/Bins"))
+    assert bins.Name == "Bins" and Composition.calls == 0
+    assert software.BlockGroup.Groups.items["Motors"].Groups.items["Drives"].Groups.items["Bins"] is bins
+    assert identity.hits > 0
+    Identities.clear()
+
+
+def test_missing_objects_are_remembered():
+    software = Software()
+    identity = Identities.of(software)
+
+    Composition.calls = 0
+    assert ProgramBlocks.find(software, PurePosixPath("/Pumps"), "Pump") is None
+    assert ProgramBlocks.find(software, PurePosixPath("/Pumps"), "Pump") is None
+    assert identity.group("/Pumps/Inlet") is None
+    assert Composition.calls == 1
+
+    # a created block is found without a call
+    group = identity.group("/Pumps", mkdir=True)
+    identity.add_block("/Pumps", "Pump", "Pump_DB")
+    assert ProgramBlocks.find(software, PurePosixPath("/Pumps"), "Pump") == "Pump_DB"
+    assert Composition.calls == 2 and group is software.BlockGroup.Groups.items["Pumps"]
+
+    identity.forget_block("Pump")
+    assert ProgramBlocks.find(software, PurePosixPath("Pumps"), "Pump") is None
+    assert Composition.calls == 2
+    Identities.clear()
+    assert Identities.MAPS == {}
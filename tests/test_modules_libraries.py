@@ -0,0 +1,81 @@
+from pathlib import Path, PurePosixPath
+import json
+
+from src.core import core, planner
+from src.schemas import configuration
+import src.modules.Libraries as Libraries
+
+
+class Listed(list):
+    # an Openness collection, counting how often it is listed
+    listings: int = 0
+
+    def __iter__(self):
+        Listed.listings += 1
+        return super().__iter__()
+
+
+class Item:
+    def __init__(self, name: str, **children):
+        self.Name = name
+        for attribute, value in children.items():
+            setattr(self, attribute, value)
+
+
+def folder(name: str, mastercopies: list[str], folders: list[Item] = []) -> Item:
+    return Item(name, MasterCopies=Listed(Item(mastercopy) for mastercopy in mastercopies),
+                Folders=Listed(folders))
+
+
+def test_libraries_and_mastercopies_are_listed_once():
+    drives = folder("Drives", ["Motor", "Pump"], [folder("Bins", ["Bin"])])
+    library = Item("Motors", MasterCopyFolder=folder("Master copies", ["Valve"], [drives]))
+    TIA = Item("TIA", GlobalLibraries=Listed([Item("Other"), library]))
+
+    Listed.listings = 0
+    assert Libraries.find(TIA, "Motors") is library
+    assert Libraries.find(TIA, "Missing") is None
+    assert Listed.listings == 1
+
+    motor = Libraries.find_mastercopy(library, PurePosixPath("Drives"), "Motor")
+    assert motor.Name == "Motor"
+    assert Libraries.find_mastercopy(library, PurePosixPath("/Drives/Bins"), "Bin").Name == "Bin"
+    assert Libraries.find_mastercopy(library, PurePosixPath("/"), "Valve").Name == "Valve"
+    assert Libraries.find_mastercopy(library, PurePosixPath("/Drives"), "Bin") is None
+    assert Libraries.locate_mastercopyfolder(library, PurePosixPath("/Drives/Bins")).Name == "Bins"
+    listed = Listed.listings
+    for _ in range(100):
+        assert Libraries.find_mastercopy(library, PurePosixPath("/Drives"), "Motor") is motor
+    assert Listed.listings == listed
+
+    # a library opened later is found without listing them again
+    Libraries.index(TIA).add(Item("Valves"))
+    assert Libraries.find(TIA, "Valves").Name == "Valves"
+    assert Listed.listings == listed
+    Libraries.clear()
+
+
+def test_used_mastercopies_only():
+    with open(Path(__file__).parent / "configs" / "smc.json") as file:
+        config = json.load(file)
+    config["libraries"][0] |= {"copy": "used", "dependencies": {
+        "Drives/Conveyor/TGT_LD_ConveyorType2": ["Drives/Motors/TGT_LD_Motor", "/Common/Alarm"],
+        "Drives/Motors/TGT_LD_Motor": ["Common/Alarm"]}}
+    config = configuration.validate(config) | {"name": "Plant", "directory": Path("p"), "overwrite": True}
+    plan = planner.optimize(core.plan(config, {}))
+    kinds = [operation.Kind for operation in plan.Operations]
+
+    assert "copy_library" not in kinds
+    copies = [(operation.Args["folder"], operation.Args["name"]) for operation in plan.Operations
+              if operation.Kind == "create_from_mastercopy" and operation.Args["group"].startswith("/TGTLibrary")]
+    assert len(copies) == len(set(copies))
+    assert ("Drives/Conveyor", "TGT_LD_ConveyorType2") in copies
+    assert copies[-2:] == [("Drives/Motors", "TGT_LD_Motor"), ("Common", "Alarm")]
+    # blocks with a library source are still copied on their own
+    assert ("__", "LastScan") in [(operation.Args["folder"], operation.Args["name"])
+                                  for operation in plan.Operations
+                                  if operation.Kind == "create_from_mastercopy"]
+    # folders come before the copies that go in them
+    groups = next(operation for operation in plan.Operations if operation.Kind == "create_groups")
+    assert {"/TGTLibrary/Common", "/TGTLibrary/Drives/Bins"} <= set(groups.Args["paths"])
+    assert kinds.index("create_groups") < kinds.index("create_from_mastercopy")
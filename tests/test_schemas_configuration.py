@@ -1,6 +1,10 @@
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+from schema import SchemaError
 import json
+import pytest
+import re
 
+from src.core.cache import DiskCache
 from src.schemas import configuration
 
 BASE_DIR = Path(__file__).parent
@@ -40,3 +44,108 @@ def test_json_config():
     with open(smc) as file:
         config = json.load(file)
         assert configuration.validate(config) is not None
+
+
+def test_compiled_matches_schema():
+    for config_path in (BASE_DIR / "configs").glob("*.json"):
+        with open(config_path) as file:
+            config = json.load(file)
+
+        try:
+            expected = configuration.root.validate(config)
+        except SchemaError as error:
+            with pytest.raises(SchemaError, match=re.escape(str(error))):
+                configuration.validate(config)
+            continue
+        assert configuration.validate(config) == expected
+
+
+def test_compiled_keeps_first_matching_alternative():
+    with open(one_device) as file:
+        config = json.load(file)
+    block = {"id": 90, "DeviceID": 1, "type": "SW.Blocks.GlobalDB", "name": "Data"}
+    config["Program blocks"] = [block, block | {"attributes": {"Optimized": True}}]
+
+    validated = configuration.validate(config)["Program blocks"]
+
+    # without attributes the entry matches PlcBlock first, as with schema
+    assert validated == configuration.root.validate(config)["Program blocks"]
+    assert validated[0]["is_instance"] is False
+    assert validated[0]["blockgroup_folder"] == PurePosixPath("/")
+    assert "is_instance" not in validated[1]
+
+
+def test_compiled_error_messages():
+    with open(one_device) as file:
+        config = json.load(file)
+    config["Program blocks"] = [
+        {"id": 90, "DeviceID": 1, "type": "SW.Blocks.Unknown", "name": "Main"}]
+
+    with pytest.raises(SchemaError) as expected:
+        configuration.root.validate(config)
+    with pytest.raises(SchemaError) as error:
+        configuration.validate(config)
+    assert str(error.value) == str(expected.value)
+
+
+def split_config(directory: Path) -> Path:
+    # smc.json as a root file with devices, one fragment with the blocks and
+    # a shared fragment with the data types, tags and wire templates
+    with open(smc) as file:
+        config = json.load(file)
+    shared = {key: config.pop(key)
+              for key in ("PLC data types", "PLC tags", "Wire template")}
+    blocks = {key: config.pop(key) for key in list(config) if key != "devices"}
+
+    (directory / "shared").mkdir()
+    (directory / "shared" / "types.json").write_text(json.dumps(shared))
+    (directory / "blocks.json").write_text(
+        json.dumps(blocks | {"include": ["shared/types.json"]}))
+    root = directory / "plant.json"
+    root.write_text(json.dumps(
+        config | {"include": ["blocks.json", "shared/types.json"]}))
+
+    return root
+
+
+def test_includes_merge_into_config(tmp_path):
+    root = split_config(tmp_path)
+    with open(smc) as file:
+        expected = configuration.validate(json.load(file))
+
+    assert configuration.load(root) == expected
+    with open(root) as file:
+        assert configuration.validate(json.load(file), tmp_path) == expected
+
+
+def test_includes_are_cached_per_fragment(tmp_path):
+    root = split_config(tmp_path)
+    cache = DiskCache(configuration.VERSION, tmp_path / "cache")
+    configuration.load(root, cache)
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    types = tmp_path / "shared" / "types.json"
+    types.write_text(types.read_text().replace('"Bins"', '"Hoppers"'))
+    config = configuration.load(root, cache)
+
+    # only the changed fragment is validated again
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert "Hoppers" in [udt["Name"] for udt in config["PLC data types"]]
+
+
+def test_include_errors(tmp_path):
+    root = split_config(tmp_path)
+    blocks = json.loads((tmp_path / "blocks.json").read_text())
+    (tmp_path / "copy.json").write_text(json.dumps(
+        {"Program blocks": blocks["Program blocks"][:2]}))
+    root.write_text(json.dumps(json.loads(root.read_text()) | {
+        "include": ["blocks.json", "copy.json"]}))
+
+    with pytest.raises(configuration.IdCollisionError) as error:
+        configuration.load(root)
+    assert [(key, id) for key, id, _ in error.value.collisions] == [
+        ("Program blocks", 1), ("Program blocks", 2)]
+
+    (tmp_path / "copy.json").write_text(json.dumps({"include": ["plant.json"]}))
+    with pytest.raises(ValueError, match="includes itself"):
+        configuration.load(root)
@@ -2,13 +2,15 @@ from pathlib import Path
 import json
 import xml.etree.ElementTree as ET
 
-from src.core.core import helper_clean_variable_sections, helper_clean_network_sources, helper_clean_wires, helper_clean_database_instance
-from src.modules.ProgramBlocks import PlcEnum, LibraryData
+from src.core.core import helper_clean_variable_sections, helper_clean_network_sources, helper_clean_wires, helper_clean_database_instance, translate
+from src.modules.ProgramBlocks import PlcEnum, LibraryData, VariableSection, VariableStruct
+from src.modules.XML import Streamed
 from src.schemas import configuration
 import src.modules.BlocksData as BlocksData
 import src.modules.BlocksFB as BlocksFB
 import src.modules.BlocksFC as BlocksFC
 import src.modules.BlocksOB as BlocksOB
+import src.modules.PlcDataTypes as PlcDataTypes
 
 BASE_DIR = Path(__file__).parent
 smc = BASE_DIR / "configs" / "smc.json"
@@ -270,3 +272,43 @@ def test_function():
         xml = BlocksFC.XML(data).xml()
         root = ET.fromstring(xml)
         print(xml)
+
+
+def test_streamed_documents_match_tree():
+    translation = translate(CONFIG, {})
+    builders = {
+        PlcEnum.OrganizationBlock: BlocksOB.XML,
+        PlcEnum.FunctionBlock: BlocksFB.XML,
+        PlcEnum.Function: BlocksFC.XML,
+    }
+    documents = [(PlcDataTypes.XML, data) for data in translation.PlcDataTypes]
+    documents += [(BlocksData.XML, data)
+                  for blocks in translation.DataBlocks.values() for data in blocks]
+    documents += [(builders[data.PlcType], data)
+                  for blocks in translation.PlcBlocks.values() for data in blocks]
+
+    # members needing escapes, repeated and unknown sections, empty ones
+    structs = [
+        VariableStruct('a<"b">', 'Array[0..1] of "T&U"', True, "'x' < y", {}),
+        VariableStruct('c', 'Int', False, '', {'ExternalWritable': False}),
+        VariableStruct('d\tn', 'Bool', False, None, {}),
+    ]
+    documents.append((BlocksData.XML, BlocksData.DataBlock(
+        Name="DB<1>", Number=700000, BlockGroupPath="/", DeviceID=1,
+        VariableSections=[VariableSection("Static", structs[:1]),
+                          VariableSection("Temp", structs),
+                          VariableSection("Input", []),
+                          VariableSection("Static", structs[1:])],
+        Attributes={"MemoryLayout": "Optimized", "Comment": ""})))
+    documents.append((PlcDataTypes.XML, PlcDataTypes.PlcDataType(
+        Name="Empty", Types=[])))
+
+    for xml, data in documents:
+        expected = xml(data).xml()
+        assert Streamed(xml, data).xml() == expected
+
+        filename = Streamed(xml, data).write()
+        try:
+            assert filename.read_bytes() == expected.encode('utf-8')
+        finally:
+            filename.unlink()
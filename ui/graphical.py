@@ -2,11 +2,12 @@ from PySide6.QtWidgets import QApplication, QMainWindow, QFileDialog
 from PySide6.QtCore import QThread, Signal, QObject
 from pathlib import Path
 from ui.qt6.app import Ui_MainWindow
-import json
 import logging
 
 from src.core import core
 from src.core import logs
+from src.core import settings
+from src.core.cache import DiskCache
 from src.schemas import configuration
 import src.modules.Portals as Portals
 
@@ -15,11 +16,12 @@ class PortalWorker(QThread):
     finished = Signal()
     error = Signal(str)
 
-    def __init__(self, dll, project_json, settings):
+    def __init__(self, dll, project_json, settings, config_path=None):
         super().__init__()
         self.dll = dll
         self.project_json = project_json
         self.settings = settings
+        self.config_path = config_path
 
         self.logger = logging.getLogger(__name__)
 
@@ -34,7 +36,14 @@ class PortalWorker(QThread):
 
             imports = Portals.Imports(SE, DirectoryInfo, FileInfo)
             self.logger.info(f"Creating project: {self.project_json['name']}")
-            core.execute(imports, self.project_json, self.settings)
+            if self.settings.get('stream'):
+                # the config file is read again, one device at a time
+                project = {key: self.project_json[key] for key in ('name', 'directory', 'overwrite', 'libraries')}
+                core.execute_streaming(imports, self.config_path, project, self.settings)
+            else:
+                # files the config names are next to it
+                core.execute(imports, self.project_json, self.settings,
+                             self.config_path.absolute().parent if self.config_path else None)
             self.finished.emit()
         except Exception as e:
             self.logger.exception("Exception in TIA Portal execution")
@@ -52,10 +61,14 @@ class MainWindow(QMainWindow):
         self.logger.info("Application started.")
 
         self.project_json: dict = {}
+        self.config_cache: DiskCache = DiskCache(configuration.VERSION)
         self.library_filepath: Path = Path()
+        self.config_path: Path | None = None
         self.dlls: dict[str, Path] = core.generate_dlls()
-        self.settings: dict = {
+        # scratch directory, caches, ... from the settings file
+        self.settings: dict = self._load_settings() | {
             "enable_ui": self.ui.checkBox_enable_ui.isChecked(),
+            "stream": self.ui.checkbox_stream.isChecked(),
         }
 
         self._generate_dlls()
@@ -70,6 +83,7 @@ class MainWindow(QMainWindow):
         self.ui.combobox_dll_versions.currentTextChanged.connect(self.change_version)
         self.ui.checkBox_enable_ui.toggled.connect(self.toggle_enable_ui)
         self.ui.checkbox_allow_overwrite.toggled.connect(self.toggle_overwrite)
+        self.ui.checkbox_stream.toggled.connect(self.toggle_stream)
         self.ui.actionImport.triggered.connect(self.import_file)
         self.ui.actionExit.triggered.connect(lambda: QApplication.quit())
 
@@ -86,7 +100,7 @@ class MainWindow(QMainWindow):
         self.project_json['libraries'] = [{"path": self.library_filepath}]
 
         self.ui.button_execute_portal.setEnabled(False)
-        self.worker = PortalWorker(dll, self.project_json, self.settings)
+        self.worker = PortalWorker(dll, self.project_json, self.settings, self.config_path)
         self.worker.finished.connect(self._on_execute_finished)
         self.worker.error.connect(self._on_execute_error)
         self.worker.start()
@@ -105,18 +119,17 @@ class MainWindow(QMainWindow):
         file_path, _ = QFileDialog.getOpenFileName(self, "Import JSON Config", "", "JSON Files (*.json)")
         if file_path:
             file_path: Path = Path(file_path)
-            with open(file_path) as json_file:
-                loaded_json = json.load(json_file)
-                try:
-                    self.project_json = configuration.validate(loaded_json)
-                    self.ui.label_json_filepath.setText(file_path.name)
-                    self.project_json['directory'] = file_path.absolute().parent
-                    self.project_json['name'] = file_path.stem
-                    self.project_json['overwrite'] = self.ui.checkbox_allow_overwrite.isChecked()
-                    self.logger.info(f"Imported Json Config: {file_path}")
-                except:
-                    self.logger.error(f"Invalid project config! Did not validate: {file_path}")
-                    self.ui.label_json_filepath.setText("INVALID CONFIG!")
+            try:
+                self.project_json = configuration.load(file_path, self.config_cache)
+                self.ui.label_json_filepath.setText(file_path.name)
+                self.project_json['directory'] = file_path.absolute().parent
+                self.project_json['name'] = file_path.stem
+                self.project_json['overwrite'] = self.ui.checkbox_allow_overwrite.isChecked()
+                self.config_path = file_path
+                self.logger.info(f"Imported Json Config: {file_path}")
+            except:
+                self.logger.error(f"Invalid project config! Did not validate: {file_path}")
+                self.ui.label_json_filepath.setText("INVALID CONFIG!")
 
     def change_version(self, text: str):
         self.version = text
@@ -150,6 +163,20 @@ class MainWindow(QMainWindow):
         else:
             self.logger.info(f"TIA Portal will NOT OVERWRITE existing project.")
 
+    def toggle_stream(self, checked: bool):
+        self.settings['stream'] = checked
+        if checked:
+            self.logger.info(f"Devices will be created one at a time, holding only one in memory.")
+        else:
+            self.logger.info(f"All devices will be planned before TIA Portal starts.")
+
+    def _load_settings(self) -> dict:
+        try:
+            return settings.load()
+        except ValueError as e:
+            self.logger.error(f"Settings file not used: {e}")
+            return dict(settings.DEFAULTS)
+
     def _generate_dlls(self):
         for dll_name in self.dlls:
             self.ui.combobox_dll_versions.addItem(dll_name)
@@ -130,6 +130,12 @@ class Ui_MainWindow(object):
 
         self.horizontalLayout.addWidget(self.checkbox_allow_overwrite)
 
+        self.checkbox_stream = QCheckBox(self.centralwidget)
+        self.checkbox_stream.setObjectName(u"checkbox_stream")
+        self.checkbox_stream.setFont(font)
+
+        self.horizontalLayout.addWidget(self.checkbox_stream)
+
 
         self.verticalLayout.addLayout(self.horizontalLayout)
 
@@ -192,6 +198,7 @@ class Ui_MainWindow(object):
         self.label_3.setText(QCoreApplication.translate("MainWindow", u"TIA Version:", None))
         self.checkBox_enable_ui.setText(QCoreApplication.translate("MainWindow", u"Enable UI", None))
         self.checkbox_allow_overwrite.setText(QCoreApplication.translate("MainWindow", u"Overwrite", None))
+        self.checkbox_stream.setText(QCoreApplication.translate("MainWindow", u"Stream", None))
         self.textbrowser_logs.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Welcome to TIA Portal Automation Tool by Titus Global Tech", None))
         self.button_copy_logs.setText(QCoreApplication.translate("MainWindow", u"Copy Logs", None))
         self.button_execute_portal.setText(QCoreApplication.translate("MainWindow", u"Create Project", None))